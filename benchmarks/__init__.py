@@ -0,0 +1 @@
+"""Init file for the benchmarks package."""
@@ -0,0 +1,262 @@
+"""In-process stand-in for the MeTube API with latency and failure injection.
+
+The server implements the endpoints used by MeTubeConnector: ``POST /add``
+queues a download and ``GET /history`` lists the queued and finished ones.
+Queued downloads finish one after another, each taking ``download_seconds``.
+
+Usage:
+    python -m benchmarks.fake_me_tube --port 8081 --latency 0.2 --error-rate 0.1
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+
+class FakeMeTube:
+    """MeTube stand-in serving HTTP in a background thread."""
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        queue_limit: int = 0,
+        download_seconds: float = 0.0,
+        download_error_rate: float = 0.0,
+        seed: Optional[int] = None,
+    ) -> None:
+        """Initialize the FakeMeTube.
+
+        Args:
+            latency: The seconds every request takes before it is answered.
+            jitter: The maximum random seconds added to the latency.
+            error_rate: The share of submissions answered with status 500.
+            queue_limit: The queue length at which submissions are answered
+                with status 503, 0 for no limit.
+            download_seconds: The seconds every queued download takes.
+            download_error_rate: The share of downloads finishing with an error.
+            seed: The seed of the random failures and jitter.
+
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.queue_limit = queue_limit
+        self.download_seconds = download_seconds
+        self.download_error_rate = download_error_rate
+
+        self.requests = 0
+        self.accepted = 0
+        self.rejected = 0
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._queue: Deque[Tuple[float, Dict[str, Any]]] = deque()
+        self._done: List[Dict[str, Any]] = []
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        """The base URL of the running server."""
+        if self._server is None:
+            raise RuntimeError("The fake MeTube server is not running")
+        port = self._server.server_address[1]
+        return f"http://127.0.0.1:{port}"
+
+    def start(self, port: int = 0) -> str:
+        """Start serving in a background thread.
+
+        Args:
+            port: The port to listen on, 0 for a free one.
+
+        Returns:
+            The base URL of the server.
+
+        """
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(
+            target=self._server.serve_forever,
+            kwargs={"poll_interval": 0.05},
+            name="fake-me-tube",
+            daemon=True,
+        )
+        self._thread.start()
+        return self.base_url
+
+    def stop(self) -> None:
+        """Stop the server and wait for its thread."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> "FakeMeTube":
+        """Start the server when entering a with block."""
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        """Stop the server when leaving a with block."""
+        self.stop()
+
+    def add(self, item: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        """Handle a submission.
+
+        Args:
+            item: The submitted JSON body.
+
+        Returns:
+            The status code and JSON body of the response.
+
+        """
+        self._sleep()
+        with self._lock:
+            self.requests += 1
+            self._finish_downloads()
+            if self._random.random() < self.error_rate:
+                self.rejected += 1
+                return 500, {"status": "error", "msg": "injected failure"}
+            if self.queue_limit and len(self._queue) >= self.queue_limit:
+                self.rejected += 1
+                return 503, {"status": "error", "msg": "queue full"}
+
+            start = self._queue[-1][0] if self._queue else time.monotonic()
+            self._queue.append((start + self.download_seconds, dict(item)))
+            self.accepted += 1
+            return 200, {"status": "ok"}
+
+    def history(self) -> Dict[str, Any]:
+        """Return the queued and finished downloads like MeTube does.
+
+        Returns:
+            The history with the lists "queue", "pending" and "done".
+
+        """
+        self._sleep()
+        with self._lock:
+            self._finish_downloads()
+            return {
+                "queue": [item for _, item in self._queue],
+                "pending": [],
+                "done": list(self._done),
+            }
+
+    def _finish_downloads(self) -> None:
+        """Move the downloads whose time is up from the queue to done."""
+        now = time.monotonic()
+        while self._queue and self._queue[0][0] <= now:
+            _, item = self._queue.popleft()
+            failed = self._random.random() < self.download_error_rate
+            self._done.append({**item, "status": "error" if failed else "finished"})
+
+    def _sleep(self) -> None:
+        """Wait for the configured latency."""
+        with self._lock:
+            delay = self.latency + self._random.uniform(0, self.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+    def _make_handler(self) -> type:
+        """Create the request handler class bound to this instance.
+
+        Returns:
+            A BaseHTTPRequestHandler subclass.
+
+        """
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            """Request handler of the fake MeTube API."""
+
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self) -> None:
+                """Serve the history."""
+                if self.path.rstrip("/") == "/history":
+                    self._respond(200, fake.history())
+                else:
+                    self._respond(404, {"status": "error", "msg": "not found"})
+
+            def do_POST(self) -> None:
+                """Serve submissions."""
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length)
+                if self.path.rstrip("/") != "/add":
+                    self._respond(404, {"status": "error", "msg": "not found"})
+                    return
+                try:
+                    item = json.loads(body)
+                except ValueError:
+                    self._respond(400, {"status": "error", "msg": "invalid JSON"})
+                    return
+                self._respond(*fake.add(item))
+
+            def log_message(self, format: str, *args: Any) -> None:
+                """Keep benchmark output free of access logs."""
+
+            def _respond(self, status: int, body: Dict[str, Any]) -> None:
+                """Send a JSON response.
+
+                Args:
+                    status: The status code.
+                    body: The JSON body.
+
+                """
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Serve a fake MeTube API until interrupted.
+
+    Args:
+        argv: The command line arguments, defaults to sys.argv.
+
+    """
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.fake_me_tube")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--queue-limit", type=int, default=0)
+    parser.add_argument("--download-seconds", type=float, default=0.0)
+    parser.add_argument("--download-error-rate", type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    fake = FakeMeTube(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        queue_limit=args.queue_limit,
+        download_seconds=args.download_seconds,
+        download_error_rate=args.download_error_rate,
+    )
+    print(f"Fake MeTube listening on {fake.start(args.port)}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        fake.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Measure how long importing a module takes in a fresh interpreter.
+
+Usage:
+    python -m benchmarks.import_time src.__main__ src.auto_download_artists
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+from typing import List, NamedTuple, Optional
+
+IMPORT_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+__import__(sys.argv[1])
+seconds = time.perf_counter() - start
+print(json.dumps({"seconds": seconds, "modules": sorted(sys.modules)}))
+"""
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+class ImportResult(NamedTuple):
+    """Outcome of importing a module."""
+
+    module: str
+    seconds: float
+    modules: List[str]
+
+
+def measure_import(module: str) -> ImportResult:
+    """Import a module in a new interpreter and time it.
+
+    Args:
+        module: The dotted name of the module.
+
+    Returns:
+        The import time and the modules loaded by the import.
+
+    Raises:
+        RuntimeError: If the module could not be imported.
+
+    """
+    process = subprocess.run(
+        [sys.executable, "-c", IMPORT_SCRIPT, module],
+        capture_output=True,
+        text=True,
+        cwd=ROOT,
+    )
+    if process.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{process.stderr}")
+    result = json.loads(process.stdout.splitlines()[-1])
+    return ImportResult(module, result["seconds"], result["modules"])
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Print the import time of modules.
+
+    Args:
+        argv: The command line arguments, defaults to sys.argv.
+
+    """
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.import_time")
+    parser.add_argument("modules", nargs="*", default=["src.__main__"])
+    args = parser.parse_args(argv)
+
+    for module in args.modules:
+        result = measure_import(module)
+        print(
+            f"{result.module}: {result.seconds:.3f}s, "
+            f"{len(result.modules)} modules loaded"
+        )
+
+
+if __name__ == "__main__":
+    main()
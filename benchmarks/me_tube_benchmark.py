@@ -0,0 +1,225 @@
+"""Measure MeTube submission throughput against fake MeTube servers.
+
+The connector and the download handler run unchanged against one or more
+FakeMeTube instances, a temporary SQLite database and synthetic YouTube Music
+metadata, so no network access is needed.
+
+Usage:
+    python -m benchmarks.me_tube_benchmark --mode async --albums 50 --latency 0.1
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, NamedTuple, Optional
+from unittest.mock import patch
+
+from benchmarks.fake_me_tube import FakeMeTube
+from src.database_connector import DatabaseConnector, dispose_engines
+from src.deadline import Deadline
+from src.youtube_handler.backend_pool import reset_backend_pools
+from src.youtube_handler.backpressure import reset_backpressures
+from src.youtube_handler.me_tube_connector import MeTubeConnector, close_sessions
+from src.youtube_handler.youtube_album_fetcher import (
+    ArtistReleases,
+    YoutubeAlbumFetcher,
+)
+from src.youtube_handler.youtube_download_handler import YoutubeDownloadHandler
+
+MODES = ("sync", "async", "channel")
+CHANNEL_URL = "https://music.youtube.com/channel/UCbenchmark"
+
+
+class BenchmarkResult(NamedTuple):
+    """Outcome of a benchmark run."""
+
+    mode: str
+    albums: int
+    accepted: int
+    requests: int
+    seconds: float
+    statements: int
+
+    @property
+    def per_second(self) -> float:
+        """The accepted submissions per second."""
+        return self.accepted / self.seconds if self.seconds else 0.0
+
+
+def get_album_urls(count: int) -> List[str]:
+    """Build synthetic album URLs.
+
+    Args:
+        count: The number of albums.
+
+    Returns:
+        The playlist URLs.
+
+    """
+    return [f"https://music.youtube.com/playlist?list=BENCH{i}" for i in range(count)]
+
+
+@contextmanager
+def benchmark_environment(
+    base_url: str, songs_per_album: int, env: Optional[Dict[str, str]] = None
+) -> Iterator[None]:
+    """Point the connectors at fake MeTube servers and a temporary database.
+
+    Args:
+        base_url: The base URLs of the fake MeTube servers, comma separated.
+        songs_per_album: The number of synthetic songs of every album.
+        env: Additional environment variables, e.g. ME_TUBE_MAX_CONCURRENCY.
+
+    Returns:
+        A context manager restoring the environment and shared state on exit.
+
+    """
+
+    def get_album_songs(
+        album_id: str, deadline: Optional[Deadline] = None
+    ) -> List[str]:
+        return [
+            f"https://music.youtube.com/watch?v={album_id}_{i}"
+            for i in range(songs_per_album)
+        ]
+
+    with tempfile.TemporaryDirectory() as directory:
+        variables = {
+            "ME_TUBE_API_URL": base_url,
+            "DB_SQLITE_PATH": os.path.join(directory, "benchmark.db"),
+            **(env or {}),
+        }
+        try:
+            with (
+                patch.dict("os.environ", variables),
+                patch.object(
+                    YoutubeAlbumFetcher, "get_album_songs", side_effect=get_album_songs
+                ),
+            ):
+                yield
+        finally:
+            dispose_engines()
+            close_sessions()
+            reset_backpressures()
+            reset_backend_pools()
+
+
+def run_benchmark(
+    servers: List[FakeMeTube],
+    mode: str,
+    albums: int,
+    songs_per_album: int = 10,
+    env: Optional[Dict[str, str]] = None,
+) -> BenchmarkResult:
+    """Submit synthetic albums to running fake MeTube servers.
+
+    Args:
+        servers: The running fake MeTube servers.
+        mode: "sync" for MeTubeConnector.queue_download, "async" for
+            MeTubeConnector.queue_download_async and "channel" for a channel
+            submission through YoutubeDownloadHandler.
+        albums: The number of albums to submit.
+        songs_per_album: The number of synthetic songs of every album.
+        env: Additional environment variables, e.g. ME_TUBE_MAX_CONCURRENCY.
+
+    Returns:
+        The benchmark result.
+
+    Raises:
+        ValueError: If the mode is unknown.
+
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown benchmark mode: {mode}")
+    base_url = ",".join(server.base_url for server in servers)
+    album_urls = get_album_urls(albums)
+    accepted = sum(server.accepted for server in servers)
+    requests = sum(server.requests for server in servers)
+
+    with benchmark_environment(base_url, songs_per_album, env):
+        db = DatabaseConnector()
+        with db.track_queries() as stats:
+            start = time.perf_counter()
+            if mode == "sync":
+                MeTubeConnector(db_connector=db).queue_download(album_urls)
+            elif mode == "async":
+                mt = MeTubeConnector(db_connector=db)
+                asyncio.run(mt.queue_download_async(album_urls))
+            else:
+                releases = ArtistReleases(album_urls, album_urls, "benchmark")
+                with patch.object(
+                    YoutubeAlbumFetcher, "get_artist_releases", return_value=releases
+                ):
+                    YoutubeDownloadHandler(db).download(CHANNEL_URL)
+            seconds = time.perf_counter() - start
+
+    return BenchmarkResult(
+        mode,
+        albums,
+        sum(server.accepted for server in servers) - accepted,
+        sum(server.requests for server in servers) - requests,
+        seconds,
+        stats.statements,
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Run a benchmark and print its result.
+
+    Args:
+        argv: The command line arguments, defaults to sys.argv.
+
+    """
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.me_tube_benchmark")
+    parser.add_argument("--mode", choices=MODES, default="async")
+    parser.add_argument("--albums", type=int, default=20)
+    parser.add_argument("--songs-per-album", type=int, default=10)
+    parser.add_argument("--backends", type=int, default=1)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--queue-limit", type=int, default=0)
+    parser.add_argument("--download-seconds", type=float, default=0.0)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--retries", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    servers = [
+        FakeMeTube(
+            latency=args.latency,
+            jitter=args.jitter,
+            error_rate=args.error_rate,
+            queue_limit=args.queue_limit,
+            download_seconds=args.download_seconds,
+        )
+        for _ in range(args.backends)
+    ]
+    for server in servers:
+        server.start()
+    try:
+        result = run_benchmark(
+            servers,
+            args.mode,
+            args.albums,
+            args.songs_per_album,
+            {
+                "ME_TUBE_MAX_CONCURRENCY": str(args.concurrency),
+                "ME_TUBE_RETRIES": str(args.retries),
+            },
+        )
+    finally:
+        for server in servers:
+            server.stop()
+
+    print(
+        f"{result.mode}: {result.accepted} of {result.albums} albums accepted "
+        f"with {result.requests} requests in {result.seconds:.2f}s "
+        f"({result.per_second:.1f}/s, {result.statements} SQL statements)"
+    )
+
+
+if __name__ == "__main__":
+    main()
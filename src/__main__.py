@@ -2,11 +2,15 @@
 
 import logging
 import src.logging_config  # noqa: F401
-from nicegui import ui
+from nicegui import app, ui
 
+from src.async_database_connector import dispose_async_engines
+from src.database_connector import dispose_engines
 from src.ui.theme import apply_theme
 from src.ui.components import SettingsDrawer, HelpDialog
 from src.ui.logic import process_submission
+from src.youtube_handler.me_tube_connector import close_sessions
+from src.youtube_handler.outbox_worker import start_outbox_worker, stop_outbox_worker
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -71,5 +75,11 @@ def main_page():
     MusicApiApp()
 
 
+app.on_startup(start_outbox_worker)
+app.on_shutdown(stop_outbox_worker)
+app.on_shutdown(dispose_engines)
+app.on_shutdown(dispose_async_engines)
+app.on_shutdown(close_sessions)
+
 if __name__ in {"__main__", "__mp_main__"}:
     ui.run(host="0.0.0.0", port=8080, title="MusicAPI")
@@ -0,0 +1,359 @@
+"""Asynchronous database connector for use inside the NiceGUI event loop."""
+
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+import sqlalchemy as sa
+from sqlalchemy import Row, insert, select
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from src.database_connector import (
+    DOWNLOAD_DONE,
+    KEY_COLUMNS,
+    Album,
+    Artist,
+    BulkInsert,
+    DownloadModel,
+    Song,
+    get_pool_options,
+    configure_sqlite_engine,
+    get_database_url,
+    get_shared_engine,
+    returns_inserted_rows,
+)
+from src.known_id_index import KnownIdIndex, get_known_id_index
+from src.query_stats import instrument_engine
+from src.url_keys import album_key, artist_key, song_key
+
+ASYNC_DRIVERS = {
+    "mysql": "mysql+aiomysql",
+    "mysql+mysqlconnector": "mysql+aiomysql",
+    "mysql+pymysql": "mysql+aiomysql",
+    "mariadb+mariadbconnector": "mariadb+aiomysql",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+_async_engines: Dict[str, AsyncEngine] = {}
+_async_engines_lock = threading.Lock()
+
+
+def get_shared_async_engine(url: str) -> AsyncEngine:
+    """Return the process-wide async engine for a database URL.
+
+    Args:
+        url: The database URL using an asyncio driver.
+
+    Returns:
+        The shared SQLAlchemy AsyncEngine instance.
+
+    """
+    with _async_engines_lock:
+        engine = _async_engines.get(url)
+        if engine is None:
+            engine = create_async_engine(url, **get_pool_options(url))
+            if engine.dialect.name == "sqlite":
+                configure_sqlite_engine(engine.sync_engine)
+            instrument_engine(engine.sync_engine)
+            _async_engines[url] = engine
+        return engine
+
+
+async def dispose_async_engines() -> None:
+    """Dispose all shared async engines and close their pooled connections."""
+    with _async_engines_lock:
+        engines = list(_async_engines.values())
+        _async_engines.clear()
+    for engine in engines:
+        await engine.dispose()
+
+
+class AsyncDatabaseConnector:
+    """Asynchronous database connector for managing artists, albums, and songs."""
+
+    def __init__(self) -> None:
+        """Initialize the AsyncDatabaseConnector and set up the async engine."""
+        self.engine = self._get_engine()
+
+        index_path = os.environ.get("KNOWN_ID_INDEX_PATH")
+        self.known_ids: Optional[KnownIdIndex] = (
+            get_known_id_index(index_path) if index_path else None
+        )
+
+    async def remove_album(self, album_url: str) -> None:
+        """Remove an album from the database.
+
+        Args:
+            album_url: The URL of the album to remove.
+
+        """
+        stmt = sa.delete(Album).where(Album.playlist_id == album_key(album_url))
+        async with self.engine.connect() as conn:
+            await conn.execute(stmt)
+            await conn.commit()
+
+    async def get_artist_id(self, artist_url: str) -> Optional[int]:
+        """Get the artist ID for a given artist URL.
+
+        Args:
+            artist_url: The URL of the artist.
+
+        Returns:
+            The artist ID if found, otherwise None.
+
+        """
+        stmt = select(Artist.id).where(Artist.channel_id == artist_key(artist_url))
+        async with self.engine.connect() as conn:
+            result = (await conn.execute(stmt)).fetchone()
+            return result[0] if result else None
+
+    async def add_artist(
+        self, artist_url: str, auto_download: bool
+    ) -> Optional[Row[Any]]:
+        """Add an artist to the database if not already present.
+
+        Args:
+            artist_url: The URL of the artist.
+            auto_download: Whether to mark the artist for auto-download.
+
+        Returns:
+            The artist ID.
+
+        """
+        artist = await self.get_artist(artist_url)
+        async with self.engine.connect() as conn:
+            if artist is not None:
+                if auto_download and not artist.auto_download:
+                    await conn.execute(
+                        sa.update(Artist)
+                        .where(Artist.id == artist.id)
+                        .values(auto_download=True)
+                    )
+                    await conn.commit()
+                return artist
+
+            stmt = insert(Artist).values(
+                url=artist_url,
+                channel_id=artist_key(artist_url),
+                auto_download=auto_download,
+            )
+            res = (await conn.execute(stmt)).inserted_primary_key
+            await conn.commit()
+            return res
+
+    async def add_album(
+        self, album_url: str, download_state: str = DOWNLOAD_DONE
+    ) -> Optional[int]:
+        """Add an album to the database if not already present.
+
+        Args:
+            album_url: The URL of the album.
+            download_state: The download state of a new album.
+
+        Returns:
+            The album ID.
+
+        """
+        album = await self.get_album(album_url)
+        if album is not None:
+            return album
+        new_ids = await self.add_albums([album_url], download_state)
+        return new_ids[0] if new_ids else await self.get_album(album_url)
+
+    async def add_song(
+        self, song_url: str, download_state: str = DOWNLOAD_DONE
+    ) -> Optional[int]:
+        """Add a song to the database if not already present.
+
+        Args:
+            song_url: The URL of the song.
+            download_state: The download state of a new song.
+
+        Returns:
+            The song ID.
+
+        """
+        song = await self.get_song(song_url)
+        if song is not None:
+            return song
+        new_ids = await self.add_songs([song_url], download_state)
+        return new_ids[0] if new_ids else await self.get_song(song_url)
+
+    async def add_songs(
+        self, song_urls: List[str], download_state: str = DOWNLOAD_DONE
+    ) -> List[int]:
+        """Add multiple songs to the database, skipping already present ones.
+
+        Args:
+            song_urls: The URLs of the songs.
+            download_state: The download state of new songs.
+
+        Returns:
+            The IDs of the newly inserted songs.
+
+        """
+        return await self._add_many(Song, song_urls, download_state)
+
+    async def add_albums(
+        self, album_urls: List[str], download_state: str = DOWNLOAD_DONE
+    ) -> List[int]:
+        """Add multiple albums to the database, skipping already present ones.
+
+        Args:
+            album_urls: The URLs of the albums.
+            download_state: The download state of new albums.
+
+        Returns:
+            The IDs of the newly inserted albums.
+
+        """
+        return await self._add_many(Album, album_urls, download_state)
+
+    async def _add_many(
+        self, model: DownloadModel, urls: List[str], download_state: str = DOWNLOAD_DONE
+    ) -> List[int]:
+        """Insert rows for the given URLs in chunked multi-row statements.
+
+        Args:
+            model: The model of the table to insert into.
+            urls: The URLs to insert.
+            download_state: The download state of the new rows.
+
+        Returns:
+            The IDs of the newly inserted rows in input order. Without
+                RETURNING they are told apart from rows inserted concurrently
+                like in DatabaseConnector._add_many.
+
+        """
+        bulk = BulkInsert(model, urls, download_state)
+        new_ids: List[int] = []
+        async with self.engine.connect() as conn:
+            for chunk in bulk.chunks():
+                result = await conn.execute(bulk.select_existing(chunk))
+                existing = set(result.scalars())
+                missing = [key for key in chunk if key not in existing]
+                if not missing:
+                    continue
+
+                stmt = bulk.insert(self.engine.dialect, missing)
+                if returns_inserted_rows(self.engine.dialect):
+                    inserted = await conn.execute(stmt)
+                else:
+                    created = missing
+                    savepoint = await conn.begin_nested()
+                    if (await conn.execute(stmt)).rowcount == len(missing):
+                        await savepoint.commit()
+                    else:
+                        await savepoint.rollback()
+                        created = []
+                        for key in missing:
+                            result = await conn.execute(
+                                bulk.insert(self.engine.dialect, [key])
+                            )
+                            if result.rowcount:
+                                created.append(key)
+                    inserted = await conn.execute(bulk.select_ids(created))
+                ids = bulk.new_ids(missing, inserted)
+                await conn.commit()
+                if self.known_ids is not None:
+                    self.known_ids.add(model.__tablename__, missing)
+                new_ids.extend(ids)
+        return new_ids
+
+    async def get_auto_download_artists(self) -> List[str]:
+        """Retrieve a list of artist URLs marked for auto-download.
+
+        Returns:
+            A list of artist URLs.
+
+        """
+        stmt = select(Artist.url).where(Artist.auto_download == True)  # noqa: E712
+        async with self.engine.connect() as conn:
+            result = await conn.execute(stmt)
+            return list(result.scalars().all())
+
+    async def get_song(self, song_url: str) -> Optional[int]:
+        """Get the song ID for a given song URL.
+
+        Args:
+            song_url: The URL of the song.
+
+        Returns:
+            The song ID if found, otherwise None.
+
+        """
+        return await self._get_id(Song, song_key(song_url))
+
+    async def get_album(self, album_url: str) -> Optional[int]:
+        """Get the album ID for a given album URL.
+
+        Args:
+            album_url: The URL of the album.
+
+        Returns:
+            The album ID if found, otherwise None.
+
+        """
+        return await self._get_id(Album, album_key(album_url))
+
+    async def get_artist(self, artist_url: str) -> Optional[Row[Any]]:
+        """Get the artist for a given artist URL.
+
+        Args:
+            artist_url: The URL of the artist.
+
+        Returns:
+            The artist row if found, otherwise None.
+
+        """
+        stmt = select(Artist).where(Artist.channel_id == artist_key(artist_url))
+        async with self.engine.connect() as conn:
+            return (await conn.execute(stmt)).fetchone()
+
+    async def _get_id(self, model: DownloadModel, key: str) -> Optional[int]:
+        """Get the ID of the row with the given key.
+
+        Args:
+            model: The model of the table to query.
+            key: The key of the row.
+
+        Returns:
+            The ID if found, otherwise None.
+
+        """
+        if (
+            self.known_ids is not None
+            and self.known_ids.exists
+            and not self.known_ids.contains(model.__tablename__, key)
+        ):
+            return None
+
+        key_column = KEY_COLUMNS[model][0]
+        stmt = select(model.id).where(key_column == key)
+        async with self.engine.connect() as conn:
+            result = (await conn.execute(stmt)).fetchone()
+            return result[0] if result else None
+
+    @staticmethod
+    def _get_engine() -> AsyncEngine:
+        """Return the shared async engine configured by environment variables.
+
+        The asyncio driver is taken from DB_ASYNC_DRIVER, or derived from
+        DB_DRIVER. In embedded SQLite mode the tables are created through the
+        synchronous engine first.
+
+        Returns:
+            A SQLAlchemy AsyncEngine instance.
+
+        """
+        if os.environ.get("DB_SQLITE_PATH"):
+            get_shared_engine(get_database_url())
+            driver = "sqlite"
+        else:
+            driver = os.environ.get("DB_DRIVER", "mysql+mysqlconnector")
+        async_driver = os.environ.get(
+            "DB_ASYNC_DRIVER", ASYNC_DRIVERS.get(driver, driver)
+        )
+        return get_shared_async_engine(get_database_url(async_driver))
@@ -1,28 +1,79 @@
 """Automatically download albums from artists marked for auto-download."""
 
+import asyncio
 import logging
 import src.logging_config  # initialize logging  # noqa: F401
 
 from src.youtube_handler.me_tube_connector import MeTubeConnector
-from src.database_connector import DatabaseConnector
+from src.database_connector import DatabaseConnector, dispose_engines
+from src.youtube_handler.metadata_cache import get_metadata_cache
+from src.youtube_handler.release_classifier import classifier_stats
 from src.youtube_handler.youtube_album_fetcher import YoutubeAlbumFetcher
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 
+def _download_new_releases(
+    db: DatabaseConnector, mt: MeTubeConnector, artist_url: str
+) -> None:
+    """Queue the releases of an artist that were not seen in a previous run.
+
+    The catalog of the artist is only updated once MeTube accepted all new
+    releases, so rejected ones are tried again in the next run. Releases only
+    written to the outbox count as not accepted yet, they are submitted again
+    until the outbox delivered them, which also revives dead entries.
+
+    Args:
+        db: The DatabaseConnector holding the artist catalog.
+        mt: The MeTubeConnector to queue downloads with.
+        artist_url: The URL of the artist.
+
+    """
+    catalog = db.get_artist_catalog(artist_url)
+    releases = YoutubeAlbumFetcher.get_artist_releases(
+        artist_url,
+        known_fingerprint=catalog.fingerprint if catalog else None,
+        known_release_ids=catalog.release_ids if catalog else (),
+    )
+    if catalog is not None and releases.fingerprint == catalog.fingerprint:
+        logger.info(f"No new releases for artist {artist_url}, skipping.")
+        db.touch_artist_catalog(artist_url)
+        return
+
+    queued = asyncio.run(mt.queue_download_async(releases.album_urls))
+    failed = [result.url for result in queued if result.failed]
+    if failed:
+        logger.warning(
+            f"MeTube did not accept {len(failed)} releases of artist {artist_url}, "
+            "retrying them in the next run."
+        )
+        return
+    outboxed = [result.url for result in queued if result.outboxed]
+    if outboxed:
+        logger.info(
+            f"{len(outboxed)} releases of artist {artist_url} wait in the outbox, "
+            "checking them again in the next run."
+        )
+        return
+    db.save_artist_catalog(artist_url, releases.fingerprint, releases.release_ids)
+
+
 def main():
     """Automatically download albums from artists marked for auto-download."""
-    db = DatabaseConnector()
-    mt = MeTubeConnector(base_url=None)
-
-    artist_urls = db.get_auto_download_artists()
-    for artist_url in artist_urls:
-        try:
-            album_urls = YoutubeAlbumFetcher.get_album_ids(artist_url)
-            mt.queue_download(album_urls)
-        except Exception as e:
-            logger.error(f"Error processing artist {artist_url}: {e}")
+    try:
+        db = DatabaseConnector()
+        mt = MeTubeConnector(base_url=None, db_connector=db)
+        artist_urls = db.get_auto_download_artists()
+        for artist_url in artist_urls:
+            try:
+                _download_new_releases(db, mt, artist_url)
+            except Exception as e:
+                logger.error(f"Error processing artist {artist_url}: {e}")
+    finally:
+        logger.info(f"YouTube Music cache usage: {get_metadata_cache().stats}")
+        logger.info(f"Album fetches for singles: {classifier_stats}")
+        dispose_engines()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,22 @@
+"""Fill the key columns of rows stored before key columns were introduced."""
+
+import logging
+import src.logging_config  # initialize logging  # noqa: F401
+
+from src.database_connector import DatabaseConnector, dispose_engines
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+def main():
+    """Backfill the channel, playlist and video ID columns of existing rows."""
+    try:
+        counts = DatabaseConnector().backfill_keys()
+        logger.info(f"Backfilled key columns: {counts}")
+    finally:
+        dispose_engines()
+
+
+if __name__ == "__main__":
+    main()
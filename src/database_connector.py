@@ -1,11 +1,217 @@
 """Database connector for managing the database."""
 
+import atexit
+import itertools
+import json
+import logging
 import os
-from typing import List, Optional, Any
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import (
+    Any,
+    Callable,
+    ContextManager,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Type,
+    Union,
+)
 
 import sqlalchemy as sa
-from sqlalchemy import insert, Engine, select, Row
-from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy import event, insert, Connection, Engine, select, Row
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.orm import DeclarativeBase, InstrumentedAttribute, Mapped, mapped_column
+from sqlalchemy.sql.dml import Insert
+
+from src.known_id_index import KnownIdIndex, get_known_id_index
+from src.query_stats import QueryStats, instrument_engine, track_queries
+from src.url_keys import album_key, artist_key, song_key
+
+BULK_CHUNK_SIZE = 500
+
+DOWNLOAD_QUEUED = "queued"
+DOWNLOAD_DONE = "done"
+DOWNLOAD_FAILED = "failed"
+
+OUTBOX_PENDING = "pending"
+OUTBOX_DONE = "done"
+OUTBOX_DEAD = "dead"
+
+logger = logging.getLogger(__name__)
+
+
+_engines: Dict[str, Engine] = {}
+_engines_lock = threading.Lock()
+
+_buffered_connectors: "weakref.WeakSet[DatabaseConnector]" = weakref.WeakSet()
+
+
+def get_pool_options(url: str) -> Dict[str, Any]:
+    """Build the connection pool options for an engine from environment variables.
+
+    Args:
+        url: The database URL the engine is created for.
+
+    Returns:
+        Keyword arguments for ``sqlalchemy.create_engine``.
+
+    """
+    options: Dict[str, Any] = {
+        "pool_pre_ping": os.environ.get("DB_POOL_PRE_PING", "true").lower()
+        in ("1", "true", "yes"),
+        "pool_recycle": int(os.environ.get("DB_POOL_RECYCLE", "1800")),
+    }
+    if not url.startswith("sqlite"):
+        options["pool_size"] = int(os.environ.get("DB_POOL_SIZE", "5"))
+        options["max_overflow"] = int(os.environ.get("DB_MAX_OVERFLOW", "10"))
+    return options
+
+
+def get_write_behind_options() -> Tuple[int, int]:
+    """Read the write-behind buffer settings from environment variables.
+
+    Returns:
+        The number of buffered rows that triggers a flush, 0 if buffering is
+            disabled, and the maximum time in milliseconds rows stay buffered.
+
+    """
+    return (
+        int(os.environ.get("DB_WRITE_BEHIND_ROWS", "0")),
+        int(os.environ.get("DB_WRITE_BEHIND_MS", "500")),
+    )
+
+
+def get_replica_lag_seconds() -> float:
+    """Read how long reads stay on the primary after a write.
+
+    Returns:
+        The seconds from DB_REPLICA_LAG_SECONDS, 5 by default.
+
+    """
+    return float(os.environ.get("DB_REPLICA_LAG_SECONDS", "5"))
+
+
+def get_sqlite_pragmas() -> Dict[str, str]:
+    """Build the pragmas applied to every SQLite connection.
+
+    Returns:
+        The pragma values by name.
+
+    """
+    return {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": os.environ.get("DB_SQLITE_BUSY_TIMEOUT", "5000"),
+        "mmap_size": os.environ.get("DB_SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)),
+        "temp_store": "MEMORY",
+    }
+
+
+def _set_sqlite_pragmas(dbapi_connection: Any, connection_record: Any) -> None:
+    """Apply the SQLite pragmas to a new DBAPI connection.
+
+    Args:
+        dbapi_connection: The new DBAPI connection.
+        connection_record: The pool record of the connection.
+
+    """
+    cursor = dbapi_connection.cursor()
+    for name, value in get_sqlite_pragmas().items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+
+def configure_sqlite_engine(engine: Engine) -> None:
+    """Tune a file based SQLite engine and create the tables if missing.
+
+    WAL mode with a busy timeout lets the web service and the auto download
+    job use the same database file concurrently.
+
+    Args:
+        engine: The SQLite engine.
+
+    """
+    if engine.url.database in (None, "", ":memory:"):
+        return
+    event.listen(engine, "connect", _set_sqlite_pragmas)
+    if engine.dialect.is_async:
+        return
+    Base.metadata.create_all(engine)
+
+
+def get_shared_engine(url: str) -> Engine:
+    """Return the process-wide engine for a database URL, creating it if needed.
+
+    All connectors using the same URL share one engine and therefore one
+    connection pool.
+
+    Args:
+        url: The database URL.
+
+    Returns:
+        The shared SQLAlchemy Engine instance.
+
+    """
+    with _engines_lock:
+        engine = _engines.get(url)
+        if engine is None:
+            engine = sa.create_engine(url, **get_pool_options(url))
+            if engine.dialect.name == "sqlite":
+                configure_sqlite_engine(engine)
+            instrument_engine(engine)
+            _engines[url] = engine
+        return engine
+
+
+def chunks(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Split an iterable into consecutive chunks without materializing it.
+
+    Args:
+        items: The iterable to split.
+        size: The maximum size of each chunk.
+
+    Returns:
+        An iterator over the chunks.
+
+    """
+    iterator = iter(items)
+    while chunk := list(itertools.islice(iterator, size)):
+        yield chunk
+
+
+def flush_write_behind_buffers() -> None:
+    """Flush the buffered inserts of all connectors with write-behind enabled."""
+    for connector in list(_buffered_connectors):
+        try:
+            connector.flush()
+        except Exception as e:
+            logger.error(f"Failed to flush buffered inserts: {e}")
+
+
+atexit.register(flush_write_behind_buffers)
+
+
+def dispose_engines() -> None:
+    """Dispose all shared engines and close their pooled connections.
+
+    Buffered inserts are flushed first so that they are not lost on shutdown.
+
+    """
+    flush_write_behind_buffers()
+    with _engines_lock:
+        for engine in _engines.values():
+            engine.dispose()
+        _engines.clear()
 
 
 class Base(DeclarativeBase):
@@ -18,25 +224,319 @@ class Artist(Base):
     """SQLAlchemy model for the 'artist' table."""
 
     __tablename__ = "artist"
-    id = sa.Column(sa.Integer, primary_key=True)
-    url = sa.Column(sa.String, unique=True)
-    auto_download = sa.Column(sa.Boolean, default=False)
+    id: Mapped[int] = mapped_column(sa.Integer, primary_key=True)
+    url: Mapped[str] = mapped_column(sa.String(255), nullable=False)
+    channel_id: Mapped[Optional[str]] = mapped_column(
+        sa.String(64), unique=True, index=True
+    )
+    auto_download: Mapped[Optional[bool]] = mapped_column(sa.Boolean, default=False)
 
 
 class Album(Base):
     """SQLAlchemy model for the 'albums' table."""
 
     __tablename__ = "album"
-    id = sa.Column(sa.Integer, primary_key=True)
-    url = sa.Column(sa.String, unique=True)
+    id: Mapped[int] = mapped_column(sa.Integer, primary_key=True)
+    url: Mapped[str] = mapped_column(sa.String(255), nullable=False)
+    playlist_id: Mapped[Optional[str]] = mapped_column(
+        sa.String(64), unique=True, index=True
+    )
+    download_state: Mapped[str] = mapped_column(
+        sa.String(16),
+        nullable=False,
+        index=True,
+        default=DOWNLOAD_DONE,
+        server_default=DOWNLOAD_DONE,
+    )
+    download_attempts: Mapped[int] = mapped_column(
+        sa.Integer, nullable=False, default=0, server_default="0"
+    )
+    next_retry_at: Mapped[Optional[datetime]] = mapped_column(sa.DateTime)
 
 
 class Song(Base):
     """SQLAlchemy model for the 'songs' table."""
 
     __tablename__ = "song"
-    id = sa.Column(sa.Integer, primary_key=True)
-    url = sa.Column(sa.String, unique=True)
+    id: Mapped[int] = mapped_column(sa.Integer, primary_key=True)
+    url: Mapped[str] = mapped_column(sa.String(255), nullable=False)
+    video_id: Mapped[Optional[str]] = mapped_column(
+        sa.String(64), unique=True, index=True
+    )
+    download_state: Mapped[str] = mapped_column(
+        sa.String(16),
+        nullable=False,
+        index=True,
+        default=DOWNLOAD_DONE,
+        server_default=DOWNLOAD_DONE,
+    )
+    download_attempts: Mapped[int] = mapped_column(
+        sa.Integer, nullable=False, default=0, server_default="0"
+    )
+    next_retry_at: Mapped[Optional[datetime]] = mapped_column(sa.DateTime)
+
+
+class ArtistCatalog(Base):
+    """SQLAlchemy model for the 'artist_catalog' table."""
+
+    __tablename__ = "artist_catalog"
+    id: Mapped[int] = mapped_column(sa.Integer, primary_key=True)
+    channel_id: Mapped[str] = mapped_column(
+        sa.String(64), unique=True, index=True, nullable=False
+    )
+    fingerprint: Mapped[str] = mapped_column(sa.String(64), nullable=False)
+    release_ids: Mapped[str] = mapped_column(sa.Text, nullable=False)
+    last_checked_at: Mapped[datetime] = mapped_column(sa.DateTime, nullable=False)
+
+
+class MeTubeOutbox(Base):
+    """SQLAlchemy model for the 'me_tube_outbox' table."""
+
+    __tablename__ = "me_tube_outbox"
+    id: Mapped[int] = mapped_column(sa.Integer, primary_key=True)
+    url_key: Mapped[str] = mapped_column(
+        sa.String(80), unique=True, index=True, nullable=False
+    )
+    url: Mapped[str] = mapped_column(sa.String(255), nullable=False)
+    quality: Mapped[str] = mapped_column(sa.String(32), nullable=False)
+    download_format: Mapped[str] = mapped_column(sa.String(16), nullable=False)
+    status: Mapped[str] = mapped_column(sa.String(16), index=True, nullable=False)
+    attempts: Mapped[int] = mapped_column(sa.Integer, nullable=False, default=0)
+    last_error: Mapped[Optional[str]] = mapped_column(sa.Text)
+    next_attempt_at: Mapped[datetime] = mapped_column(sa.DateTime, nullable=False)
+    locked_until: Mapped[Optional[datetime]] = mapped_column(sa.DateTime)
+
+
+class OutboxEntry(NamedTuple):
+    """A MeTube submission waiting in the 'me_tube_outbox' table."""
+
+    id: int
+    url: str
+    quality: str
+    download_format: str
+    attempts: int
+
+
+class ArtistCatalogEntry(NamedTuple):
+    """Known releases of an artist as stored in the 'artist_catalog' table."""
+
+    fingerprint: str
+    release_ids: List[str]
+    last_checked_at: datetime
+
+
+# the models of the tables whose rows carry a download state
+DownloadModel = Union[Type[Album], Type[Song]]
+
+KEY_COLUMNS: Dict[
+    Type[Base], Tuple[InstrumentedAttribute[Optional[str]], Callable[[str], str]]
+] = {
+    Artist: (Artist.channel_id, artist_key),
+    Album: (Album.playlist_id, album_key),
+    Song: (Song.video_id, song_key),
+}
+
+
+def insert_ignore(
+    dialect: str, model: Type[Base], rows: List[Dict[str, Any]]
+) -> Insert:
+    """Build a multi-row insert that ignores rows violating a unique constraint.
+
+    Args:
+        dialect: The name of the database dialect.
+        model: The model of the table to insert into.
+        rows: The rows to insert.
+
+    Returns:
+        The insert statement for the dialect. Its row count is the number of
+        rows it inserted.
+
+    """
+    if dialect in ("mysql", "mariadb"):
+        return mysql.insert(model).values(rows).prefix_with("IGNORE")
+    if dialect == "sqlite":
+        return sqlite.insert(model).values(rows).on_conflict_do_nothing()
+    if dialect == "postgresql":
+        return postgresql.insert(model).values(rows).on_conflict_do_nothing()
+    return insert(model).values(rows)
+
+
+def returns_inserted_rows(dialect: sa.Dialect) -> bool:
+    """Check whether an insert_ignore statement can return the rows it inserted.
+
+    SQLite and PostgreSQL skip conflicting rows, so RETURNING only yields the
+    inserted ones. On MySQL and MariaDB only the row count tells how many rows
+    were inserted.
+
+    Args:
+        dialect: The dialect of the engine.
+
+    Returns:
+        True if RETURNING reports exactly the inserted rows.
+
+    """
+    return dialect.name in ("sqlite", "postgresql") and dialect.insert_returning
+
+
+class BulkInsert:
+    """Statements of a chunked insert of URLs into a download table.
+
+    The sync and async connectors only differ in how they execute the
+    statements, so the key lookup and the id mapping are shared here.
+
+    """
+
+    def __init__(
+        self, model: DownloadModel, urls: List[str], download_state: str
+    ) -> None:
+        """Deduplicate the given URLs by their key.
+
+        Args:
+            model: The model of the table to insert into.
+            urls: The URLs to insert, empty ones are skipped.
+            download_state: The download state of the new rows.
+
+        """
+        self.model = model
+        self.key_column, get_key = KEY_COLUMNS[model]
+        self.rows: Dict[str, str] = {}
+        for url in urls:
+            if url:
+                self.rows.setdefault(get_key(url), url)
+        self.download_state = download_state
+
+    def chunks(self) -> Iterator[List[str]]:
+        """Split the keys into chunks of BULK_CHUNK_SIZE.
+
+        Returns:
+            An iterator over the chunks of keys.
+
+        """
+        return chunks(self.rows, BULK_CHUNK_SIZE)
+
+    def select_existing(self, keys: List[str]) -> sa.Select:
+        """Build the lookup of the given keys that are already stored.
+
+        Args:
+            keys: The keys to look up.
+
+        Returns:
+            A select of the stored keys.
+
+        """
+        return select(self.key_column).where(self.key_column.in_(keys))
+
+    def insert(self, dialect: sa.Dialect, keys: List[str]) -> Insert:
+        """Build the insert of the given keys.
+
+        On SQLite and PostgreSQL the statement returns the key and id of every
+        inserted row. Elsewhere the inserted rows are found with
+        select_ids once the row count of the statement matches the keys.
+
+        Args:
+            dialect: The dialect of the engine.
+            keys: The keys to insert.
+
+        Returns:
+            The insert statement ignoring rows that already exist.
+
+        """
+        values = [
+            {
+                "url": self.rows[key],
+                self.key_column.name: key,
+                "download_state": self.download_state,
+            }
+            for key in keys
+        ]
+        stmt = insert_ignore(dialect.name, self.model, values)
+        if returns_inserted_rows(dialect):
+            return stmt.returning(self.key_column, self.model.id)
+        return stmt
+
+    def select_ids(self, keys: List[str]) -> sa.Select:
+        """Build the lookup of the ids of the given keys.
+
+        Args:
+            keys: The keys to look up.
+
+        Returns:
+            A select of the key and id of every stored key.
+
+        """
+        return select(self.key_column, self.model.id).where(self.key_column.in_(keys))
+
+    @staticmethod
+    def new_ids(keys: List[str], inserted: Iterable[Row]) -> List[int]:
+        """Map inserted rows back to the order of the given keys.
+
+        Args:
+            keys: The keys that were inserted.
+            inserted: The key and id of every inserted row.
+
+        Returns:
+            The ids of the inserted rows in the order of the keys.
+
+        """
+        ids = {key: row_id for key, row_id in inserted if key is not None}
+        return [ids[key] for key in keys if key in ids]
+
+
+def get_outbox_key(url: str) -> str:
+    """Return the key identifying a song or playlist URL in the outbox.
+
+    Args:
+        url: The song or playlist URL.
+
+    Returns:
+        The key of the URL, prefixed by its kind.
+
+    """
+    if "playlist" in url:
+        return f"album:{album_key(url)}"
+    return f"song:{song_key(url)}"
+
+
+def _utcnow() -> datetime:
+    """Return the current UTC time as a naive datetime, as stored in the tables.
+
+    Returns:
+        The current UTC time.
+
+    """
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def get_database_url(driver: Optional[str] = None, host: Optional[str] = None) -> str:
+    """Build the database URL from environment variables.
+
+    If DB_SQLITE_PATH is set, the URL points to that embedded SQLite database
+    file instead of a database server.
+
+    Args:
+        driver: The driver to use instead of the DB_DRIVER environment variable.
+        host: The host, optionally with a port, to use instead of the DB_HOST
+            and DB_PORT environment variables.
+
+    Returns:
+        The database URL.
+
+    """
+    sqlite_path = os.environ.get("DB_SQLITE_PATH")
+    if sqlite_path:
+        return f"{driver or 'sqlite'}:///{sqlite_path}"
+
+    user = os.environ["DB_USER"]
+    password = os.environ["DB_PASSWORD"]
+    url = os.environ["DB_HOST"]
+    port = os.environ["DB_PORT"]
+    if host:
+        url, _, host_port = host.partition(":")
+        port = host_port or port
+    database = os.environ["DB_DATABASE"]
+    driver = driver or os.environ.get("DB_DRIVER", "mysql+mysqlconnector")
+
+    return f"{driver}://{user}:{password}@{url}:{port}/{database}"
 
 
 class DatabaseConnector:
@@ -48,6 +548,263 @@ class DatabaseConnector:
         self.albums_table = "albums"
 
         self.engine = self._get_engine()
+        self.replica_engines = self._get_replica_engines()
+        for engine in [self.engine, *self.replica_engines]:
+            instrument_engine(engine)
+        self._replica_cycle = itertools.cycle(self.replica_engines)
+        self.replica_lag_seconds = get_replica_lag_seconds()
+        self._primary_until = 0.0
+        self._local = threading.local()
+        self._transactions = 0
+
+        self.write_behind_rows, self.write_behind_ms = get_write_behind_options()
+        self._pending: Dict[DownloadModel, Dict[str, Tuple[str, str]]] = {
+            Song: {},
+            Album: {},
+        }
+        self._pending_lock = threading.RLock()
+        self._flush_timer: Optional[threading.Timer] = None
+        if self.write_behind_rows > 0:
+            _buffered_connectors.add(self)
+
+        index_path = os.environ.get("KNOWN_ID_INDEX_PATH")
+        self.known_ids: Optional[KnownIdIndex] = (
+            get_known_id_index(index_path) if index_path else None
+        )
+        if self.known_ids is not None and not self.known_ids.exists:
+            self.rebuild_known_id_index()
+
+    @staticmethod
+    def track_queries() -> ContextManager[QueryStats]:
+        """Record the statements, round trips and time spent inside the block.
+
+        Returns:
+            A context manager yielding the QueryStats of the block.
+
+        """
+        return track_queries()
+
+    @contextmanager
+    def transaction(self) -> Iterator["DatabaseConnector"]:
+        """Run all operations of the connector inside the block on one connection.
+
+        The changes are committed when the block exits and rolled back if it
+        raises. Nested blocks join the outer transaction. Inserts buffered
+        inside the block are flushed before the commit and dropped on rollback.
+
+        Returns:
+            A context manager yielding the connector itself.
+
+        """
+        if self._active_connection() is not None:
+            yield self
+            return
+
+        self.flush()
+        started = time.monotonic()
+        with self.engine.connect() as conn:
+            self._local.connection = conn
+            self._transactions += 1
+            try:
+                yield self
+                self.flush()
+                conn.commit()
+                if self._primary_until > started:
+                    # the replicas catch up from the commit, not the write
+                    self._stick_to_primary()
+            except BaseException:
+                self._discard_pending()
+                conn.rollback()
+                raise
+            finally:
+                self._transactions -= 1
+                self._local.connection = None
+
+    def commit(self) -> None:
+        """Commit the changes of the current transaction so far.
+
+        Outside a transaction every operation commits on its own, so this
+        does nothing.
+
+        """
+        conn = self._active_connection()
+        if conn is not None:
+            self.flush()
+            conn.commit()
+
+    def flush(self) -> None:
+        """Write all buffered song and album inserts to the database.
+
+        Raises:
+            sqlalchemy.exc.SQLAlchemyError: If the insert fails. The rows
+                that were not written stay buffered.
+
+        """
+        with self._pending_lock:
+            self._cancel_flush_timer()
+            for model, pending in self._pending.items():
+                if not pending:
+                    continue
+                entries = dict(pending)
+                pending.clear()
+                by_state: Dict[str, List[str]] = {}
+                for url, download_state in entries.values():
+                    by_state.setdefault(download_state, []).append(url)
+                try:
+                    for download_state, urls in by_state.items():
+                        self._add_many(model, urls, download_state)
+                except Exception:
+                    for key, entry in entries.items():
+                        pending.setdefault(key, entry)
+                    raise
+
+    def close(self) -> None:
+        """Flush buffered inserts and stop the flush timer."""
+        self.flush()
+        _buffered_connectors.discard(self)
+
+    def _buffer(
+        self, model: DownloadModel, urls: List[str], download_state: str
+    ) -> None:
+        """Queue inserts until the buffer is full or the flush interval passed.
+
+        Args:
+            model: The model of the table to insert into.
+            urls: The URLs to insert.
+            download_state: The download state of the new rows.
+
+        """
+        get_key = KEY_COLUMNS[model][1]
+        with self._pending_lock:
+            pending = self._pending[model]
+            for url in urls:
+                if url:
+                    pending.setdefault(get_key(url), (url, download_state))
+
+            if sum(map(len, self._pending.values())) >= self.write_behind_rows:
+                self.flush()
+            elif self._flush_timer is None:
+                self._start_flush_timer()
+
+    def _is_pending(self, model: DownloadModel, key: str) -> bool:
+        """Check whether an insert of the given key is buffered.
+
+        Args:
+            model: The model of the table.
+            key: The key of the row.
+
+        Returns:
+            True if the row is waiting to be flushed.
+
+        """
+        with self._pending_lock:
+            return key in self._pending.get(model, {})
+
+    def _discard_pending(self) -> None:
+        """Drop all buffered inserts."""
+        with self._pending_lock:
+            self._cancel_flush_timer()
+            for pending in self._pending.values():
+                pending.clear()
+
+    def _start_flush_timer(self) -> None:
+        """Schedule a flush after the configured interval."""
+        self._flush_timer = threading.Timer(
+            self.write_behind_ms / 1000, self._flush_on_timer
+        )
+        self._flush_timer.daemon = True
+        self._flush_timer.start()
+
+    def _cancel_flush_timer(self) -> None:
+        """Cancel a scheduled flush."""
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+
+    def _flush_on_timer(self) -> None:
+        """Flush from the timer thread unless a transaction owns the rows."""
+        with self._pending_lock:
+            self._flush_timer = None
+            if self._transactions > 0:
+                self._start_flush_timer()
+                return
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Failed to flush buffered inserts: {e}")
+                self._start_flush_timer()
+
+    def _active_connection(self) -> Optional[Connection]:
+        """Return the connection of the transaction active in this thread.
+
+        Returns:
+            The connection if a transaction is active, otherwise None.
+
+        """
+        return getattr(self._local, "connection", None)
+
+    @contextmanager
+    def _connect(self) -> Iterator[Connection]:
+        """Provide a primary connection for an operation that writes.
+
+        For DB_REPLICA_LAG_SECONDS after a write, the reads of the connector
+        are no longer routed to replicas so that they see their own writes.
+
+        Returns:
+            A context manager yielding the connection of the active
+                transaction, or a new pooled connection.
+
+        """
+        self._stick_to_primary()
+        conn = self._active_connection()
+        if conn is not None:
+            yield conn
+            return
+
+        with self.engine.connect() as conn:
+            yield conn
+
+    def _stick_to_primary(self) -> None:
+        """Route the reads of this connector to the primary for the replica lag."""
+        self._primary_until = time.monotonic() + self.replica_lag_seconds
+
+    def _read(self, stmt: sa.Executable) -> List[Row[Any]]:
+        """Execute a read-only statement, preferring a replica.
+
+        Reads inside a transaction or shortly after a write of this connector
+        go to the primary. If the replica fails, the primary is used instead.
+
+        Args:
+            stmt: The statement to execute.
+
+        Returns:
+            All result rows.
+
+        """
+        conn = self._active_connection()
+        if conn is not None:
+            return list(conn.execute(stmt).all())
+
+        if self.replica_engines and time.monotonic() >= self._primary_until:
+            replica = next(self._replica_cycle)
+            try:
+                with replica.connect() as replica_conn:
+                    return list(replica_conn.execute(stmt).all())
+            except sa.exc.DBAPIError as e:
+                logger.warning(f"Replica {replica.url} failed, using primary: {e}")
+
+        with self.engine.connect() as primary_conn:
+            return list(primary_conn.execute(stmt).all())
+
+    def _commit(self, conn: Connection) -> None:
+        """Commit an operation unless it is part of a transaction.
+
+        Args:
+            conn: The connection the operation was executed on.
+
+        """
+        if self._active_connection() is None:
+            conn.commit()
 
     def remove_album(self, album_url: str) -> None:
         """Remove an album from the database.
@@ -56,10 +813,13 @@ class DatabaseConnector:
             album_url: The URL of the album to remove.
 
         """
-        stmt = sa.delete(Album).where(Album.url == album_url)
-        with self.engine.connect() as conn:
+        key = album_key(album_url)
+        with self._pending_lock:
+            self._pending[Album].pop(key, None)
+        stmt = sa.delete(Album).where(Album.playlist_id == key)
+        with self._connect() as conn:
             conn.execute(stmt)
-            conn.commit()
+            self._commit(conn)
 
     def get_artist_id(self, artist_url: str) -> Optional[int]:
         """Get the artist ID for a given artist URL.
@@ -71,10 +831,9 @@ class DatabaseConnector:
             The artist ID if found, otherwise None.
 
         """
-        stmt = select(Artist.id).where(Artist.url == artist_url)
-        with self.engine.connect() as conn:
-            result = conn.execute(stmt).fetchone()
-            return result[0] if result else None
+        stmt = select(Artist.id).where(Artist.channel_id == artist_key(artist_url))
+        result = self._read(stmt)
+        return result[0][0] if result else None
 
     def add_artist(self, artist_url: str, auto_download: bool) -> Optional[Row[Any]]:
         """Add an artist to the database if not already present.
@@ -87,54 +846,172 @@ class DatabaseConnector:
             The artist ID.
 
         """
+        self._stick_to_primary()
         artist = self.get_artist(artist_url)
         if artist is not None:
             if auto_download and not artist.auto_download:
                 self._add_auto_download_existing_artist(artist[0])
             return artist
-        stmt = insert(Artist).values(url=artist_url, auto_download=auto_download)
-        with self.engine.connect() as conn:
+        stmt = insert(Artist).values(
+            url=artist_url,
+            channel_id=artist_key(artist_url),
+            auto_download=auto_download,
+        )
+        with self._connect() as conn:
             res = conn.execute(stmt).inserted_primary_key
-            conn.commit()
+            self._commit(conn)
             return res
 
-    def add_album(self, album_url: str) -> Optional[Row[Any]]:
+    def add_album(
+        self, album_url: str, download_state: str = DOWNLOAD_DONE
+    ) -> Optional[int]:
         """Add an album to the database if not already present.
 
         Args:
             album_url: The URL of the album.
+            download_state: The download state of a new album.
 
         Returns:
-            The album ID.
+            The album ID, or None if the insert was buffered.
 
         """
+        if self.write_behind_rows > 0:
+            self._buffer(Album, [album_url], download_state)
+            return None
+        self._stick_to_primary()
         album = self.get_album(album_url)
         if album is not None:
             return album
-        stmt = insert(Album).values(url=album_url)
-        with self.engine.connect() as conn:
+        key = album_key(album_url)
+        stmt = insert(Album).values(
+            url=album_url, playlist_id=key, download_state=download_state
+        )
+        with self._connect() as conn:
             res = conn.execute(stmt).inserted_primary_key
-            conn.commit()
-            return res[0] if res else None
+            self._commit(conn)
+        self._remember_keys(Album, [key])
+        return res[0] if res else None
 
-    def add_song(self, song_url: str) -> Optional[Row[Any]]:
+    def add_song(
+        self, song_url: str, download_state: str = DOWNLOAD_DONE
+    ) -> Optional[int]:
         """Add a song to the database if not already present.
 
         Args:
             song_url: The URL of the song.
+            download_state: The download state of a new song.
 
         Returns:
-            The song ID.
+            The song ID, or None if the insert was buffered.
 
         """
+        if self.write_behind_rows > 0:
+            self._buffer(Song, [song_url], download_state)
+            return None
+        self._stick_to_primary()
         song = self.get_song(song_url)
         if song is not None:
             return song
-        stmt = insert(Song).values(url=song_url)
-        with self.engine.connect() as conn:
+        key = song_key(song_url)
+        stmt = insert(Song).values(
+            url=song_url, video_id=key, download_state=download_state
+        )
+        with self._connect() as conn:
             res = conn.execute(stmt).inserted_primary_key
-            conn.commit()
-            return res[0] if res else None
+            self._commit(conn)
+        self._remember_keys(Song, [key])
+        return res[0] if res else None
+
+    def add_songs(
+        self, song_urls: List[str], download_state: str = DOWNLOAD_DONE
+    ) -> List[int]:
+        """Add multiple songs to the database, skipping already present ones.
+
+        Args:
+            song_urls: The URLs of the songs.
+            download_state: The download state of new songs.
+
+        Returns:
+            The IDs of the newly inserted songs. Empty if the inserts were
+                buffered.
+
+        """
+        if self.write_behind_rows > 0:
+            self._buffer(Song, song_urls, download_state)
+            return []
+        return self._add_many(Song, song_urls, download_state)
+
+    def add_albums(
+        self, album_urls: List[str], download_state: str = DOWNLOAD_DONE
+    ) -> List[int]:
+        """Add multiple albums to the database, skipping already present ones.
+
+        Args:
+            album_urls: The URLs of the albums.
+            download_state: The download state of new albums.
+
+        Returns:
+            The IDs of the newly inserted albums. Empty if the inserts were
+                buffered.
+
+        """
+        if self.write_behind_rows > 0:
+            self._buffer(Album, album_urls, download_state)
+            return []
+        return self._add_many(Album, album_urls, download_state)
+
+    def _add_many(
+        self, model: DownloadModel, urls: List[str], download_state: str = DOWNLOAD_DONE
+    ) -> List[int]:
+        """Insert rows for the given URLs in chunked multi-row statements.
+
+        Rows that already exist, or that are inserted concurrently by another
+        process, are skipped by the conflict handling of the database. Without
+        RETURNING a chunk is inserted in a savepoint, if its row count shows
+        that another process inserted some of the rows, the savepoint is
+        rolled back and the rows are inserted one at a time.
+
+        Args:
+            model: The model of the table to insert into.
+            urls: The URLs to insert.
+            download_state: The download state of the new rows.
+
+        Returns:
+            The IDs of the newly inserted rows in input order.
+
+        """
+        bulk = BulkInsert(model, urls, download_state)
+        new_ids: List[int] = []
+        with self._connect() as conn:
+            for chunk in bulk.chunks():
+                existing = set(conn.execute(bulk.select_existing(chunk)).scalars())
+                missing = [key for key in chunk if key not in existing]
+                if not missing:
+                    continue
+
+                stmt = bulk.insert(self.engine.dialect, missing)
+                if returns_inserted_rows(self.engine.dialect):
+                    inserted = conn.execute(stmt)
+                else:
+                    created = missing
+                    savepoint = conn.begin_nested()
+                    if conn.execute(stmt).rowcount == len(missing):
+                        savepoint.commit()
+                    else:
+                        savepoint.rollback()
+                        created = [
+                            key
+                            for key in missing
+                            if conn.execute(
+                                bulk.insert(self.engine.dialect, [key])
+                            ).rowcount
+                        ]
+                    inserted = conn.execute(bulk.select_ids(created))
+                ids = bulk.new_ids(missing, inserted)
+                self._commit(conn)
+                self._remember_keys(model, missing)
+                new_ids.extend(ids)
+        return new_ids
 
     def _add_auto_download_existing_artist(self, artist_id: int) -> Any:
         """Mark an artist for auto-download in the database.
@@ -146,14 +1023,14 @@ class DatabaseConnector:
             The artist ID.
 
         """
-        with self.engine.connect() as conn:
+        with self._connect() as conn:
             update_stmt = (
                 sa.update(Artist)
                 .where(Artist.id == artist_id)
                 .values(auto_download=True)
             )
             res = conn.execute(update_stmt)
-            conn.commit()
+            self._commit(conn)
             return res
 
     def get_auto_download_artists(self) -> List[str]:
@@ -163,15 +1040,10 @@ class DatabaseConnector:
             A list of artist URLs.
 
         """
-        artist_urls = []
-        stmt = select(Artist).where(Artist.auto_download == True)  # noqa: E712
-        with self.engine.connect() as conn:
-            result = conn.execute(stmt)
-            for artist in result.fetchall():
-                artist_urls.append(artist.url)
-        return artist_urls
+        stmt = select(Artist.url).where(Artist.auto_download == True)  # noqa: E712
+        return [artist.url for artist in self._read(stmt)]
 
-    def get_song(self, song_url) -> Optional[Row[Any]]:
+    def get_song(self, song_url) -> Optional[int]:
         """Get the song ID for a given song URL.
 
         Args:
@@ -181,25 +1053,40 @@ class DatabaseConnector:
             The song ID if found, otherwise None.
 
         """
-        stmt = select(Song.id).where(Song.url == song_url)
-        with self.engine.connect() as conn:
-            result = conn.execute(stmt).fetchone()
-
-            if not result:
-                if "music.youtube.com" in song_url:
-                    alt_url = song_url.replace("music.youtube.com", "youtube.com")
-                    stmt = select(Song.id).where(Song.url == alt_url)
-                    result = conn.execute(stmt).fetchone()
-                elif "youtube.com" in song_url:
-                    alt_url = song_url.replace("youtube.com", "music.youtube.com")
-                    stmt = select(Song.id).where(Song.url == alt_url)
-                    result = conn.execute(stmt).fetchone()
-                else:
-                    return None
+        key = song_key(song_url)
+        if self._is_pending(Song, key):
+            self.flush()
+        elif self._is_unknown(Song, key):
+            return None
+        stmt = select(Song.id).where(Song.video_id == key)
+        result = self._read(stmt)
+        return result[0][0] if result else None
+
+    def get_songs(self, song_urls: List[str]) -> List[str]:
+        """Get the song URLs that are already stored in the database.
+
+        Args:
+            song_urls: The URLs of the songs.
+
+        Returns:
+            The given URLs whose song is stored, in input order.
+
+        """
+        keys = {song_key(url): url for url in song_urls}
+        if any(self._is_pending(Song, key) for key in keys):
+            self.flush()
+        else:
+            keys = {
+                key: url for key, url in keys.items() if not self._is_unknown(Song, key)
+            }
 
-            return result[0] if result else None
+        known: Set[Optional[str]] = set()
+        for chunk in chunks(list(keys), BULK_CHUNK_SIZE):
+            stmt = select(Song.video_id).where(Song.video_id.in_(chunk))
+            known.update(row.video_id for row in self._read(stmt))
+        return [url for url in song_urls if song_key(url) in known]
 
-    def get_album(self, album_url) -> Optional[Row[Any]]:
+    def get_album(self, album_url) -> Optional[int]:
         """Get the album ID for a given album URL.
 
         Args:
@@ -209,10 +1096,14 @@ class DatabaseConnector:
             The album ID if found, otherwise None.
 
         """
-        stmt = select(Album.id).where(Album.url == album_url)
-        with self.engine.connect() as conn:
-            result = conn.execute(stmt).fetchone()
-            return result[0] if result else None
+        key = album_key(album_url)
+        if self._is_pending(Album, key):
+            self.flush()
+        elif self._is_unknown(Album, key):
+            return None
+        stmt = select(Album.id).where(Album.playlist_id == key)
+        result = self._read(stmt)
+        return result[0][0] if result else None
 
     def get_artist(self, artist_url: str) -> Optional[Row[Any]]:
         """Get the artist ID for a given artist URL.
@@ -224,24 +1115,596 @@ class DatabaseConnector:
             The artist ID if found, otherwise None.
 
         """
-        stmt = select(Artist).where(Artist.url == artist_url)
+        stmt = select(Artist).where(Artist.channel_id == artist_key(artist_url))
+        result = self._read(stmt)
+        return result[0] if result else None
+
+    def get_artist_catalog(self, artist_url: str) -> Optional[ArtistCatalogEntry]:
+        """Get the known releases of an artist.
+
+        Args:
+            artist_url: The URL of the artist.
+
+        Returns:
+            The catalog entry if the artist was scanned before, otherwise None.
+
+        """
+        stmt = select(
+            ArtistCatalog.fingerprint,
+            ArtistCatalog.release_ids,
+            ArtistCatalog.last_checked_at,
+        ).where(ArtistCatalog.channel_id == artist_key(artist_url))
+        rows = self._read(stmt)
+        if not rows:
+            return None
+        result = rows[0]
+        return ArtistCatalogEntry(
+            result.fingerprint, json.loads(result.release_ids), result.last_checked_at
+        )
+
+    def save_artist_catalog(
+        self, artist_url: str, fingerprint: str, release_ids: List[str]
+    ) -> None:
+        """Store the known releases of an artist and mark it as checked.
+
+        Args:
+            artist_url: The URL of the artist.
+            fingerprint: The fingerprint of the release list.
+            release_ids: The IDs of all known releases.
+
+        """
+        key = artist_key(artist_url)
+        values = {
+            "fingerprint": fingerprint,
+            "release_ids": json.dumps(release_ids),
+            "last_checked_at": _utcnow(),
+        }
+        with self._connect() as conn:
+            updated = conn.execute(
+                sa.update(ArtistCatalog)
+                .where(ArtistCatalog.channel_id == key)
+                .values(**values)
+            ).rowcount
+            if not updated:
+                conn.execute(insert(ArtistCatalog).values(channel_id=key, **values))
+            self._commit(conn)
+
+    def touch_artist_catalog(self, artist_url: str) -> None:
+        """Mark the known releases of an artist as checked.
+
+        Args:
+            artist_url: The URL of the artist.
+
+        """
+        stmt = (
+            sa.update(ArtistCatalog)
+            .where(ArtistCatalog.channel_id == artist_key(artist_url))
+            .values(last_checked_at=_utcnow())
+        )
+        with self._connect() as conn:
+            conn.execute(stmt)
+            self._commit(conn)
+
+    def mark_downloads_done(self, model: DownloadModel, keys: List[str]) -> int:
+        """Mark songs or albums as completely downloaded.
+
+        Args:
+            model: The model of the table, Song or Album.
+            keys: The keys of the rows.
+
+        Returns:
+            The number of rows whose state changed.
+
+        """
+        key_column = KEY_COLUMNS[model][0]
+        updated = 0
+        with self._connect() as conn:
+            for chunk in chunks(keys, BULK_CHUNK_SIZE):
+                updated += conn.execute(
+                    sa.update(model)
+                    .where(key_column.in_(chunk), model.download_state != DOWNLOAD_DONE)
+                    .values(download_state=DOWNLOAD_DONE, next_retry_at=None)
+                ).rowcount
+            self._commit(conn)
+        return updated
+
+    def mark_downloads_failed(
+        self,
+        model: DownloadModel,
+        keys: List[str],
+        get_retry_delay: Callable[[int], float],
+    ) -> int:
+        """Mark queued songs or albums as failed and schedule their retry.
+
+        Rows that are already marked as failed are not counted twice.
+
+        Args:
+            model: The model of the table, Song or Album.
+            keys: The keys of the rows.
+            get_retry_delay: Returns the seconds until the retry for the
+                number of failed attempts.
+
+        Returns:
+            The number of rows marked as failed.
+
+        """
+        key_column = KEY_COLUMNS[model][0]
+        now = _utcnow()
+        updated = 0
+        with self._connect() as conn:
+            for chunk in chunks(keys, BULK_CHUNK_SIZE):
+                rows = conn.execute(
+                    select(model.id, model.download_attempts).where(
+                        key_column.in_(chunk), model.download_state == DOWNLOAD_QUEUED
+                    )
+                ).all()
+                by_attempts: Dict[int, List[int]] = {}
+                for row in rows:
+                    by_attempts.setdefault(row.download_attempts + 1, []).append(row.id)
+                for attempts, ids in by_attempts.items():
+                    delay = timedelta(seconds=get_retry_delay(attempts))
+                    updated += conn.execute(
+                        sa.update(model)
+                        .where(model.id.in_(ids))
+                        .values(
+                            download_state=DOWNLOAD_FAILED,
+                            download_attempts=attempts,
+                            next_retry_at=now + delay,
+                        )
+                    ).rowcount
+            self._commit(conn)
+        return updated
+
+    def mark_downloads_queued(self, model: DownloadModel, urls: List[str]) -> None:
+        """Mark songs or albums as queued again after a retry was submitted.
+
+        Args:
+            model: The model of the table, Song or Album.
+            urls: The URLs of the rows.
+
+        """
+        key_column, get_key = KEY_COLUMNS[model]
+        with self._connect() as conn:
+            for chunk in chunks([get_key(url) for url in urls], BULK_CHUNK_SIZE):
+                conn.execute(
+                    sa.update(model)
+                    .where(key_column.in_(chunk))
+                    .values(download_state=DOWNLOAD_QUEUED, next_retry_at=None)
+                )
+            self._commit(conn)
+
+    def get_downloads_to_retry(
+        self, model: DownloadModel, max_attempts: int, limit: int
+    ) -> List[str]:
+        """Get the URLs of failed songs or albums that are due for a retry.
+
+        Args:
+            model: The model of the table, Song or Album.
+            max_attempts: The number of attempts after which rows are given up.
+            limit: The maximum number of URLs.
+
+        Returns:
+            The URLs, longest waiting first.
+
+        """
+        stmt = (
+            select(model.url)
+            .where(
+                model.download_state == DOWNLOAD_FAILED,
+                model.download_attempts < max_attempts,
+                model.next_retry_at <= _utcnow(),
+            )
+            .order_by(model.next_retry_at)
+            .limit(limit)
+        )
+        return [row.url for row in self._read(stmt)]
+
+    def iter_queued_downloads(self, model: DownloadModel) -> Iterator[str]:
+        """Stream the URLs of queued songs or albums in pages.
+
+        Args:
+            model: The model of the table, Song or Album.
+
+        Returns:
+            An iterator over the URLs, oldest row first.
+
+        """
+        for page in self._iter_pages(
+            model.__table__.c.id,
+            [model.url],
+            BULK_CHUNK_SIZE,
+            model.download_state == DOWNLOAD_QUEUED,
+        ):
+            for _, url in page:
+                yield url
+
+    def get_download_states(
+        self, model: DownloadModel, keys: List[str]
+    ) -> Dict[str, str]:
+        """Get the download states of songs or albums.
+
+        Args:
+            model: The model of the table, Song or Album.
+            keys: The keys of the rows.
+
+        Returns:
+            The download state per key, keys without a row are left out.
+
+        """
+        key_column = KEY_COLUMNS[model][0]
+        states: Dict[str, str] = {}
+        for chunk in chunks(keys, BULK_CHUNK_SIZE):
+            stmt = select(key_column.label("key"), model.download_state).where(
+                key_column.in_(chunk)
+            )
+            for row in self._read(stmt):
+                if row.key is not None:
+                    states[row.key] = row.download_state
+        return states
+
+    def enqueue_outbox(self, url: str, quality: str, download_format: str) -> None:
+        """Store a MeTube submission in the outbox.
+
+        A URL already waiting in the outbox is not added twice. A URL that
+        was given up on is retried from scratch.
+
+        Args:
+            url: The song or playlist URL to submit.
+            quality: Desired quality of the download.
+            download_format: Desired download_format of the download.
+
+        """
+        url_key = get_outbox_key(url)
+        now = _utcnow()
+        row = {
+            "url_key": url_key,
+            "url": url,
+            "quality": quality,
+            "download_format": download_format,
+            "status": OUTBOX_PENDING,
+            "attempts": 0,
+            "next_attempt_at": now,
+        }
+        with self._connect() as conn:
+            conn.execute(insert_ignore(self.engine.dialect.name, MeTubeOutbox, [row]))
+            conn.execute(
+                sa.update(MeTubeOutbox)
+                .where(
+                    MeTubeOutbox.url_key == url_key,
+                    MeTubeOutbox.status.in_([OUTBOX_DONE, OUTBOX_DEAD]),
+                )
+                .values(**row, last_error=None, locked_until=None)
+            )
+            self._commit(conn)
+
+    def claim_outbox(self, limit: int, lease_seconds: float) -> List[OutboxEntry]:
+        """Lease due outbox entries to a worker.
+
+        A leased entry is not handed out again until its lease expires, so an
+        entry of a crashed worker is replayed by the next one.
+
+        Args:
+            limit: The maximum number of entries to claim.
+            lease_seconds: How long the entries are reserved for the worker.
+
+        Returns:
+            The claimed entries, oldest first.
+
+        """
+        now = _utcnow()
+        available = sa.or_(
+            MeTubeOutbox.locked_until.is_(None), MeTubeOutbox.locked_until < now
+        )
+        stmt = (
+            select(
+                MeTubeOutbox.id,
+                MeTubeOutbox.url,
+                MeTubeOutbox.quality,
+                MeTubeOutbox.download_format,
+                MeTubeOutbox.attempts,
+            )
+            .where(
+                MeTubeOutbox.status == OUTBOX_PENDING,
+                MeTubeOutbox.next_attempt_at <= now,
+                available,
+            )
+            .order_by(MeTubeOutbox.id)
+            .limit(limit)
+        )
+        claimed = []
+        with self._connect() as conn:
+            for row in conn.execute(stmt).all():
+                leased = conn.execute(
+                    sa.update(MeTubeOutbox)
+                    .where(MeTubeOutbox.id == row.id, available)
+                    .values(locked_until=now + timedelta(seconds=lease_seconds))
+                ).rowcount
+                if leased:
+                    claimed.append(OutboxEntry(*row))
+            self._commit(conn)
+        return claimed
+
+    def complete_outbox(self, entry_id: int) -> None:
+        """Mark an outbox entry as delivered to MeTube.
+
+        Args:
+            entry_id: The ID of the entry.
+
+        """
+        stmt = (
+            sa.update(MeTubeOutbox)
+            .where(MeTubeOutbox.id == entry_id)
+            .values(status=OUTBOX_DONE, last_error=None, locked_until=None)
+        )
+        with self._connect() as conn:
+            conn.execute(stmt)
+            self._commit(conn)
+
+    def fail_outbox(
+        self, entry_id: int, error: str, max_attempts: int, retry_delay: float
+    ) -> bool:
+        """Record a failed delivery and schedule the next attempt.
+
+        Args:
+            entry_id: The ID of the entry.
+            error: The reason of the failure.
+            max_attempts: The number of attempts after which the entry is
+                moved to the dead letter state.
+            retry_delay: The seconds to wait before the next attempt.
+
+        Returns:
+            True if the entry is dead and will not be retried.
+
+        """
+        stmt = select(MeTubeOutbox.attempts).where(MeTubeOutbox.id == entry_id)
+        with self._connect() as conn:
+            attempts = conn.execute(stmt).scalar_one() + 1
+            dead = attempts >= max_attempts
+            conn.execute(
+                sa.update(MeTubeOutbox)
+                .where(MeTubeOutbox.id == entry_id)
+                .values(
+                    status=OUTBOX_DEAD if dead else OUTBOX_PENDING,
+                    attempts=attempts,
+                    last_error=error[:1000],
+                    next_attempt_at=_utcnow() + timedelta(seconds=retry_delay),
+                    locked_until=None,
+                )
+            )
+            self._commit(conn)
+        return dead
+
+    def get_outbox_counts(self) -> Dict[str, int]:
+        """Count the outbox entries per status.
+
+        Returns:
+            The number of entries by status.
+
+        """
+        stmt = select(MeTubeOutbox.status, sa.func.count().label("entries")).group_by(
+            MeTubeOutbox.status
+        )
+        return {row.status: row.entries for row in self._read(stmt)}
+
+    def iter_rows(
+        self, model: Type[Base], chunk_size: int = BULK_CHUNK_SIZE
+    ) -> Iterator[Dict[str, Any]]:
+        """Stream all rows of a table in pages ordered by their primary key.
+
+        Every page is a separate query continuing after the last primary key
+        of the previous one, so only one page is held in memory even with
+        drivers that buffer the whole result, such as mysql-connector.
+
+        Args:
+            model: The model of the table to read.
+            chunk_size: The number of rows fetched per round trip.
+
+        Returns:
+            An iterator over the rows without their primary key.
+
+        """
+        id_column = model.__table__.c.id
+        columns = [
+            column for column in model.__table__.columns if not column.primary_key
+        ]
+        for page in self._iter_pages(id_column, columns, chunk_size):
+            for row in page:
+                yield {column.name: row[i + 1] for i, column in enumerate(columns)}
+
+    def _iter_pages(
+        self,
+        id_column: sa.ColumnElement[Any],
+        columns: List[Any],
+        chunk_size: int,
+        *where: sa.ColumnElement[bool],
+    ) -> Iterator[Sequence[Sequence[Any]]]:
+        """Read a table in pages of rows ordered by their primary key.
+
+        Args:
+            id_column: The integer primary key column.
+            columns: The columns to read after the primary key.
+            chunk_size: The number of rows per page.
+            *where: Conditions the rows have to match.
+
+        Returns:
+            An iterator over the pages, each row starting with its primary key.
+
+        """
+        last_id = None
+        while True:
+            stmt = select(id_column, *columns).where(*where)
+            if last_id is not None:
+                stmt = stmt.where(id_column > last_id)
+            with self.engine.connect() as conn:
+                page = list(
+                    conn.execute(stmt.order_by(id_column).limit(chunk_size)).all()
+                )
+            if not page:
+                return
+            yield page
+            if len(page) < chunk_size:
+                return
+            last_id = page[-1][0]
+
+    def bulk_insert(
+        self,
+        model: Type[Base],
+        rows: Iterable[Dict[str, Any]],
+        chunk_size: int = BULK_CHUNK_SIZE,
+    ) -> int:
+        """Insert rows in chunked multi-row statements, skipping present keys.
+
+        Rows without a key get it derived from their URL.
+
+        Args:
+            model: The model of the table to insert into.
+            rows: The rows to insert.
+            chunk_size: The number of rows per statement and commit.
+
+        Returns:
+            The number of processed rows.
+
+        """
+        key_column, get_key = KEY_COLUMNS[model]
+        count = 0
+        with self._connect() as conn:
+            for chunk in chunks(rows, chunk_size):
+                for row in chunk:
+                    row[key_column.name] = row.get(key_column.name) or get_key(
+                        row["url"]
+                    )
+                conn.execute(insert_ignore(self.engine.dialect.name, model, chunk))
+                self._commit(conn)
+                if model in (Song, Album):
+                    self._remember_keys(model, [row[key_column.name] for row in chunk])
+                count += len(chunk)
+        return count
+
+    def backfill_keys(self) -> Dict[str, int]:
+        """Fill the key columns of rows stored before they were introduced.
+
+        Rows whose key is already taken by another row are duplicates of that
+        row and are removed.
+
+        Returns:
+            The number of updated and removed rows per table.
+
+        """
+        counts = {}
         with self.engine.connect() as conn:
-            result = conn.execute(stmt).fetchone()
-            return result if result else None
+            for model, (key_column, get_key) in KEY_COLUMNS.items():
+                columns = model.__table__.c
+                rows = conn.execute(
+                    select(columns.id, columns.url)
+                    .where(key_column.is_(None))
+                    .order_by(columns.id)
+                ).all()
+                taken = set(
+                    conn.execute(select(key_column).where(key_column.is_not(None)))
+                    .scalars()
+                    .all()
+                )
+                updated, duplicates = [], []
+                for row_id, url in rows:
+                    key = get_key(url)
+                    if key in taken:
+                        duplicates.append(row_id)
+                        continue
+                    taken.add(key)
+                    updated.append({"row_id": row_id, "key": key})
+
+                for chunk in chunks(updated, BULK_CHUNK_SIZE):
+                    conn.execute(
+                        sa.update(model)
+                        .where(columns.id == sa.bindparam("row_id"))
+                        .values({key_column.name: sa.bindparam("key")}),
+                        list(chunk),
+                    )
+                for chunk in chunks(duplicates, BULK_CHUNK_SIZE):
+                    conn.execute(sa.delete(model).where(columns.id.in_(chunk)))
+                conn.commit()
+
+                counts[f"{model.__tablename__}_updated"] = len(updated)
+                counts[f"{model.__tablename__}_removed"] = len(duplicates)
+
+        if self.known_ids is not None:
+            self.rebuild_known_id_index()
+        return counts
+
+    def rebuild_known_id_index(self) -> None:
+        """Rebuild the known id index from the song and album tables."""
+        if self.known_ids is None:
+            return
+
+        def _iter_keys() -> Iterator[Tuple[str, str]]:
+            for model in (Song, Album):
+                key_column = KEY_COLUMNS[model][0]
+                pages = self._iter_pages(
+                    model.__table__.c.id,
+                    [key_column],
+                    BULK_CHUNK_SIZE,
+                    key_column.is_not(None),
+                )
+                for page in pages:
+                    for _, key in page:
+                        yield model.__tablename__, key
+
+        self.known_ids.rebuild(_iter_keys())
+
+    def _is_unknown(self, model: Type[Base], key: str) -> bool:
+        """Check the known id index for a key that is definitely not stored.
+
+        Args:
+            model: The model of the table the key belongs to.
+            key: The key to check.
+
+        Returns:
+            True if the index rules out the key, False if the database has
+                to be queried.
+
+        """
+        return self.known_ids is not None and not self.known_ids.contains(
+            model.__tablename__, key
+        )
+
+    def _remember_keys(self, model: Type[Base], keys: List[str]) -> None:
+        """Record stored keys in the known id index.
+
+        Args:
+            model: The model of the table the keys belong to.
+            keys: The stored keys.
+
+        """
+        if self.known_ids is not None:
+            self.known_ids.add(model.__tablename__, keys)
 
     @staticmethod
     def _get_engine() -> Engine:
-        """Create and return a SQLAlchemy engine using environment variables.
+        """Return the shared SQLAlchemy engine configured by environment variables.
 
         Returns:
             A SQLAlchemy Engine instance.
 
         """
-        user = os.environ["DB_USER"]
-        password = os.environ["DB_PASSWORD"]
-        url = os.environ["DB_HOST"]
-        port = os.environ["DB_PORT"]
-        database = os.environ["DB_DATABASE"]
-        driver = os.environ.get("DB_DRIVER", "mysql+mysqlconnector")
+        return get_shared_engine(get_database_url())
 
-        return sa.create_engine(f"{driver}://{user}:{password}@{url}:{port}/{database}")
+    @staticmethod
+    def _get_replica_engines() -> List[Engine]:
+        """Return the shared engines of the read replicas in DB_REPLICA_HOSTS.
+
+        The replicas use the same credentials, database and driver as the
+        primary. Replicas are not used in embedded SQLite mode.
+
+        Returns:
+            A list of SQLAlchemy Engine instances, empty if no replica is
+                configured.
+
+        """
+        hosts = os.environ.get("DB_REPLICA_HOSTS", "")
+        if os.environ.get("DB_SQLITE_PATH"):
+            return []
+        return [
+            get_shared_engine(get_database_url(host=host.strip()))
+            for host in hosts.split(",")
+            if host.strip()
+        ]
@@ -0,0 +1,183 @@
+"""Time budget of a submission shared by all stages working on it."""
+
+import os
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+MIN_TIMEOUT = 0.01
+
+_current_deadline: ContextVar[Optional["Deadline"]] = ContextVar(
+    "current_deadline", default=None
+)
+
+
+def get_current_deadline() -> Optional["Deadline"]:
+    """Return the deadline of the call running in the current context.
+
+    HTTP clients limit their timeouts to this deadline, so a call started
+    with Deadline.call returns soon after the deadline passes.
+
+    Returns:
+        The deadline, or None if the call has no limit.
+
+    """
+    return _current_deadline.get()
+
+
+class DeadlineExceeded(Exception):
+    """Raised when the time budget of a submission ran out.
+
+    Work finished before the deadline is kept, the pending URLs can be
+    submitted again later to resume.
+    """
+
+    def __init__(self, stage: str, pending: Optional[List[str]] = None) -> None:
+        """Initialize the DeadlineExceeded error.
+
+        Args:
+            stage: The stage that was running when the deadline expired.
+            pending: The URLs that were not submitted.
+
+        """
+        super().__init__(f"Deadline exceeded while {stage}")
+        self.stage = stage
+        self.pending = pending or []
+
+
+class Deadline:
+    """A point in time by which a submission has to be finished."""
+
+    def __init__(self, seconds: float) -> None:
+        """Initialize the Deadline.
+
+        Args:
+            seconds: The time budget in seconds, starting now.
+
+        """
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    @classmethod
+    def from_env(cls) -> Optional["Deadline"]:
+        """Create the deadline of a submission from SUBMISSION_DEADLINE_SECONDS.
+
+        Returns:
+            The deadline, or None if the variable is 0.
+
+        """
+        seconds = float(os.environ.get("SUBMISSION_DEADLINE_SECONDS", "120"))
+        return cls(seconds) if seconds > 0 else None
+
+    @property
+    def expired(self) -> bool:
+        """Whether the time budget ran out."""
+        return self.remaining() <= 0
+
+    def remaining(self) -> float:
+        """Return the seconds left until the deadline.
+
+        Returns:
+            The remaining seconds, 0 if the deadline passed.
+
+        """
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def check(self, stage: str, pending: Optional[List[str]] = None) -> None:
+        """Raise if the deadline passed.
+
+        Args:
+            stage: The stage about to start.
+            pending: The URLs that would not be submitted.
+
+        Raises:
+            DeadlineExceeded: If the deadline passed.
+
+        """
+        if self.expired:
+            raise DeadlineExceeded(stage, pending)
+
+    def timeout(self, default: float) -> float:
+        """Limit a timeout to the remaining time.
+
+        Args:
+            default: The timeout of the stage without a deadline.
+
+        Returns:
+            The smaller of the default and the remaining seconds, but at least
+                MIN_TIMEOUT as HTTP clients reject a timeout of 0.
+
+        """
+        return max(MIN_TIMEOUT, min(default, self.remaining()))
+
+    def timeouts(self, defaults: Tuple[float, float]) -> Tuple[float, float]:
+        """Limit connect and read timeouts to the remaining time.
+
+        Args:
+            defaults: The connect and read timeout without a deadline.
+
+        Returns:
+            The limited connect and read timeout.
+
+        """
+        return self.timeout(defaults[0]), self.timeout(defaults[1])
+
+    def call(self, stage: str, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run a blocking call bounded by the deadline.
+
+        The deadline is the current deadline while the call runs, so the HTTP
+        requests it sends time out once the deadline passes.
+
+        Args:
+            stage: The stage the call belongs to.
+            func: The function to call.
+            *args: Positional arguments of the function.
+            **kwargs: Keyword arguments of the function.
+
+        Returns:
+            The result of the call.
+
+        Raises:
+            DeadlineExceeded: If the deadline passes before the call returns.
+
+        """
+        self.check(stage)
+        token = _current_deadline.set(self)
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            if self.expired and not isinstance(e, DeadlineExceeded):
+                raise DeadlineExceeded(stage) from e
+            raise
+        finally:
+            _current_deadline.reset(token)
+
+
+def call_with_deadline(
+    deadline: Optional[Deadline],
+    stage: str,
+    func: Callable[..., T],
+    *args: Any,
+    **kwargs: Any,
+) -> T:
+    """Run a blocking call bounded by a deadline, if there is one.
+
+    Args:
+        deadline: The deadline of the submission, None for no limit.
+        stage: The stage the call belongs to.
+        func: The function to call.
+        *args: Positional arguments of the function.
+        **kwargs: Keyword arguments of the function.
+
+    Returns:
+        The result of the call.
+
+    Raises:
+        DeadlineExceeded: If the deadline passes before the call returns.
+
+    """
+    if deadline is None:
+        return func(*args, **kwargs)
+    return deadline.call(stage, func, *args, **kwargs)
@@ -0,0 +1,300 @@
+"""Memory-mapped index of song and album keys already stored in the database.
+
+The index answers "is this key possibly known?" without a database round trip.
+It consists of a base file holding a bloom filter followed by the sorted 64-bit
+hashes of all keys, and an append-only delta file for keys added since the base
+file was written. Negative answers are definite, positive answers have to be
+confirmed by the database.
+"""
+
+import bisect
+import fcntl
+import hashlib
+import math
+import mmap
+import os
+import struct
+import threading
+from array import array
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+MAGIC = b"MAPIKIX1"
+HEADER = struct.Struct("<8sQQI4x")
+BITS_PER_KEY = 10
+HASH_COUNT = 7
+COMPACT_THRESHOLD = 50_000
+
+_indexes: Dict[str, "KnownIdIndex"] = {}
+_indexes_lock = threading.Lock()
+
+
+def hash_key(namespace: str, key: str) -> int:
+    """Hash a namespaced key into an unsigned 64-bit integer.
+
+    Args:
+        namespace: The namespace of the key, e.g. "song" or "album".
+        key: The key to hash.
+
+    Returns:
+        The 64-bit hash of the key.
+
+    """
+    digest = hashlib.blake2b(f"{namespace}:{key}".encode("utf-8"), digest_size=8)
+    return int.from_bytes(digest.digest(), "little")
+
+
+def _bloom_positions(value: int, bit_count: int) -> Iterator[int]:
+    """Yield the bloom filter bit positions of a hash using double hashing.
+
+    Args:
+        value: The 64-bit hash.
+        bit_count: The number of bits in the bloom filter.
+
+    Returns:
+        An iterator over the bit positions.
+
+    """
+    low, high = value & 0xFFFFFFFF, (value >> 32) | 1
+    for i in range(HASH_COUNT):
+        yield (low + i * high) % bit_count
+
+
+def get_known_id_index(path: str) -> "KnownIdIndex":
+    """Return the process-wide index for a path, opening it if needed.
+
+    Args:
+        path: The path of the index base file.
+
+    Returns:
+        The shared KnownIdIndex instance.
+
+    """
+    with _indexes_lock:
+        index = _indexes.get(path)
+        if index is None:
+            index = KnownIdIndex(path)
+            _indexes[path] = index
+        return index
+
+
+class KnownIdIndex:
+    """Memory-mapped set of known song and album keys."""
+
+    def __init__(self, path: str) -> None:
+        """Open the index files at the given path.
+
+        Args:
+            path: The path of the index base file. The delta and lock files
+                are stored next to it.
+
+        """
+        self.path = path
+        self.delta_path = f"{path}.delta"
+        self.lock_path = f"{path}.lock"
+
+        self._lock = threading.RLock()
+        self._mmap: Optional[mmap.mmap] = None
+        self._view: Optional[memoryview] = None
+        self._base_stat: Optional[Tuple[int, int]] = None
+        self._bloom: Optional[memoryview] = None
+        self._hashes: Optional[memoryview] = None
+        self._delta: Set[int] = set()
+        self._delta_offset = 0
+
+        self.refresh()
+
+    @property
+    def exists(self) -> bool:
+        """Whether a base file has been written."""
+        return os.path.exists(self.path)
+
+    def __len__(self) -> int:
+        """Return the number of keys in the base file and the delta."""
+        with self._lock:
+            return (len(self._hashes) if self._hashes else 0) + len(self._delta)
+
+    def contains(self, namespace: str, key: str) -> bool:
+        """Check whether a key may be known.
+
+        Args:
+            namespace: The namespace of the key, e.g. "song" or "album".
+            key: The key to check.
+
+        Returns:
+            False if the key is definitely unknown, True if it may be known.
+
+        """
+        value = hash_key(namespace, key)
+        with self._lock:
+            self.refresh()
+            if value in self._delta:
+                return True
+            if self._bloom is None or self._hashes is None:
+                return False
+
+            bit_count = len(self._bloom) * 8
+            for position in _bloom_positions(value, bit_count):
+                if not self._bloom[position >> 3] & (1 << (position & 7)):
+                    return False
+
+            found = bisect.bisect_left(self._hashes, value)
+            return found < len(self._hashes) and self._hashes[found] == value
+
+    def add(self, namespace: str, keys: Iterable[str]) -> None:
+        """Record keys as known.
+
+        Args:
+            namespace: The namespace of the keys, e.g. "song" or "album".
+            keys: The keys to record.
+
+        """
+        values = array("Q", (hash_key(namespace, key) for key in keys))
+        if not values:
+            return
+
+        with self._lock, self._file_lock():
+            fd = os.open(self.delta_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT)
+            try:
+                os.write(fd, values.tobytes())
+            finally:
+                os.close(fd)
+            self.refresh()
+
+            if len(self._delta) >= COMPACT_THRESHOLD:
+                self._compact()
+
+    def rebuild(self, items: Iterable[Tuple[str, str]]) -> None:
+        """Replace the base file with the given keys.
+
+        The items are read while the file lock is held, so keys other
+        processes record meanwhile are appended after the rebuild and not
+        lost. Keys already in the delta are kept, as they may belong to
+        transactions committed after the items were read.
+
+        Args:
+            items: Pairs of namespace and key of all known entries.
+
+        """
+        with self._lock, self._file_lock():
+            self.refresh()
+            values = set(self._delta)
+            values.update(hash_key(namespace, key) for namespace, key in items)
+            self._write_base(values)
+            open(self.delta_path, "wb").close()
+            self.refresh()
+
+    def compact(self) -> None:
+        """Merge the delta file into the base file."""
+        with self._lock, self._file_lock():
+            self.refresh()
+            self._compact()
+
+    def refresh(self) -> None:
+        """Pick up changes written by other processes."""
+        with self._lock:
+            try:
+                stat = os.stat(self.path)
+                base_stat = (stat.st_ino, stat.st_mtime_ns)
+            except FileNotFoundError:
+                base_stat = None
+            if base_stat != self._base_stat:
+                self._map_base()
+                self._base_stat = base_stat
+                self._delta.clear()
+                self._delta_offset = 0
+
+            try:
+                delta_size = os.path.getsize(self.delta_path)
+            except FileNotFoundError:
+                delta_size = 0
+            if delta_size < self._delta_offset:
+                self._delta.clear()
+                self._delta_offset = 0
+            if delta_size > self._delta_offset:
+                self._read_delta()
+
+    def close(self) -> None:
+        """Release the memory map."""
+        with self._lock:
+            self._unmap()
+            self._base_stat = None
+
+    def _compact(self) -> None:
+        """Write the base file and delta into a new base file."""
+        values = set(self._hashes or ())
+        values.update(self._delta)
+        self._write_base(values)
+        open(self.delta_path, "wb").close()
+        self.refresh()
+
+    def _write_base(self, values: Set[int]) -> None:
+        """Atomically write a new base file.
+
+        Args:
+            values: The hashes to store.
+
+        """
+        hashes = array("Q", sorted(values))
+        bloom_bytes = max(8, math.ceil(len(hashes) * BITS_PER_KEY / 64) * 8)
+        bloom = bytearray(bloom_bytes)
+        for value in hashes:
+            for position in _bloom_positions(value, bloom_bytes * 8):
+                bloom[position >> 3] |= 1 << (position & 7)
+
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as file:
+            file.write(HEADER.pack(MAGIC, len(hashes), bloom_bytes, HASH_COUNT))
+            file.write(bloom)
+            file.write(hashes.tobytes())
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, self.path)
+
+    def _map_base(self) -> None:
+        """Memory-map the base file if it exists."""
+        self._unmap()
+        try:
+            with open(self.path, "rb") as file:
+                self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):
+            return
+
+        magic, count, bloom_bytes, hash_count = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC or hash_count != HASH_COUNT:
+            raise ValueError(f"Unsupported known id index file: {self.path}")
+
+        self._view = memoryview(self._mmap)
+        bloom_end = HEADER.size + bloom_bytes
+        self._bloom = self._view[HEADER.size : bloom_end]
+        self._hashes = self._view[bloom_end : bloom_end + count * 8].cast("Q")
+
+    def _unmap(self) -> None:
+        """Release the views and the memory map of the base file."""
+        for view in (self._bloom, self._hashes, self._view):
+            if view is not None:
+                view.release()
+        self._bloom = self._hashes = self._view = None
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def _read_delta(self) -> None:
+        """Read the records appended to the delta file since the last read."""
+        with open(self.delta_path, "rb") as file:
+            file.seek(self._delta_offset)
+            data = file.read()
+        usable = len(data) - len(data) % 8
+        values: List[int] = array("Q", data[:usable]).tolist()
+        self._delta.update(values)
+        self._delta_offset += usable
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        """Hold an exclusive lock shared by all processes using the index."""
+        with open(self.lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
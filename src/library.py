@@ -0,0 +1,141 @@
+"""Export and import the music library as compressed newline-delimited JSON.
+
+Usage:
+    python -m src.library export library.ndjson.gz
+    python -m src.library import library.ndjson.gz
+"""
+
+import argparse
+import gzip
+import itertools
+import json
+import logging
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Type
+
+import sqlalchemy as sa
+
+import src.logging_config  # initialize logging  # noqa: F401
+
+from src.database_connector import (
+    BULK_CHUNK_SIZE,
+    Album,
+    Artist,
+    Base,
+    DatabaseConnector,
+    Song,
+    dispose_engines,
+)
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+TABLES = {model.__tablename__: model for model in (Artist, Album, Song)}
+
+
+def export_library(
+    db: DatabaseConnector, path: str, chunk_size: int = BULK_CHUNK_SIZE
+) -> Dict[str, int]:
+    """Stream all artists, albums and songs into a gzip compressed NDJSON file.
+
+    Args:
+        db: The database connector to read from.
+        path: The path of the file to write.
+        chunk_size: The number of rows fetched per round trip.
+
+    Returns:
+        The number of exported rows per table.
+
+    """
+    counts = {}
+    with gzip.open(path, "wt", encoding="utf-8") as file:
+        for table, model in TABLES.items():
+            counts[table] = 0
+            for row in db.iter_rows(model, chunk_size):
+                file.write(json.dumps({"table": table, **row}, default=str) + "\n")
+                counts[table] += 1
+    return counts
+
+
+def _parse_datetimes(
+    model: Type[Base], records: Iterable[Dict[str, Any]]
+) -> Iterator[Dict[str, Any]]:
+    """Convert the exported date and time strings back to datetime values.
+
+    Args:
+        model: The model of the table the records belong to.
+        records: The records read from the file.
+
+    Returns:
+        An iterator over the converted records.
+
+    """
+    columns = [
+        column.name
+        for column in model.__table__.columns
+        if isinstance(column.type, sa.DateTime)
+    ]
+    for record in records:
+        for name in columns:
+            if isinstance(record.get(name), str):
+                record[name] = datetime.fromisoformat(record[name])
+        yield record
+
+
+def import_library(
+    db: DatabaseConnector, path: str, chunk_size: int = BULK_CHUNK_SIZE
+) -> Dict[str, int]:
+    """Bulk-load a file written by export_library, skipping present rows.
+
+    Args:
+        db: The database connector to write to.
+        path: The path of the file to read.
+        chunk_size: The number of rows per insert statement.
+
+    Returns:
+        The number of processed rows per table.
+
+    Raises:
+        ValueError: If the file contains an unknown table.
+
+    """
+    counts: Dict[str, int] = {}
+    with gzip.open(path, "rt", encoding="utf-8") as file:
+        records = (json.loads(line) for line in file if line.strip())
+        for table, group in itertools.groupby(records, key=lambda r: r.pop("table")):
+            if table not in TABLES:
+                raise ValueError(f"Unknown table in library file: {table}")
+            model = TABLES[table]
+            processed = db.bulk_insert(
+                model, _parse_datetimes(model, group), chunk_size
+            )
+            counts[table] = counts.get(table, 0) + processed
+    return counts
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Run the export or import command.
+
+    Args:
+        argv: The command line arguments, defaults to sys.argv.
+
+    """
+    parser = argparse.ArgumentParser(prog="python -m src.library")
+    parser.add_argument("command", choices=["export", "import"])
+    parser.add_argument("path", help="gzip compressed NDJSON file")
+    parser.add_argument("--chunk-size", type=int, default=BULK_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    try:
+        db = DatabaseConnector()
+        if args.command == "export":
+            counts: Dict[str, Any] = export_library(db, args.path, args.chunk_size)
+        else:
+            counts = import_library(db, args.path, args.chunk_size)
+        logger.info(f"{args.command.capitalize()}ed library rows: {counts}")
+    finally:
+        dispose_engines()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Count the SQL statements, round trips and time spent per logical operation."""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator, List, Tuple
+
+from sqlalchemy import Engine, event
+
+_active_stats: ContextVar[Tuple["QueryStats", ...]] = ContextVar(
+    "active_query_stats", default=()
+)
+
+
+class QueryStats:
+    """Database usage recorded while tracking is active."""
+
+    def __init__(self) -> None:
+        """Initialize empty statistics."""
+        self.statements = 0
+        self.round_trips = 0
+        self.total_time = 0.0
+        self.queries: List[str] = []
+
+    def __repr__(self) -> str:
+        """Return a short summary of the statistics."""
+        return (
+            f"QueryStats(statements={self.statements}, "
+            f"round_trips={self.round_trips}, "
+            f"total_time={self.total_time * 1000:.1f}ms)"
+        )
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Record the database usage of the current thread or task inside the block.
+
+    Only engines set up with instrument_engine are tracked. Blocks can be
+    nested, each one counting everything executed inside it.
+
+    Returns:
+        A context manager yielding the statistics, which are updated live.
+
+    """
+    stats = QueryStats()
+    token = _active_stats.set(_active_stats.get() + (stats,))
+    try:
+        yield stats
+    finally:
+        _active_stats.reset(token)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Attach the query counting listeners to an engine once.
+
+    Args:
+        engine: The engine to instrument.
+
+    """
+    if not isinstance(engine, Engine) or event.contains(
+        engine, "before_cursor_execute", _before_cursor_execute
+    ):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "commit", _count_round_trip)
+    event.listen(engine, "rollback", _count_round_trip)
+
+
+def _before_cursor_execute(
+    conn: Any,
+    cursor: Any,
+    statement: str,
+    parameters: Any,
+    context: Any,
+    executemany: bool,
+) -> None:
+    """Remember the start time of a statement."""
+    if _active_stats.get():
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(
+    conn: Any,
+    cursor: Any,
+    statement: str,
+    parameters: Any,
+    context: Any,
+    executemany: bool,
+) -> None:
+    """Record a finished statement in all active statistics."""
+    active = _active_stats.get()
+    if not active or not conn.info.get("query_start_time"):
+        return
+    elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+    count = len(parameters) if executemany else 1
+    for stats in active:
+        stats.statements += count
+        stats.round_trips += 1
+        stats.total_time += elapsed
+        stats.queries.append(statement)
+
+
+def _count_round_trip(conn: Any) -> None:
+    """Record a commit or rollback in all active statistics."""
+    for stats in _active_stats.get():
+        stats.round_trips += 1
@@ -0,0 +1,245 @@
+"""Reconcile the download states of songs and albums with the MeTube history.
+
+Songs and albums are recorded as queued when MeTube accepts them. This job
+reads the MeTube history, marks finished downloads as done and failed ones as
+failed, and submits failed downloads again with exponential backoff until
+DOWNLOAD_MAX_ATTEMPTS attempts were made. MeTube lists the songs of a
+submitted playlist instead of the playlist, so albums are marked as done once
+their songs are. Run it periodically with
+``python -m src.reconcile_downloads``.
+"""
+
+import logging
+import os
+from typing import Any, Dict, List, NamedTuple, Tuple
+
+import src.logging_config  # initialize logging  # noqa: F401
+
+from src.database_connector import (
+    DOWNLOAD_DONE,
+    DOWNLOAD_FAILED,
+    DOWNLOAD_QUEUED,
+    KEY_COLUMNS,
+    Album,
+    DatabaseConnector,
+    DownloadModel,
+    Song,
+    dispose_engines,
+)
+from src.url_keys import album_key, song_key
+from src.youtube_handler.me_tube_connector import MeTubeConnector, close_sessions
+from src.youtube_handler.youtube_album_fetcher import YoutubeAlbumFetcher
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+MAX_RETRY_DELAY = 86400
+DEFAULT_QUALITY = "Best"
+DEFAULT_FORMAT = "mp3"
+
+
+class HistoryEntry(NamedTuple):
+    """The latest state of a URL in the MeTube history."""
+
+    download_state: str
+    quality: str
+    download_format: str
+
+
+def get_retry_delay(attempts: int) -> float:
+    """Return the seconds to wait before retrying a failed download.
+
+    The delay starts at DOWNLOAD_RETRY_SECONDS and doubles with every failed
+    attempt, up to one day.
+
+    Args:
+        attempts: The number of failed attempts so far.
+
+    Returns:
+        The delay in seconds.
+
+    """
+    retry_seconds = float(os.environ.get("DOWNLOAD_RETRY_SECONDS", "600"))
+    return min(retry_seconds * 2 ** max(attempts - 1, 0), MAX_RETRY_DELAY)
+
+
+def get_history_states(
+    history: Dict[str, Any],
+) -> Dict[DownloadModel, Dict[str, HistoryEntry]]:
+    """Map the entries of the MeTube history to songs and albums.
+
+    Finished entries are done and all other completed entries failed. Queued
+    and pending entries win over completed ones, as they are being retried.
+
+    Args:
+        history: The history as returned by MeTubeConnector.get_history.
+
+    Returns:
+        The history entries per model, keyed by song or album key.
+
+    """
+    states: Dict[DownloadModel, Dict[str, HistoryEntry]] = {Song: {}, Album: {}}
+    sections = [
+        ("done", None),
+        ("queue", DOWNLOAD_QUEUED),
+        ("pending", DOWNLOAD_QUEUED),
+    ]
+    for section, download_state in sections:
+        for item in history.get(section) or ():
+            url = item.get("url") or ""
+            model: DownloadModel
+            if "playlist" in url:
+                model = Album
+            elif "watch" in url:
+                model = Song
+            else:
+                continue
+            if download_state is None:
+                finished = item.get("status") == "finished"
+                state = DOWNLOAD_DONE if finished else DOWNLOAD_FAILED
+            else:
+                state = download_state
+            states[model][KEY_COLUMNS[model][1](url)] = HistoryEntry(
+                state,
+                item.get("quality") or DEFAULT_QUALITY,
+                item.get("format") or DEFAULT_FORMAT,
+            )
+    return states
+
+
+def reconcile_downloads(db: DatabaseConnector, mt: MeTubeConnector) -> Dict[str, int]:
+    """Update the download states from the MeTube history and retry failures.
+
+    Args:
+        db: The DatabaseConnector holding the songs and albums.
+        mt: The MeTubeConnector to read the history from and retry with.
+
+    Returns:
+        The number of rows marked done, marked failed and retried.
+
+    Raises:
+        RuntimeError: If the MeTube history could not be read.
+
+    """
+    history = mt.get_history()
+    if history is None:
+        raise RuntimeError("Could not read the MeTube history")
+
+    max_attempts = int(os.environ.get("DOWNLOAD_MAX_ATTEMPTS", "5"))
+    batch_size = int(os.environ.get("DOWNLOAD_RETRY_BATCH_SIZE", "100"))
+    counts = {"done": 0, "failed": 0, "retried": 0}
+    for model, entries in get_history_states(history).items():
+        by_state: Dict[str, List[str]] = {}
+        for key, entry in entries.items():
+            by_state.setdefault(entry.download_state, []).append(key)
+        counts["done"] += db.mark_downloads_done(model, by_state.get(DOWNLOAD_DONE, []))
+        counts["failed"] += db.mark_downloads_failed(
+            model, by_state.get(DOWNLOAD_FAILED, []), get_retry_delay
+        )
+
+        retried = _retry_downloads(
+            mt,
+            model,
+            db.get_downloads_to_retry(model, max_attempts, batch_size),
+            entries,
+        )
+        db.mark_downloads_queued(model, retried)
+        counts["retried"] += len(retried)
+    counts["done"] += complete_albums(db)
+    return counts
+
+
+def complete_albums(db: DatabaseConnector) -> int:
+    """Mark queued albums as done once none of their songs is pending.
+
+    The songs of an album are read from its playlist on YouTube Music. Songs
+    that are not in the database do not hold the album back, albums whose
+    songs cannot be fetched stay queued.
+
+    Args:
+        db: The DatabaseConnector holding the songs and albums.
+
+    Returns:
+        The number of albums marked done.
+
+    """
+    done = []
+    for url in db.iter_queued_downloads(Album):
+        key = album_key(url)
+        try:
+            song_urls = YoutubeAlbumFetcher.get_album_songs(key)
+        except Exception as e:
+            logger.warning(f"Could not fetch the songs of {url}: {e}")
+            continue
+        states = db.get_download_states(Song, [song_key(song) for song in song_urls])
+        pending = [
+            state
+            for state in states.values()
+            if state in (DOWNLOAD_QUEUED, DOWNLOAD_FAILED)
+        ]
+        if song_urls and not pending:
+            done.append(key)
+    return db.mark_downloads_done(Album, done)
+
+
+def _retry_downloads(
+    mt: MeTubeConnector,
+    model: DownloadModel,
+    urls: List[str],
+    entries: Dict[str, HistoryEntry],
+) -> List[str]:
+    """Submit failed downloads to MeTube again.
+
+    The quality and format of the failed attempt are reused when it is still
+    in the history.
+
+    Args:
+        mt: The MeTubeConnector to submit with.
+        model: The model of the table, Song or Album.
+        urls: The URLs to submit.
+        entries: The history entries of the model, keyed by key.
+
+    Returns:
+        The URLs accepted by MeTube.
+
+    """
+    get_key = KEY_COLUMNS[model][1]
+    retried = []
+    for url in urls:
+        quality, download_format = _get_options(entries, get_key(url))
+        if mt.resubmit(url, quality, download_format):
+            logger.info(f"Retrying download of {url}")
+            retried.append(url)
+    return retried
+
+
+def _get_options(entries: Dict[str, HistoryEntry], key: str) -> Tuple[str, str]:
+    """Get the quality and format of the last download attempt of a key.
+
+    Args:
+        entries: The history entries keyed by key.
+        key: The song or album key.
+
+    Returns:
+        The quality and format, the defaults if the key is not in the history.
+
+    """
+    entry = entries.get(key)
+    if entry is None:
+        return DEFAULT_QUALITY, DEFAULT_FORMAT
+    return entry.quality, entry.download_format
+
+
+def main() -> None:
+    """Reconcile the download states once."""
+    try:
+        db = DatabaseConnector()
+        counts = reconcile_downloads(db, MeTubeConnector(db_connector=db))
+        logger.info(f"Reconciled downloads: {counts}")
+    finally:
+        dispose_engines()
+        close_sessions()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
 """Logic for MusicAPI user interface."""
 
-from nicegui import ui
+from nicegui import run, ui
+from src.async_database_connector import AsyncDatabaseConnector
+from src.deadline import Deadline, DeadlineExceeded
 from src.url_handler import UrlHandler
 
 
@@ -12,19 +14,34 @@ async def process_submission(url_input, auto_download, audio_format):
             ui.notify("Please enter a YouTube URL", color="negative")
             return
 
-        handler = UrlHandler.get_handler(url)
+        if await is_already_downloaded(url):
+            ui.notify(f"Already downloaded: {url}", color="info")
+            url_input.value = ""
+            return
+
+        # creating a handler may rebuild the known id index, keep it off the loop
+        handler = await run.io_bound(UrlHandler.get_handler, url)
         warning = handler.get_warning(url)
 
         if warning:
             if not await show_warning_dialog(warning):
                 return
 
-        handler.download(
-            url=url,
-            auto_download=auto_download,
-            add_without_download=False,
-            download_format=audio_format,
-        )
+        try:
+            await run.io_bound(
+                handler.download,
+                url=url,
+                auto_download=auto_download,
+                add_without_download=False,
+                download_format=audio_format,
+                deadline=Deadline.from_env(),
+            )
+        except DeadlineExceeded:
+            ui.notify(
+                f"Partially added: {url}, submit it again later to add the rest",
+                color="warning",
+            )
+            return
 
         ui.notify(f"Successfully added: {url}", color="positive")
         url_input.value = ""
@@ -33,6 +50,16 @@ async def process_submission(url_input, auto_download, audio_format):
         ui.notify(f"Error: {e}", color="negative")
 
 
+async def is_already_downloaded(url: str) -> bool:
+    """Check without blocking the event loop whether a song or album is known."""
+    db_connector = AsyncDatabaseConnector()
+    if "playlist" in url:
+        return await db_connector.get_album(url) is not None
+    if "watch?v=" in url:
+        return await db_connector.get_song(url) is not None
+    return False
+
+
 async def show_warning_dialog(message: str) -> bool:
     """Show confirmation dialog and return the result."""
     with ui.dialog() as dialog, ui.card():
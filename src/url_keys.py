@@ -0,0 +1,101 @@
+"""Derive canonical database keys from YouTube URLs."""
+
+import hashlib
+from typing import Optional
+from urllib.parse import parse_qs, urlparse
+
+
+def get_video_id(url: str) -> Optional[str]:
+    """Extract the video ID from a YouTube watch URL.
+
+    Args:
+        url: A youtube.com, music.youtube.com or youtu.be video URL.
+
+    Returns:
+        The video ID if present, otherwise None.
+
+    """
+    parsed = urlparse(url)
+    if parsed.netloc.endswith("youtu.be"):
+        return parsed.path.strip("/") or None
+    return parse_qs(parsed.query).get("v", [None])[0]
+
+
+def get_playlist_id(url: str) -> Optional[str]:
+    """Extract the playlist ID from a YouTube playlist URL.
+
+    Args:
+        url: A youtube.com or music.youtube.com playlist URL.
+
+    Returns:
+        The playlist ID if present, otherwise None.
+
+    """
+    return parse_qs(urlparse(url).query).get("list", [None])[0]
+
+
+def get_channel_id(url: str) -> Optional[str]:
+    """Extract the channel ID from a YouTube channel URL.
+
+    Args:
+        url: A youtube.com or music.youtube.com channel URL.
+
+    Returns:
+        The channel ID if present, otherwise None.
+
+    """
+    if "channel/" not in url:
+        return None
+    return url.split("channel/")[1].split("/")[0].split("?")[0] or None
+
+
+def song_key(url: str) -> str:
+    """Return the canonical key of a song URL.
+
+    Args:
+        url: The URL of the song.
+
+    Returns:
+        The video ID, or a hash of the URL if it contains none.
+
+    """
+    return get_video_id(url) or _hash_url(url)
+
+
+def album_key(url: str) -> str:
+    """Return the canonical key of an album URL.
+
+    Args:
+        url: The URL of the album.
+
+    Returns:
+        The playlist ID, or a hash of the URL if it contains none.
+
+    """
+    return get_playlist_id(url) or _hash_url(url)
+
+
+def artist_key(url: str) -> str:
+    """Return the canonical key of an artist URL.
+
+    Args:
+        url: The URL of the artist.
+
+    Returns:
+        The channel ID, or a hash of the URL if it contains none.
+
+    """
+    return get_channel_id(url) or _hash_url(url)
+
+
+def _hash_url(url: str) -> str:
+    """Hash a URL that does not contain a YouTube ID into a short key.
+
+    Args:
+        url: The URL to hash.
+
+    Returns:
+        The hex digest of the URL.
+
+    """
+    return hashlib.sha1(url.encode("utf-8")).hexdigest()
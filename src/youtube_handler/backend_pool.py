@@ -0,0 +1,236 @@
+"""Route submissions across several MeTube instances."""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import src.logging_config  # noqa: F401
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+MAX_ROUTES = 10_000
+
+_pools: Dict[Tuple[str, ...], "MeTubeBackendPool"] = {}
+_pools_lock = threading.Lock()
+
+
+def get_base_urls(base_url: str) -> List[str]:
+    """Split a comma separated list of MeTube API URLs.
+
+    Args:
+        base_url: One or more base URLs separated by commas.
+
+    Returns:
+        The base URLs without surrounding whitespace and trailing slashes.
+
+    """
+    return [url.strip().rstrip("/") for url in base_url.split(",") if url.strip()]
+
+
+def get_shared_backend_pool(base_urls: List[str]) -> "MeTubeBackendPool":
+    """Return the process-wide pool of a set of MeTube instances.
+
+    Backends are ejected for ME_TUBE_EJECT_SECONDS after ME_TUBE_MAX_FAILURES
+    failed requests in a row, and their queue depths are checked every
+    ME_TUBE_HEALTH_CHECK_SECONDS.
+
+    Args:
+        base_urls: The base URLs of the MeTube APIs.
+
+    Returns:
+        The shared MeTubeBackendPool instance.
+
+    """
+    with _pools_lock:
+        pool = _pools.get(tuple(base_urls))
+        if pool is None:
+            pool = MeTubeBackendPool(
+                base_urls,
+                int(os.environ.get("ME_TUBE_MAX_FAILURES", "3")),
+                float(os.environ.get("ME_TUBE_EJECT_SECONDS", "60")),
+                float(os.environ.get("ME_TUBE_HEALTH_CHECK_SECONDS", "30")),
+            )
+            _pools[tuple(base_urls)] = pool
+        return pool
+
+
+def reset_backend_pools() -> None:
+    """Forget all shared backend pools."""
+    with _pools_lock:
+        _pools.clear()
+
+
+class MeTubeBackend:
+    """The routing state of a single MeTube instance."""
+
+    def __init__(self, base_url: str) -> None:
+        """Initialize the MeTubeBackend.
+
+        Args:
+            base_url: The base URL of the MeTube API.
+
+        """
+        self.base_url = base_url
+        self.in_flight = 0
+        self.queue_depth = 0
+        self.failures = 0
+        self.ejected_until = 0.0
+
+    @property
+    def load(self) -> int:
+        """The known queue depth plus the submissions in flight."""
+        return self.queue_depth + self.in_flight
+
+
+class MeTubeBackendPool:
+    """Pick the least-loaded healthy MeTube instance for every submission.
+
+    Submissions sharing a route key, e.g. the songs of one album, stick to
+    the backend chosen for the first of them while it stays healthy.
+    """
+
+    def __init__(
+        self,
+        base_urls: List[str],
+        max_failures: int,
+        eject_seconds: float,
+        health_check_interval: float,
+    ) -> None:
+        """Initialize the MeTubeBackendPool.
+
+        Args:
+            base_urls: The base URLs of the MeTube APIs.
+            max_failures: The failed requests in a row after which a backend
+                is ejected.
+            eject_seconds: The seconds an ejected backend receives no
+                submissions.
+            health_check_interval: The seconds between two health checks.
+
+        """
+        self.backends = [MeTubeBackend(base_url) for base_url in base_urls]
+        self.max_failures = max(1, max_failures)
+        self.eject_seconds = eject_seconds
+        self.health_check_interval = health_check_interval
+
+        self._lock = threading.Lock()
+        self._routes: "OrderedDict[str, MeTubeBackend]" = OrderedDict()
+        self._checked_at = 0.0
+
+    @property
+    def base_urls(self) -> List[str]:
+        """The base URLs of all backends."""
+        return [backend.base_url for backend in self.backends]
+
+    def needs_health_check(self) -> bool:
+        """Check whether the backends should be checked again.
+
+        A single backend is never checked, as there is nothing to choose.
+
+        Returns:
+            True if the last health check is older than the interval.
+
+        """
+        with self._lock:
+            return (
+                len(self.backends) > 1
+                and time.monotonic() - self._checked_at >= self.health_check_interval
+            )
+
+    def update_health(self, depths: Dict[str, Optional[int]]) -> None:
+        """Store the result of a health check.
+
+        Args:
+            depths: The queue depth of every checked backend, None if it
+                could not be read.
+
+        """
+        with self._lock:
+            self._checked_at = time.monotonic()
+            for backend in self.backends:
+                if backend.base_url not in depths:
+                    continue
+                depth = depths[backend.base_url]
+                if depth is None:
+                    self._record_failure(backend)
+                else:
+                    backend.queue_depth = depth
+                    backend.failures = 0
+                    backend.ejected_until = 0.0
+
+    def acquire(self, route_key: Optional[str] = None) -> str:
+        """Choose the backend of a submission and count it as in flight.
+
+        Args:
+            route_key: Submissions with the same key go to the same backend.
+
+        Returns:
+            The base URL of the chosen backend.
+
+        """
+        with self._lock:
+            now = time.monotonic()
+            backend = self._routes.get(route_key) if route_key else None
+            if backend is None or backend.ejected_until > now:
+                backend = self._pick(now)
+                if route_key:
+                    self._routes[route_key] = backend
+                    if len(self._routes) > MAX_ROUTES:
+                        self._routes.popitem(last=False)
+            elif route_key:
+                self._routes.move_to_end(route_key)
+            backend.in_flight += 1
+            return backend.base_url
+
+    def release(self, base_url: str, healthy: Optional[bool]) -> None:
+        """Finish a submission started with acquire.
+
+        Args:
+            base_url: The base URL returned by acquire.
+            healthy: False if the backend could not be reached or failed,
+                None if the submission was given up before the backend
+                answered.
+
+        """
+        with self._lock:
+            backend = next(b for b in self.backends if b.base_url == base_url)
+            backend.in_flight -= 1
+            if healthy:
+                backend.failures = 0
+            elif healthy is not None:
+                self._record_failure(backend)
+
+    def _pick(self, now: float) -> MeTubeBackend:
+        """Pick the least-loaded backend, preferring ones not ejected.
+
+        Args:
+            now: The current monotonic time.
+
+        Returns:
+            The chosen backend.
+
+        """
+        candidates = [b for b in self.backends if b.ejected_until <= now]
+        if not candidates:
+            logger.warning("All MeTube backends are ejected, using the least loaded")
+            candidates = self.backends
+        return min(candidates, key=lambda backend: backend.load)
+
+    def _record_failure(self, backend: MeTubeBackend) -> None:
+        """Count a failure and eject the backend after too many in a row.
+
+        Args:
+            backend: The failed backend.
+
+        """
+        backend.failures += 1
+        if backend.failures >= self.max_failures and len(self.backends) > 1:
+            if backend.ejected_until <= time.monotonic():
+                logger.warning(
+                    f"Ejecting MeTube backend {backend.base_url} for "
+                    f"{self.eject_seconds} seconds after {backend.failures} failures"
+                )
+            backend.ejected_until = time.monotonic() + self.eject_seconds
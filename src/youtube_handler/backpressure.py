@@ -0,0 +1,205 @@
+"""Throttle submissions to MeTube based on the size of its download queue."""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from typing import Awaitable, Callable, Dict, Optional
+
+import src.logging_config  # noqa: F401
+
+from src.deadline import Deadline
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+_backpressures: Dict[str, "QueueBackpressure"] = {}
+_backpressures_lock = threading.Lock()
+
+
+def get_shared_backpressure(base_url: str) -> "QueueBackpressure":
+    """Return the process-wide backpressure of a MeTube instance.
+
+    The water marks are read from ME_TUBE_HIGH_WATER_MARK and
+    ME_TUBE_LOW_WATER_MARK, which defaults to half of the high-water mark.
+    A high-water mark of 0 disables throttling.
+
+    Args:
+        base_url: The base URL of the MeTube API.
+
+    Returns:
+        The shared QueueBackpressure instance.
+
+    """
+    with _backpressures_lock:
+        backpressure = _backpressures.get(base_url)
+        if backpressure is None:
+            high_water = int(os.environ.get("ME_TUBE_HIGH_WATER_MARK", "0"))
+            backpressure = QueueBackpressure(
+                high_water,
+                int(os.environ.get("ME_TUBE_LOW_WATER_MARK", str(high_water // 2))),
+                float(os.environ.get("ME_TUBE_BACKPRESSURE_POLL_SECONDS", "5")),
+            )
+            _backpressures[base_url] = backpressure
+        return backpressure
+
+
+def reset_backpressures() -> None:
+    """Forget all shared backpressure states."""
+    with _backpressures_lock:
+        _backpressures.clear()
+
+
+class QueueBackpressure:
+    """Pause submissions above a high-water mark until below a low-water mark.
+
+    The queue depth is read from MeTube at most once per poll interval. In
+    between, every admitted submission increases the estimated depth.
+    """
+
+    def __init__(self, high_water: int, low_water: int, poll_interval: float) -> None:
+        """Initialize the QueueBackpressure.
+
+        Args:
+            high_water: The queue depth at which submissions are paused.
+            low_water: The queue depth at which paused submissions resume.
+            poll_interval: The seconds between two reads of the queue depth.
+
+        """
+        self.high_water = high_water
+        self.low_water = min(low_water, high_water)
+        self.poll_interval = poll_interval
+
+        self._lock = threading.Lock()
+        self._depth: Optional[int] = None
+        self._checked_at = 0.0
+        self._paused = False
+
+    @property
+    def enabled(self) -> bool:
+        """Whether submissions are throttled at all."""
+        return self.high_water > 0
+
+    def admit(
+        self,
+        get_depth: Callable[[], Optional[int]],
+        deadline: Optional[Deadline] = None,
+    ) -> None:
+        """Block until a submission may be sent.
+
+        Args:
+            get_depth: Reads the current queue depth, None if unknown.
+            deadline: The deadline of the submission, None to wait forever.
+
+        Raises:
+            DeadlineExceeded: If the deadline passes while paused.
+
+        """
+        if not self.enabled:
+            return
+        if self._needs_refresh():
+            self._update(get_depth())
+        if self._try_admit():
+            return
+
+        logger.info(f"MeTube queue reached {self._depth} items, pausing submissions")
+        while True:
+            time.sleep(self._get_wait(deadline))
+            self._update(get_depth())
+            if self._try_admit():
+                break
+        logger.info(f"MeTube queue down to {self._depth} items, resuming submissions")
+
+    async def admit_async(
+        self,
+        get_depth: Callable[[], Awaitable[Optional[int]]],
+        deadline: Optional[Deadline] = None,
+    ) -> None:
+        """Wait without blocking the event loop until a submission may be sent.
+
+        Args:
+            get_depth: Reads the current queue depth, None if unknown.
+            deadline: The deadline of the submission, None to wait forever.
+
+        Raises:
+            DeadlineExceeded: If the deadline passes while paused.
+
+        """
+        if not self.enabled:
+            return
+        if self._needs_refresh():
+            self._update(await get_depth())
+        if self._try_admit():
+            return
+
+        logger.info(f"MeTube queue reached {self._depth} items, pausing submissions")
+        while True:
+            await asyncio.sleep(self._get_wait(deadline))
+            self._update(await get_depth())
+            if self._try_admit():
+                break
+        logger.info(f"MeTube queue down to {self._depth} items, resuming submissions")
+
+    def _get_wait(self, deadline: Optional[Deadline]) -> float:
+        """Return the seconds to wait before reading the queue depth again.
+
+        Args:
+            deadline: The deadline of the submission, None to wait forever.
+
+        Returns:
+            The poll interval, limited to the time left until the deadline.
+
+        Raises:
+            DeadlineExceeded: If the deadline passed.
+
+        """
+        if deadline is None:
+            return self.poll_interval
+        deadline.check("waiting for the MeTube queue")
+        return deadline.timeout(self.poll_interval)
+
+    def _needs_refresh(self) -> bool:
+        """Check whether the estimated depth is older than the poll interval.
+
+        Returns:
+            True if the depth should be read from MeTube.
+
+        """
+        with self._lock:
+            return time.monotonic() - self._checked_at >= self.poll_interval
+
+    def _update(self, depth: Optional[int]) -> None:
+        """Store a queue depth read from MeTube.
+
+        Args:
+            depth: The queue depth, None if it could not be read.
+
+        """
+        with self._lock:
+            self._depth = depth
+            self._checked_at = time.monotonic()
+
+    def _try_admit(self) -> bool:
+        """Count a submission unless submissions are paused.
+
+        Submissions pause once the estimated depth reaches the high-water mark
+        and resume once it is at or below the low-water mark. An unknown
+        depth never blocks submissions.
+
+        Returns:
+            True if the submission is admitted.
+
+        """
+        with self._lock:
+            if self._depth is None:
+                self._paused = False
+                return True
+            if self._paused and self._depth <= self.low_water:
+                self._paused = False
+            elif not self._paused and self._depth >= self.high_water:
+                self._paused = True
+            if self._paused:
+                return False
+            self._depth += 1
+            return True
@@ -1,44 +1,362 @@
 """Module for connecting to MeTube API and queuing downloads."""
 
+import asyncio
 import json
 import os
-from typing import List, Optional
+import threading
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
 
+import httpx
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 import logging
 
 import src.logging_config  # noqa: F401
 
-from src.database_connector import DatabaseConnector
+from src.database_connector import (
+    DOWNLOAD_DONE,
+    DOWNLOAD_QUEUED,
+    DatabaseConnector,
+    OutboxEntry,
+)
+from src.deadline import Deadline, DeadlineExceeded
+from src.youtube_handler.backend_pool import (
+    MeTubeBackendPool,
+    get_base_urls,
+    get_shared_backend_pool,
+)
+from src.youtube_handler.backpressure import get_shared_backpressure
+from src.youtube_handler.submission_planner import (
+    SUBMIT_SONGS,
+    SUBMIT_URL,
+    SubmissionPlan,
+    plan_submission,
+)
 from src.youtube_handler.youtube_album_fetcher import YoutubeAlbumFetcher
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+RETRY_STATUS_CODES = (502, 503, 504)
+# a gateway answering 502 or 504 may have passed the add on to MeTube, so
+# submissions are only resent if the gateway could not reach MeTube at all
+SUBMIT_RETRY_STATUS_CODES = (503,)
+
+_sessions: Dict[str, requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+
+def get_timeouts() -> Tuple[float, float]:
+    """Read the MeTube connect and read timeouts from environment variables.
+
+    Returns:
+        The connect and read timeout in seconds.
+
+    """
+    return (
+        float(os.environ.get("ME_TUBE_CONNECT_TIMEOUT", "5")),
+        float(os.environ.get("ME_TUBE_READ_TIMEOUT", "30")),
+    )
+
+
+def get_retries() -> int:
+    """Read the number of retries of MeTube requests from environment variables.
+
+    Returns:
+        The maximum number of retries.
+
+    """
+    return int(os.environ.get("ME_TUBE_RETRIES", "3"))
+
+
+def get_backoff() -> float:
+    """Read the retry backoff factor from environment variables.
+
+    Returns:
+        The backoff factor in seconds.
+
+    """
+    return float(os.environ.get("ME_TUBE_BACKOFF", "0.5"))
+
+
+def get_max_concurrency() -> int:
+    """Read the maximum number of concurrent MeTube submissions.
+
+    Returns:
+        The maximum number of URLs submitted at the same time.
+
+    """
+    return max(1, int(os.environ.get("ME_TUBE_MAX_CONCURRENCY", "4")))
+
+
+def is_outbox_enabled() -> bool:
+    """Check whether submissions are written to the outbox instead of MeTube.
+
+    Returns:
+        True if ME_TUBE_OUTBOX is enabled.
+
+    """
+    return os.environ.get("ME_TUBE_OUTBOX", "false").lower() in ("1", "true", "yes")
+
+
+def get_history_queue_depth(history: Dict[str, Any]) -> int:
+    """Count the downloads MeTube has not finished from its history.
+
+    Args:
+        history: The response of the MeTube history endpoint.
+
+    Returns:
+        The number of queued and pending downloads.
+
+    """
+    return len(history.get("queue") or ()) + len(history.get("pending") or ())
+
+
+class QueuedDownload(NamedTuple):
+    """Result of queuing a single URL.
+
+    A URL that was only written to the outbox is marked as outboxed, it is not
+    delivered to MeTube yet and may still be given up on.
+
+    """
+
+    url: str
+    response: Optional[httpx.Response]
+    song_urls: Optional[List[str]]
+    failed: bool = False
+    outboxed: bool = False
+
+
+class MeTubeRetry(Retry):
+    """Retry policy that does not resend submissions MeTube may have queued."""
+
+    def is_retry(
+        self, method: str, status_code: int, has_retry_after: bool = False
+    ) -> bool:
+        """Check whether a response should be retried.
+
+        Args:
+            method: The HTTP method of the request.
+            status_code: The status code of the response.
+            has_retry_after: Whether the response has a Retry-After header.
+
+        Returns:
+            True if the request should be sent again.
+
+        """
+        if method == "POST" and status_code not in SUBMIT_RETRY_STATUS_CODES:
+            return False
+        return super().is_retry(method, status_code, has_retry_after)
+
+
+def get_shared_session(base_url: str) -> requests.Session:
+    """Return the process-wide HTTP session for a MeTube instance.
+
+    The session keeps connections alive between requests and retries
+    requests that did not reach MeTube, or were rejected by a gateway, with
+    exponential backoff. Submissions are only retried if they could not
+    have been queued, see SUBMIT_RETRY_STATUS_CODES.
+
+    Args:
+        base_url: The base URL of the MeTube API.
+
+    Returns:
+        The shared requests Session.
+
+    """
+    with _sessions_lock:
+        session = _sessions.get(base_url)
+        if session is None:
+            retries = get_retries()
+            retry = MeTubeRetry(
+                total=retries,
+                connect=retries,
+                read=0,
+                status=retries,
+                status_forcelist=RETRY_STATUS_CODES,
+                allowed_methods=frozenset({"GET", "POST"}),
+                backoff_factor=get_backoff(),
+                raise_on_status=False,
+            )
+            session = requests.Session()
+            session.mount(base_url, HTTPAdapter(max_retries=retry))
+            _sessions[base_url] = session
+        return session
+
+
+def close_sessions() -> None:
+    """Close all shared HTTP sessions and their pooled connections."""
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
 
 class MeTubeConnector:
     """Connector for MeTube API."""
 
-    def __init__(self, base_url: Optional[str] = None) -> None:
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        db_connector: Optional[DatabaseConnector] = None,
+    ) -> None:
         """Initialize MeTubeConnector.
 
         Args:
-            base_url: Base URL for MeTube API. If None, will use the
-                ME_TUBE_API_URL environment variable.
+            base_url: Base URL for MeTube API, or several separated by commas
+                to balance submissions across MeTube instances. If None, will
+                use the ME_TUBE_API_URL environment variable.
+            db_connector: The DatabaseConnector to record downloads with. If
+                None, a new one is created.
 
         Raises:
             ValueError: If base_url is not provided and ME_TUBE_API_URL
                 environment variable is not set.
 
         """
-        self.base_url = base_url or os.environ.get("ME_TUBE_API_URL")
-        if self.base_url is None:
+        base_url = base_url or os.environ.get("ME_TUBE_API_URL")
+        self.base_urls = get_base_urls(base_url) if base_url else []
+        if not self.base_urls:
             raise ValueError(
                 "Base URL for MeTube API must be provided either as an argument "
                 "or via the ME_TUBE_API_URL environment variable."
             )
-        self.db_connector = DatabaseConnector()
+        self.base_url = self.base_urls[0]
+        self.db_connector = db_connector or DatabaseConnector()
+
+    @property
+    def timeout(self) -> Tuple[float, float]:
+        """The connect and read timeout of MeTube requests in seconds."""
+        return get_timeouts()
+
+    @property
+    def pool(self) -> MeTubeBackendPool:
+        """The shared routing state of the MeTube instances."""
+        return get_shared_backend_pool(self.base_urls)
+
+    def get_history(self) -> Optional[Dict[str, Any]]:
+        """Read the queued, pending and finished downloads from all MeTubes.
+
+        Instances whose history could not be read are left out.
+
+        Returns:
+            The history with the lists "queue", "pending" and "done", or None
+                if no history could be read.
+
+        """
+        histories = [
+            history
+            for history in map(self._get_history, self.base_urls)
+            if history is not None
+        ]
+        if not histories:
+            return None
+        return {
+            section: [
+                item for history in histories for item in history.get(section) or ()
+            ]
+            for section in ("queue", "pending", "done")
+        }
+
+    def get_queue_depth(self, base_url: Optional[str] = None) -> Optional[int]:
+        """Read the number of queued and pending downloads from MeTube.
+
+        Args:
+            base_url: The MeTube instance to read, defaults to the first one.
+
+        Returns:
+            The queue depth, or None if it could not be read.
+
+        """
+        history = self._get_history(base_url or self.base_url)
+        return get_history_queue_depth(history) if history is not None else None
+
+    def _get_history(self, base_url: str) -> Optional[Dict[str, Any]]:
+        """Read the history of a single MeTube instance.
+
+        Args:
+            base_url: The base URL of the MeTube API.
+
+        Returns:
+            The history, or None if it could not be read.
+
+        """
+        try:
+            response = get_shared_session(base_url).get(
+                f"{base_url}/history", timeout=self.timeout
+            )
+            response.raise_for_status()
+            return response.json()
+        except (requests.RequestException, ValueError) as e:
+            logger.warning(f"Could not read the MeTube history of {base_url}: {e}")
+            return None
+
+    def _get_async_timeout(self, deadline: Optional[Deadline]) -> Dict[str, Any]:
+        """Build the timeout argument of an async request limited by a deadline.
+
+        Args:
+            deadline: The deadline of the submission, None for no limit.
+
+        Returns:
+            The keyword arguments overriding the client timeout, empty without
+                a deadline.
+
+        """
+        if deadline is None:
+            return {}
+        deadline.check("submitting to MeTube")
+        connect_timeout, read_timeout = deadline.timeouts(self.timeout)
+        return {"timeout": httpx.Timeout(read_timeout, connect=connect_timeout)}
+
+    def _check_backends(self) -> None:
+        """Read the queue depth of every MeTube instance if it is due."""
+        if self.pool.needs_health_check():
+            self.pool.update_health(
+                {
+                    base_url: self.get_queue_depth(base_url)
+                    for base_url in self.base_urls
+                }
+            )
+
+    async def _check_backends_async(self, client: httpx.AsyncClient) -> None:
+        """Read the queue depth of every MeTube instance if it is due.
+
+        Args:
+            client: The HTTP client to read with.
+
+        """
+        if self.pool.needs_health_check():
+            depths = await asyncio.gather(
+                *(
+                    self.get_queue_depth_async(client, base_url)
+                    for base_url in self.base_urls
+                )
+            )
+            self.pool.update_health(dict(zip(self.base_urls, depths)))
+
+    async def get_queue_depth_async(
+        self, client: httpx.AsyncClient, base_url: Optional[str] = None
+    ) -> Optional[int]:
+        """Read the number of queued and pending downloads from MeTube.
+
+        Args:
+            client: The HTTP client to read with.
+            base_url: The MeTube instance to read, defaults to the first one.
+
+        Returns:
+            The queue depth, or None if it could not be read.
+
+        """
+        base_url = base_url or self.base_url
+        try:
+            response = await client.get(f"{base_url}/history")
+            response.raise_for_status()
+            return get_history_queue_depth(response.json())
+        except (httpx.HTTPError, ValueError) as e:
+            logger.warning(f"Could not read the MeTube queue depth: {e}")
+            return None
 
     def queue_download(
         self,
@@ -46,6 +364,7 @@ class MeTubeConnector:
         quality: str = "Best",
         download_format: str = "mp3",
         add_without_download: bool = False,
+        deadline: Optional[Deadline] = None,
     ) -> Optional[List[requests.Response]]:
         """Queue a download for the given URL(s).
 
@@ -55,34 +374,154 @@ class MeTubeConnector:
             download_format: Desired download_format of the download. Default is "mp3".
             add_without_download: If True, will add the URL to the
                 database without queuing a download.
+            deadline: The deadline of the submission, None for no limit.
 
         Returns:
             A list of responses from the MeTube API if downloads were queued,
                 otherwise None.
 
+        Raises:
+            DeadlineExceeded: If the deadline passes before all URLs were
+                queued. The URLs queued so far stay recorded, the others are
+                listed as pending.
+
         """
-        if type(url) is str:
-            url = [url]
+        urls = [url] if isinstance(url, str) else url
         responses = []
-        for single_url in url:
-            response = self._download_url(
-                single_url,
-                quality,
-                download_format,
-                add_without_download,
-            )
+        for index, single_url in enumerate(urls):
+            try:
+                response = self._download_url(
+                    single_url,
+                    quality,
+                    download_format,
+                    add_without_download,
+                    deadline,
+                )
+            except DeadlineExceeded as e:
+                raise DeadlineExceeded(e.stage, urls[index:]) from e
             if response is not None:
                 responses.append(response)
 
         logger.info("Responses: %s", responses)
         return responses
 
+    async def queue_download_async(
+        self,
+        url: str | List[str],
+        quality: str = "Best",
+        download_format: str = "mp3",
+        add_without_download: bool = False,
+        deadline: Optional[Deadline] = None,
+    ) -> List[QueuedDownload]:
+        """Queue downloads for the given URL(s) with concurrent submissions.
+
+        Up to ME_TUBE_MAX_CONCURRENCY URLs have their songs enumerated and are
+        submitted to MeTube at the same time. Playlists sharing songs with
+        the database are submitted as their missing songs. Database checks
+        and writes run in the calling thread so they take part in its
+        transaction. With the outbox enabled, new URLs are only written to
+        the outbox.
+
+        Args:
+            url: A single YouTube URL or a list of URLs to queue for download.
+            quality: Desired quality of the download. Default is "Best".
+            download_format: Desired download_format of the download. Default is "mp3".
+            add_without_download: If True, will add the URLs to the
+                database without queuing a download.
+            deadline: The deadline of the submission, None for no limit.
+
+        Returns:
+            The result of every URL in input order.
+
+        Raises:
+            ValueError: If a URL format is unsupported.
+            DeadlineExceeded: If the deadline passes before all URLs were
+                queued. The URLs queued so far stay recorded, the others are
+                listed as pending.
+
+        """
+        urls = [url] if type(url) is str else url
+        new_urls = [single_url for single_url in urls if not self._is_known(single_url)]
+        if is_outbox_enabled() and not add_without_download:
+            for single_url in new_urls:
+                self.db_connector.enqueue_outbox(single_url, quality, download_format)
+            return [
+                QueuedDownload(single_url, None, None, outboxed=single_url in new_urls)
+                for single_url in urls
+            ]
+
+        semaphore = asyncio.Semaphore(get_max_concurrency())
+        fetched = await asyncio.gather(
+            *(
+                self._get_song_urls_async(semaphore, single_url, deadline)
+                for single_url in new_urls
+            ),
+            return_exceptions=True,
+        )
+        pending = []
+        fetched_urls = []
+        song_lists = []
+        for single_url, song_urls in zip(new_urls, fetched):
+            if isinstance(song_urls, DeadlineExceeded):
+                pending.append(single_url)
+            elif isinstance(song_urls, BaseException):
+                raise song_urls
+            else:
+                fetched_urls.append(single_url)
+                song_lists.append(song_urls)
+
+        results = {}
+        if add_without_download:
+            for single_url, song_urls in zip(fetched_urls, song_lists):
+                self._record_download(single_url, song_urls, DOWNLOAD_DONE)
+                results[single_url] = QueuedDownload(single_url, None, song_urls)
+        else:
+            plans = [
+                plan_submission(self.db_connector, single_url, song_urls)
+                for single_url, song_urls in zip(fetched_urls, song_lists)
+            ]
+            connect_timeout, read_timeout = self.timeout
+            async with httpx.AsyncClient(
+                timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+                transport=httpx.AsyncHTTPTransport(retries=get_retries()),
+            ) as client:
+                submitted = await asyncio.gather(
+                    *(
+                        self._submit_plan_async(
+                            client, semaphore, plan, quality, download_format, deadline
+                        )
+                        for plan in plans
+                    )
+                )
+            for plan, responses in zip(plans, submitted):
+                complete = self._record_plan(plan, responses)
+                if len(responses) < len(plan.submit_urls):
+                    pending.append(plan.url)
+                results[plan.url] = QueuedDownload(
+                    plan.url,
+                    responses[-1] if responses else None,
+                    plan.song_urls,
+                    not complete,
+                )
+
+        if pending:
+            logger.warning(
+                f"Deadline exceeded with {len(pending)} of {len(urls)} URLs pending"
+            )
+            raise DeadlineExceeded("queuing downloads", pending)
+        logger.info(f"Queued {len(new_urls)} of {len(urls)} URLs")
+        return [
+            results.get(single_url, QueuedDownload(single_url, None, None))
+            for single_url in urls
+        ]
+
     def _download_url(
         self,
         single_url: str,
         quality: str,
         download_format: str,
         add_without_download: bool,
+        deadline: Optional[Deadline] = None,
     ) -> Optional[requests.Response]:
         """Download a single URL.
 
@@ -94,6 +533,7 @@ class MeTubeConnector:
             download_format: Desired download_format of the download.
             add_without_download: If True, will add the URL to the
                 database without queuing a download.
+            deadline: The deadline of the submission, None for no limit.
 
         Returns:
             The response from the MeTube API if download was queued,
@@ -101,45 +541,369 @@ class MeTubeConnector:
 
         Raises:
             ValueError: If the URL format is unsupported.
+            DeadlineExceeded: If the deadline passes before all submissions
+                of the URL were sent. The accepted songs stay recorded.
 
         """
-        is_song = "watch" in single_url
-        is_playlist = "playlist" in single_url
+        if self._is_known(single_url):
+            return None
+
+        if is_outbox_enabled() and not add_without_download:
+            self.db_connector.enqueue_outbox(single_url, quality, download_format)
+            logger.info(f"Added {single_url} to the MeTube outbox")
+            return None
+
+        song_urls = self._get_song_urls(single_url, deadline)
+        if add_without_download:
+            self._record_download(single_url, song_urls, DOWNLOAD_DONE)
+            return None
+
+        plan = plan_submission(self.db_connector, single_url, song_urls)
+        responses = self._submit_plan(plan, quality, download_format, deadline)
+        complete = self._record_plan(plan, responses)
+        if len(responses) < len(plan.submit_urls):
+            raise DeadlineExceeded("submitting to MeTube")
+        if not complete or not responses:
+            return None
+        return responses[-1]
+
+    def resubmit(self, single_url: str, quality: str, download_format: str) -> bool:
+        """Submit a URL to MeTube again without database checks.
 
-        if is_playlist:
-            album_result = self.db_connector.get_album(single_url)
-            if album_result is not None:
+        Args:
+            single_url: The YouTube URL to queue for download.
+            quality: Desired quality of the download.
+            download_format: Desired download_format of the download.
+
+        Returns:
+            True if MeTube accepted the submission.
+
+        """
+        return self._add_to_me_tube(single_url, quality, download_format) is not None
+
+    def deliver(self, entry: OutboxEntry) -> None:
+        """Submit an outbox entry to MeTube and record it in the database.
+
+        Entries whose URL is already recorded were delivered before and are
+        not submitted again. Songs accepted before a failed delivery are
+        recorded and committed, even inside a transaction that is rolled back
+        because of the failure, so a retry only submits the remaining ones.
+
+        Args:
+            entry: The outbox entry to deliver.
+
+        Raises:
+            RuntimeError: If MeTube did not accept the submission.
+
+        """
+        if self._is_known(entry.url):
+            return
+        plan = plan_submission(
+            self.db_connector, entry.url, self._get_song_urls(entry.url)
+        )
+        responses = self._submit_plan(plan, entry.quality, entry.download_format)
+        if not self._record_plan(plan, responses):
+            self.db_connector.commit()
+            raise RuntimeError(f"MeTube did not accept {entry.url}")
+
+    def _is_known(self, single_url: str) -> bool:
+        """Check whether a song or playlist URL is already in the database.
+
+        Args:
+            single_url: The YouTube URL to check.
+
+        Returns:
+            True if the URL was downloaded before.
+
+        Raises:
+            ValueError: If the URL format is unsupported.
+
+        """
+        if "playlist" in single_url:
+            if self.db_connector.get_album(single_url) is not None:
                 logger.info(f"Album {single_url} already in database, skipping.")
-                return None
-        elif is_song:
-            song_result = self.db_connector.get_song(single_url)
-            if song_result is not None:
+                return True
+        elif "watch" in single_url:
+            if self.db_connector.get_song(single_url) is not None:
                 logger.info(f"Song {single_url} already in database, skipping.")
-                return None
+                return True
         else:
             raise ValueError(f"Unsupported URL format: {single_url}")
+        return False
 
-        if not add_without_download:
-            response = self._add_to_me_tube(
-                single_url,
-                quality,
-                download_format,
-            )
+    @staticmethod
+    def _get_song_urls(
+        single_url: str, deadline: Optional[Deadline] = None
+    ) -> Optional[List[str]]:
+        """Fetch the song URLs of a playlist URL.
+
+        Args:
+            single_url: The YouTube URL.
+            deadline: The deadline of the submission, None for no limit.
+
+        Returns:
+            The song URLs of the playlist, or None for a song URL.
+
+        Raises:
+            ValueError: If a playlist URL contains no playlist ID.
+
+        """
+        if "playlist" not in single_url:
+            return None
+        if "list=" not in single_url:
+            raise ValueError(f"Invalid playlist URL: {single_url}")
+
+        album_id = single_url.split("list=")[1].split("&")[0]
+        return YoutubeAlbumFetcher.get_album_songs(album_id, deadline=deadline)
+
+    def _record_download(
+        self, single_url: str, song_urls: Optional[List[str]], download_state: str
+    ) -> None:
+        """Record a queued song, or a playlist and its songs, in the database.
+
+        Args:
+            single_url: The queued YouTube URL.
+            song_urls: The song URLs of a playlist, None for a song URL.
+            download_state: The download state of the new rows.
+
+        """
+        if song_urls is not None:
+            self.db_connector.add_album(single_url, download_state=download_state)
+            self.db_connector.add_songs(song_urls, download_state=download_state)
         else:
-            response = None
+            self.db_connector.add_song(single_url, download_state=download_state)
+
+    def _record_plan(self, plan: SubmissionPlan, responses: List[Any]) -> bool:
+        """Record the accepted submissions of a plan in the database.
+
+        The song or playlist is only recorded once all its submissions were
+        accepted. Playlists downloaded as their missing songs, or not at all,
+        are recorded as done, their songs carry the download state.
+
+        Args:
+            plan: The submitted plan.
+            responses: The response of every submitted URL, None if rejected.
+
+        Returns:
+            True if all submissions were accepted.
+
+        """
+        accepted = [
+            url
+            for url, response in zip(plan.submit_urls, responses)
+            if response is not None
+        ]
+        if len(accepted) < len(plan.submit_urls):
+            if plan.action == SUBMIT_SONGS and accepted:
+                self.db_connector.add_songs(accepted, download_state=DOWNLOAD_QUEUED)
+            return False
+
+        if plan.song_urls is None:
+            self.db_connector.add_song(plan.url, download_state=DOWNLOAD_QUEUED)
+            return True
+        self.db_connector.add_album(
+            plan.url,
+            download_state=(
+                DOWNLOAD_QUEUED if plan.action == SUBMIT_URL else DOWNLOAD_DONE
+            ),
+        )
+        self.db_connector.add_songs(plan.song_urls, download_state=DOWNLOAD_QUEUED)
+        return True
+
+    def _submit_plan(
+        self,
+        plan: SubmissionPlan,
+        quality: str,
+        download_format: str,
+        deadline: Optional[Deadline] = None,
+    ) -> List[Optional[requests.Response]]:
+        """Submit the URLs of a plan to MeTube.
 
-        if is_playlist:
-            if "list=" not in single_url:
-                raise ValueError(f"Invalid playlist URL: {single_url}")
+        Args:
+            plan: The plan to submit.
+            quality: Desired quality of the download.
+            download_format: Desired download_format of the download.
+            deadline: The deadline of the submission, None for no limit.
+
+        Returns:
+            The response of every submitted URL, None if rejected. The list
+                is shorter than the plan if the deadline passed.
 
-            album_id = single_url.split("list=")[1].split("&")[0]
-            self.db_connector.add_album(single_url)
-            song_urls = YoutubeAlbumFetcher.get_album_songs(album_id)
-            for song_url in song_urls:
-                self.db_connector.add_song(song_url)
-        elif is_song:
-            self.db_connector.add_song(single_url)
+        """
+        if plan.action == SUBMIT_SONGS:
+            logger.info(
+                f"Submitting {len(plan.submit_urls)} missing songs of {plan.url}"
+            )
+        responses: List[Optional[requests.Response]] = []
+        for url in plan.submit_urls:
+            try:
+                responses.append(
+                    self._add_to_me_tube(
+                        url,
+                        quality,
+                        download_format,
+                        route_key=plan.url,
+                        deadline=deadline,
+                    )
+                )
+            except DeadlineExceeded as e:
+                logger.warning(f"{e}, {plan.url} is only partially submitted")
+                break
+        return responses
 
+    async def _get_song_urls_async(
+        self,
+        semaphore: asyncio.Semaphore,
+        single_url: str,
+        deadline: Optional[Deadline] = None,
+    ) -> Optional[List[str]]:
+        """Fetch the song URLs of a playlist URL in a worker thread.
+
+        Args:
+            semaphore: The semaphore limiting concurrent requests.
+            single_url: The YouTube URL.
+            deadline: The deadline of the submission, None for no limit.
+
+        Returns:
+            The song URLs of the playlist, or None for a song URL.
+
+        Raises:
+            DeadlineExceeded: If the deadline passes before the songs are read.
+
+        """
+        async with semaphore:
+            if deadline is not None:
+                deadline.check("fetching the album songs")
+            return await asyncio.to_thread(self._get_song_urls, single_url, deadline)
+
+    async def _submit_plan_async(
+        self,
+        client: httpx.AsyncClient,
+        semaphore: asyncio.Semaphore,
+        plan: SubmissionPlan,
+        quality: str,
+        download_format: str,
+        deadline: Optional[Deadline] = None,
+    ) -> List[Optional[httpx.Response]]:
+        """Submit the URLs of a plan to MeTube using an async client.
+
+        Args:
+            client: The HTTP client to submit with.
+            semaphore: The semaphore limiting concurrent submissions.
+            plan: The plan to submit.
+            quality: Desired quality of the download.
+            download_format: Desired download_format of the download.
+            deadline: The deadline of the submission, None for no limit.
+
+        Returns:
+            The response of every submitted URL, None if rejected. The list
+                is shorter than the plan if the deadline passed.
+
+        """
+        if plan.action == SUBMIT_SONGS:
+            logger.info(
+                f"Submitting {len(plan.submit_urls)} missing songs of {plan.url}"
+            )
+        responses: List[Optional[httpx.Response]] = []
+        async with semaphore:
+            for url in plan.submit_urls:
+                try:
+                    responses.append(
+                        await self._add_to_me_tube_async(
+                            client,
+                            url,
+                            quality,
+                            download_format,
+                            route_key=plan.url,
+                            deadline=deadline,
+                        )
+                    )
+                except DeadlineExceeded as e:
+                    logger.warning(f"{e}, {plan.url} is only partially submitted")
+                    break
+        return responses
+
+    async def _add_to_me_tube_async(
+        self,
+        client: httpx.AsyncClient,
+        single_url: str,
+        quality: str,
+        download_format: str,
+        route_key: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> Optional[httpx.Response]:
+        """Add URL to MeTube without database checks using an async client.
+
+        The submission goes to the least-loaded healthy MeTube instance and
+        waits while its queue is above the high-water mark. Responses with a
+        retryable status are retried with exponential backoff, as long as
+        the deadline leaves time for it.
+
+        Args:
+            client: The HTTP client to submit with.
+            single_url: The YouTube URL to queue for download.
+            quality: Desired quality of the download.
+            download_format: Desired download_format of the download.
+            route_key: Submissions with the same key go to the same instance.
+            deadline: The deadline of the submission, None for no limit.
+
+        Returns:
+            The response from the MeTube API if download was queued,
+                otherwise None.
+
+        Raises:
+            DeadlineExceeded: If the deadline passes before the submission
+                was answered.
+
+        """
+        data = {
+            "url": single_url,
+            "quality": quality,
+            "format": download_format,
+        }
+        await self._check_backends_async(client)
+        base_url = self.pool.acquire(route_key or single_url)
+        healthy: Optional[bool] = None
+        try:
+            await get_shared_backpressure(base_url).admit_async(
+                lambda: self.get_queue_depth_async(client, base_url), deadline
+            )
+            if deadline is not None:
+                deadline.check("submitting to MeTube")
+            healthy = False
+            retries = get_retries()
+            for attempt in range(retries + 1):
+                try:
+                    response = await client.post(
+                        f"{base_url}/add",
+                        json=data,
+                        **self._get_async_timeout(deadline),
+                    )
+                except httpx.HTTPError as e:
+                    if deadline is not None and deadline.expired:
+                        healthy = None
+                        raise DeadlineExceeded("submitting to MeTube") from e
+                    logger.error(f"Request for URL {single_url} failed: {e}")
+                    return None
+                if (
+                    response.status_code not in SUBMIT_RETRY_STATUS_CODES
+                    or attempt == retries
+                ):
+                    break
+                delay = get_backoff() * 2**attempt
+                if deadline is not None and deadline.remaining() < delay:
+                    break
+                await asyncio.sleep(delay)
+            healthy = response.status_code < 500
+        finally:
+            self.pool.release(base_url, healthy)
+
+        if response.status_code != 200:
+            logger.error(f"Request failed with status code {response.status_code}")
+            logger.info(f"Response: {response.text}")
+            return None
+
+        logger.info(f"Successfully queued download for URL: {single_url}")
         return response
 
     def _add_to_me_tube(
@@ -147,29 +911,64 @@ class MeTubeConnector:
         single_url: str,
         quality: str,
         download_format: str,
+        route_key: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
     ) -> Optional[requests.Response]:
         """Add URL to MeTube without database checks.
 
+        The submission goes to the least-loaded healthy MeTube instance and
+        waits while its queue is above the high-water mark.
+
         Args:
             single_url: The YouTube URL to queue for download.
             quality: Desired quality of the download.
             download_format: Desired download_format of the download.
+            route_key: Submissions with the same key go to the same instance.
+            deadline: The deadline of the submission, None for no limit.
 
         Returns:
             The response from the MeTube API if download was queued,
                 otherwise None.
 
+        Raises:
+            DeadlineExceeded: If the deadline passes before the submission
+                was answered.
+
         """
         data = {
             "url": single_url,
             "quality": quality,
             "format": download_format,
         }
-        response = requests.post(
-            f"{self.base_url}/add",
-            data=json.dumps(data),
-            headers={"Content-Type": "application/json"},
-        )
+        self._check_backends()
+        base_url = self.pool.acquire(route_key or single_url)
+        healthy: Optional[bool] = None
+        try:
+            get_shared_backpressure(base_url).admit(
+                lambda: self.get_queue_depth(base_url), deadline
+            )
+            if deadline is not None:
+                deadline.check("submitting to MeTube")
+            healthy = False
+            try:
+                response = get_shared_session(base_url).post(
+                    f"{base_url}/add",
+                    data=json.dumps(data),
+                    headers={"Content-Type": "application/json"},
+                    timeout=(
+                        deadline.timeouts(self.timeout) if deadline else self.timeout
+                    ),
+                )
+            except requests.RequestException as e:
+                if deadline is not None and deadline.expired:
+                    healthy = None
+                    raise DeadlineExceeded("submitting to MeTube") from e
+                logger.error(f"Request for URL {single_url} failed: {e}")
+                return None
+            healthy = response.status_code < 500
+        finally:
+            self.pool.release(base_url, healthy)
+
         if response.status_code != 200:
             logger.error(f"Request failed with status code {response.status_code}")
             logger.info(f"Response: {response.text}")
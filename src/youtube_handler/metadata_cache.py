@@ -0,0 +1,275 @@
+"""Cache YouTube Music responses in memory and in a file shared by processes.
+
+Responses are kept per endpoint for a configurable time: artist pages change
+with every new release and expire quickly, album and playlist track lists
+rarely change and are kept much longer. The most recently used responses are
+held in memory, all of them in an optional SQLite file, so the web service
+and the auto-download job reuse each other's lookups.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar
+
+import src.logging_config  # noqa: F401
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+T = TypeVar("T")
+
+ENDPOINT_ARTIST = "artist"
+ENDPOINT_ALBUM = "album"
+ENDPOINT_PLAYLIST = "playlist"
+
+DEFAULT_TTLS = {
+    ENDPOINT_ARTIST: 600.0,
+    ENDPOINT_ALBUM: 86400.0,
+    ENDPOINT_PLAYLIST: 86400.0,
+}
+
+_caches: Dict[Optional[str], "MetadataCache"] = {}
+_caches_lock = threading.Lock()
+
+
+def get_metadata_cache() -> "MetadataCache":
+    """Return the process-wide cache of YouTube Music responses.
+
+    The cache holds YTMUSIC_CACHE_SIZE responses in memory and all of them in
+    the SQLite file at YTMUSIC_CACHE_PATH, if set. The time to live of an
+    endpoint is read from YTMUSIC_CACHE_TTL_<ENDPOINT>, e.g.
+    YTMUSIC_CACHE_TTL_ARTIST, a time of 0 disables caching of the endpoint.
+
+    Returns:
+        The shared MetadataCache instance.
+
+    """
+    path = os.environ.get("YTMUSIC_CACHE_PATH") or None
+    with _caches_lock:
+        cache = _caches.get(path)
+        if cache is None:
+            cache = MetadataCache(
+                path,
+                int(os.environ.get("YTMUSIC_CACHE_SIZE", "1024")),
+                {
+                    endpoint: float(
+                        os.environ.get(
+                            f"YTMUSIC_CACHE_TTL_{endpoint.upper()}", str(ttl)
+                        )
+                    )
+                    for endpoint, ttl in DEFAULT_TTLS.items()
+                },
+            )
+            _caches[path] = cache
+        return cache
+
+
+def reset_metadata_caches() -> None:
+    """Close and forget all shared metadata caches."""
+    with _caches_lock:
+        for cache in _caches.values():
+            cache.close()
+        _caches.clear()
+
+
+class CacheStats:
+    """Lookups answered from memory, from disk and from YouTube Music."""
+
+    def __init__(self) -> None:
+        """Initialize empty statistics."""
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def __repr__(self) -> str:
+        """Return a short summary of the statistics."""
+        return (
+            f"CacheStats(hits={self.hits}, disk_hits={self.disk_hits}, "
+            f"misses={self.misses})"
+        )
+
+
+class MetadataCache:
+    """LRU cache in memory in front of an optional SQLite file.
+
+    Cached responses are shared between callers and must not be modified.
+    """
+
+    def __init__(
+        self, path: Optional[str], max_entries: int, ttls: Dict[str, float]
+    ) -> None:
+        """Initialize the MetadataCache.
+
+        Args:
+            path: The path of the SQLite file, None to cache in memory only.
+            max_entries: The number of responses kept in memory.
+            ttls: The seconds a response is kept per endpoint. Endpoints
+                without a positive time are not cached.
+
+        """
+        self.path = path
+        self.max_entries = max(1, max_entries)
+        self.ttls = ttls
+        self.stats = CacheStats()
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, Any]]" = OrderedDict()
+        self._connection: Optional[sqlite3.Connection] = None
+        if path:
+            self._connection = self._open(path)
+
+    def get(self, endpoint: str, key: str, fetch: Callable[[], T]) -> T:
+        """Return a cached response, fetching and storing it if needed.
+
+        Args:
+            endpoint: The YouTube Music endpoint, e.g. "artist".
+            key: The ID the endpoint was called with.
+            fetch: Calls the endpoint if the response is not cached.
+
+        Returns:
+            The cached or fetched response.
+
+        """
+        ttl = self.ttls.get(endpoint, 0)
+        if ttl <= 0:
+            return fetch()
+
+        cached = self._get(endpoint, key)
+        if cached is not None:
+            return cached[0]
+
+        value = fetch()
+        self._set(endpoint, key, value, time.time() + ttl)
+        return value
+
+    def clear(self) -> None:
+        """Remove all cached responses from memory and disk."""
+        with self._lock:
+            self._entries.clear()
+            if self._connection is not None:
+                with self._connection:
+                    self._connection.execute("DELETE FROM metadata")
+
+    def close(self) -> None:
+        """Close the SQLite file."""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def _get(self, endpoint: str, key: str) -> Optional[Tuple[Any]]:
+        """Look up a response in memory, then on disk.
+
+        Args:
+            endpoint: The YouTube Music endpoint.
+            key: The ID the endpoint was called with.
+
+        Returns:
+            A tuple holding the response, or None if it is not cached.
+
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get((endpoint, key))
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end((endpoint, key))
+                self.stats.hits += 1
+                return (entry[1],)
+
+            row = None
+            if self._connection is not None:
+                try:
+                    row = self._connection.execute(
+                        "SELECT expires_at, value FROM metadata "
+                        "WHERE endpoint = ? AND key = ? AND expires_at > ?",
+                        (endpoint, key, now),
+                    ).fetchone()
+                except sqlite3.Error as e:
+                    logger.warning(f"Could not read the YouTube Music cache: {e}")
+            if row is None:
+                self.stats.misses += 1
+                return None
+
+            value = json.loads(row[1])
+            self._remember(endpoint, key, value, row[0])
+            self.stats.disk_hits += 1
+            return (value,)
+
+    def _set(self, endpoint: str, key: str, value: Any, expires_at: float) -> None:
+        """Store a response in memory and on disk.
+
+        Responses that cannot be serialized are only kept in memory.
+
+        Args:
+            endpoint: The YouTube Music endpoint.
+            key: The ID the endpoint was called with.
+            value: The response.
+            expires_at: The Unix time at which the response expires.
+
+        """
+        with self._lock:
+            self._remember(endpoint, key, value, expires_at)
+            if self._connection is None:
+                return
+            try:
+                data = json.dumps(value)
+            except (TypeError, ValueError) as e:
+                logger.warning(f"Not caching {endpoint} {key} on disk: {e}")
+                return
+            try:
+                with self._connection:
+                    self._connection.execute(
+                        "INSERT OR REPLACE INTO metadata "
+                        "(endpoint, key, expires_at, value) VALUES (?, ?, ?, ?)",
+                        (endpoint, key, expires_at, data),
+                    )
+            except sqlite3.Error as e:
+                logger.warning(f"Could not write the YouTube Music cache: {e}")
+
+    def _remember(self, endpoint: str, key: str, value: Any, expires_at: float) -> None:
+        """Put a response into the memory cache, evicting the oldest ones.
+
+        Args:
+            endpoint: The YouTube Music endpoint.
+            key: The ID the endpoint was called with.
+            value: The response.
+            expires_at: The Unix time at which the response expires.
+
+        """
+        self._entries[(endpoint, key)] = (expires_at, value)
+        self._entries.move_to_end((endpoint, key))
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    @staticmethod
+    def _open(path: str) -> sqlite3.Connection:
+        """Open the SQLite file, creating its table and dropping expired rows.
+
+        Args:
+            path: The path of the SQLite file.
+
+        Returns:
+            The connection to the file.
+
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = sqlite3.connect(path, timeout=10, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        with connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS metadata ("
+                "endpoint TEXT NOT NULL, key TEXT NOT NULL, "
+                "expires_at REAL NOT NULL, value TEXT NOT NULL, "
+                "PRIMARY KEY (endpoint, key))"
+            )
+            connection.execute(
+                "DELETE FROM metadata WHERE expires_at <= ?", (time.time(),)
+            )
+        return connection
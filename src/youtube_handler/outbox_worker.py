@@ -0,0 +1,170 @@
+"""Background worker delivering the MeTube outbox.
+
+Submissions written to the outbox are sent to MeTube with retries and
+exponential backoff. Entries that keep failing are moved to a dead letter
+state after ME_TUBE_OUTBOX_MAX_ATTEMPTS attempts. The worker runs inside the
+web service, or on its own with ``python -m src.youtube_handler.outbox_worker``.
+"""
+
+import logging
+import os
+import threading
+from typing import Optional
+
+import src.logging_config  # noqa: F401
+
+from src.database_connector import DatabaseConnector, dispose_engines
+from src.youtube_handler.me_tube_connector import (
+    MeTubeConnector,
+    close_sessions,
+    is_outbox_enabled,
+)
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+MAX_RETRY_DELAY = 3600
+
+_worker: Optional["OutboxWorker"] = None
+
+
+class OutboxWorker:
+    """Worker draining the MeTube outbox in a background thread."""
+
+    def __init__(
+        self,
+        db_connector: Optional[DatabaseConnector] = None,
+        mt_connector: Optional[MeTubeConnector] = None,
+    ) -> None:
+        """Initialize the OutboxWorker.
+
+        Args:
+            db_connector: The DatabaseConnector holding the outbox. If None,
+                a new one is created.
+            mt_connector: The MeTubeConnector to deliver with. If None, a new
+                one using the DatabaseConnector is created.
+
+        """
+        self.db_connector = db_connector or DatabaseConnector()
+        self.mt_connector = mt_connector or MeTubeConnector(
+            db_connector=self.db_connector
+        )
+        self.batch_size = int(os.environ.get("ME_TUBE_OUTBOX_BATCH_SIZE", "20"))
+        self.poll_interval = float(os.environ.get("ME_TUBE_OUTBOX_POLL_SECONDS", "2"))
+        self.max_attempts = int(os.environ.get("ME_TUBE_OUTBOX_MAX_ATTEMPTS", "8"))
+        self.retry_seconds = float(os.environ.get("ME_TUBE_OUTBOX_RETRY_SECONDS", "30"))
+        self.lease_seconds = float(
+            os.environ.get("ME_TUBE_OUTBOX_LEASE_SECONDS", "300")
+        )
+
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def drain_once(self) -> int:
+        """Deliver one batch of due outbox entries.
+
+        Returns:
+            The number of processed entries.
+
+        """
+        entries = self.db_connector.claim_outbox(self.batch_size, self.lease_seconds)
+        for entry in entries:
+            try:
+                with self.db_connector.transaction():
+                    self.mt_connector.deliver(entry)
+                    self.db_connector.complete_outbox(entry.id)
+            except Exception as e:
+                dead = self.db_connector.fail_outbox(
+                    entry.id,
+                    str(e),
+                    self.max_attempts,
+                    self.get_retry_delay(entry.attempts),
+                )
+                if dead:
+                    logger.error(f"Giving up on {entry.url}: {e}")
+                else:
+                    logger.warning(f"Delivery of {entry.url} failed, retrying: {e}")
+        return len(entries)
+
+    def get_retry_delay(self, attempts: int) -> float:
+        """Return the delay before the next attempt of an entry.
+
+        Args:
+            attempts: The number of failed attempts so far.
+
+        Returns:
+            The delay in seconds.
+
+        """
+        return min(self.retry_seconds * 2**attempts, MAX_RETRY_DELAY)
+
+    def run(self) -> None:
+        """Drain the outbox until the worker is stopped."""
+        while not self._stop_event.is_set():
+            try:
+                processed = self.drain_once()
+            except Exception as e:
+                logger.error(f"Failed to drain the MeTube outbox: {e}")
+                processed = 0
+            if processed < self.batch_size:
+                self._stop_event.wait(self.poll_interval)
+
+    def start(self) -> None:
+        """Start draining the outbox in a background thread."""
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self.run, name="me-tube-outbox", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop the background thread after the current entry.
+
+        Args:
+            timeout: The maximum seconds to wait for the thread.
+
+        """
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+def start_outbox_worker() -> Optional[OutboxWorker]:
+    """Start the process-wide outbox worker if the outbox is enabled.
+
+    Returns:
+        The running worker, or None if the outbox is disabled.
+
+    """
+    global _worker
+    if not is_outbox_enabled():
+        return None
+    if _worker is None:
+        _worker = OutboxWorker()
+        _worker.start()
+    return _worker
+
+
+def stop_outbox_worker() -> None:
+    """Stop the process-wide outbox worker if it is running."""
+    global _worker
+    if _worker is not None:
+        _worker.stop(timeout=30)
+        _worker = None
+
+
+def main():
+    """Drain the MeTube outbox until interrupted."""
+    worker = OutboxWorker()
+    try:
+        worker.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        close_sessions()
+        dispose_engines()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Tell EPs from singles using the release list of an artist page.
+
+YouTube Music lists EPs together with singles. The artist page labels most
+of them with their release type, so their album page only has to be fetched
+to count the tracks of releases without a usable label, or to read the
+playlist ID of an EP.
+"""
+
+import threading
+from typing import Any, Dict, Optional
+
+RELEASE_SINGLE = "single"
+RELEASE_EP = "ep"
+RELEASE_UNKNOWN = "unknown"
+
+MULTI_TRACK_TYPES = ("ep", "album")
+
+
+def classify_release(release: Dict[str, Any]) -> str:
+    """Classify an entry of the singles list of an artist page.
+
+    A track count, if the entry has one, decides on its own. Otherwise the
+    release type label ("Single", "EP" or "Album") decides. Entries only
+    showing a year are left undecided.
+
+    Args:
+        release: The entry of the singles list.
+
+    Returns:
+        RELEASE_SINGLE, RELEASE_EP or RELEASE_UNKNOWN.
+
+    """
+    track_count = _get_track_count(release)
+    if track_count is not None:
+        return RELEASE_EP if track_count > 1 else RELEASE_SINGLE
+
+    release_type = str(release.get("type") or "").strip().lower()
+    if release_type == "single":
+        return RELEASE_SINGLE
+    if release_type in MULTI_TRACK_TYPES:
+        return RELEASE_EP
+    return RELEASE_UNKNOWN
+
+
+def _get_track_count(release: Dict[str, Any]) -> Optional[int]:
+    """Read the track count of a release entry, if it has one.
+
+    Args:
+        release: The entry of the singles list.
+
+    Returns:
+        The number of tracks, or None if unknown.
+
+    """
+    track_count = release.get("trackCount")
+    if track_count is None and isinstance(release.get("tracks"), list):
+        track_count = len(release["tracks"])
+    try:
+        return int(track_count) if track_count is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+class ClassifierStats:
+    """Album page fetches avoided and made while resolving singles."""
+
+    def __init__(self) -> None:
+        """Initialize empty statistics."""
+        self.avoided = 0
+        self.fetched = 0
+        self._lock = threading.Lock()
+
+    def count(self, avoided: int, fetched: int) -> None:
+        """Add the fetches of an artist.
+
+        Args:
+            avoided: The releases decided without fetching their album page.
+            fetched: The releases whose album page was fetched.
+
+        """
+        with self._lock:
+            self.avoided += avoided
+            self.fetched += fetched
+
+    def __repr__(self) -> str:
+        """Return a short summary of the statistics."""
+        return f"ClassifierStats(avoided={self.avoided}, fetched={self.fetched})"
+
+
+classifier_stats = ClassifierStats()
@@ -0,0 +1,53 @@
+"""Decide what to submit to MeTube for a song or playlist URL.
+
+A playlist whose songs are partially known, e.g. an album sharing most tracks
+with singles downloaded before, is cheaper to download as its missing songs
+than as a whole playlist that MeTube would download completely again.
+"""
+
+from typing import List, NamedTuple, Optional
+
+from src.database_connector import DatabaseConnector
+
+SUBMIT_URL = "url"
+SUBMIT_SONGS = "songs"
+SUBMIT_NOTHING = "nothing"
+
+
+class SubmissionPlan(NamedTuple):
+    """The URLs to submit to MeTube for a song or playlist URL."""
+
+    url: str
+    action: str
+    submit_urls: List[str]
+    song_urls: Optional[List[str]]
+
+
+def plan_submission(
+    db: DatabaseConnector, single_url: str, song_urls: Optional[List[str]]
+) -> SubmissionPlan:
+    """Choose the cheapest submission for a song or playlist URL.
+
+    Songs and playlists without songs are submitted as they are. Playlists
+    are submitted as a whole if none of their songs are known, as their
+    missing songs if some are known, and not at all if all are known.
+
+    Args:
+        db: The DatabaseConnector to look up known songs in.
+        single_url: The song or playlist URL.
+        song_urls: The song URLs of a playlist, None for a song URL.
+
+    Returns:
+        The submission plan.
+
+    """
+    if not song_urls:
+        return SubmissionPlan(single_url, SUBMIT_URL, [single_url], song_urls)
+
+    known = set(db.get_songs(song_urls))
+    missing = [url for url in dict.fromkeys(song_urls) if url not in known]
+    if not known:
+        return SubmissionPlan(single_url, SUBMIT_URL, [single_url], song_urls)
+    if not missing:
+        return SubmissionPlan(single_url, SUBMIT_NOTHING, [], song_urls)
+    return SubmissionPlan(single_url, SUBMIT_SONGS, missing, song_urls)
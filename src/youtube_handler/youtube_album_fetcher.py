@@ -1,10 +1,154 @@
 """Module to fetch album and song information from YouTube Music."""
 
-from typing import Dict, Any, List
+import hashlib
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Collection,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+import requests
+
+import src.logging_config  # noqa: F401
+
+from src.deadline import (
+    Deadline,
+    DeadlineExceeded,
+    call_with_deadline,
+    get_current_deadline,
+)
+from src.youtube_handler.metadata_cache import (
+    ENDPOINT_ALBUM,
+    ENDPOINT_ARTIST,
+    ENDPOINT_PLAYLIST,
+    get_metadata_cache,
+)
+from src.youtube_handler.release_classifier import (
+    RELEASE_EP,
+    RELEASE_SINGLE,
+    classifier_stats,
+    classify_release,
+)
+
+if TYPE_CHECKING:
+    from ytmusicapi import YTMusic
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+DEFAULT_TIMEOUT = 30.0
+
+_ytmusic: Optional["YTMusic"] = None
+_ytmusic_lock = threading.Lock()
+
+
+class DeadlineSession(requests.Session):
+    """HTTP session limiting the timeout of each request to the current deadline."""
+
+    def __init__(self, timeout: float = DEFAULT_TIMEOUT) -> None:
+        """Initialize the DeadlineSession.
 
-from ytmusicapi import YTMusic
+        Args:
+            timeout: The timeout of requests sent without a deadline.
+
+        """
+        super().__init__()
+        self.timeout = timeout
+
+    def request(
+        self,
+        method: Union[str, bytes],
+        url: Union[str, bytes],
+        *args: Any,
+        **kwargs: Any,
+    ) -> requests.Response:
+        """Send a request that times out when the current deadline passes.
+
+        Args:
+            method: The HTTP method.
+            url: The URL to request.
+            *args: Positional arguments of requests.Session.request.
+            **kwargs: Keyword arguments of requests.Session.request.
+
+        Returns:
+            The response.
+
+        """
+        timeout: Union[float, Tuple[float, float]] = (
+            kwargs.get("timeout") or self.timeout
+        )
+        deadline = get_current_deadline()
+        if deadline is not None:
+            timeout = (
+                deadline.timeouts(timeout)
+                if isinstance(timeout, tuple)
+                else deadline.timeout(timeout)
+            )
+        kwargs["timeout"] = timeout
+        return super().request(method, url, *args, **kwargs)
+
+
+def get_ytmusic() -> "YTMusic":
+    """Return the shared YouTube Music client, creating it on first use.
+
+    ytmusicapi is only imported here, so importing this module stays cheap
+    for processes that never talk to YouTube Music. The client sends its
+    requests through a DeadlineSession, so they honour the deadline of the
+    submission they belong to.
+
+    Returns:
+        The shared YTMusic instance.
+
+    """
+    global _ytmusic
+    with _ytmusic_lock:
+        if _ytmusic is None:
+            from ytmusicapi import YTMusic
+
+            _ytmusic = YTMusic(requests_session=DeadlineSession())
+        return _ytmusic
+
+
+def get_max_workers() -> int:
+    """Read the maximum number of concurrent YouTube Music requests.
+
+    Returns:
+        The number of worker threads resolving releases of an artist.
+
+    """
+    return max(1, int(os.environ.get("YTMUSIC_MAX_WORKERS", "8")))
+
+
+def set_ytmusic(client: Optional["YTMusic"]) -> None:
+    """Replace the shared YouTube Music client.
+
+    Args:
+        client: The client to use from now on, e.g. a mock in tests. None
+            creates a new client on the next use.
+
+    """
+    global _ytmusic
+    with _ytmusic_lock:
+        _ytmusic = client
 
-ytmusic = YTMusic()
+
+class ArtistReleases(NamedTuple):
+    """Releases of an artist found on YouTube Music."""
+
+    album_urls: List[str]
+    release_ids: List[str]
+    fingerprint: str
 
 
 class YoutubeAlbumFetcher:
@@ -26,6 +170,90 @@ class YoutubeAlbumFetcher:
         album_ids = YoutubeAlbumFetcher._get_albums(artist_details)
         return [YoutubeAlbumFetcher._get_album_url(id) for id in album_ids]
 
+    @staticmethod
+    def get_artist_releases(
+        artist_url: str,
+        known_fingerprint: Optional[str] = None,
+        known_release_ids: Collection[str] = (),
+        deadline: Optional[Deadline] = None,
+    ) -> ArtistReleases:
+        """Fetch the album URLs of releases that are not known yet.
+
+        Only the artist page is fetched if its release list still matches the
+        known fingerprint. Otherwise, only releases missing from the known
+        release IDs are resolved. Singles that could not be fetched are left
+        out of the returned IDs and fingerprint, so they are retried the next
+        time.
+
+        Args:
+            artist_url: The YouTube Music channel URL.
+            known_fingerprint: The fingerprint of the previously seen releases.
+            known_release_ids: The IDs of the previously seen releases.
+            deadline: The deadline of the submission, None for no limit.
+
+        Returns:
+            The album URLs of new releases, and the IDs and fingerprint of all
+                current releases.
+
+        Raises:
+            DeadlineExceeded: If the deadline passes while fetching.
+
+        """
+        artist_id = YoutubeAlbumFetcher._get_id_by_url(artist_url)
+        artist_details = YoutubeAlbumFetcher._get_artist_details(
+            artist_id, deadline=deadline
+        )
+        release_ids = YoutubeAlbumFetcher.get_release_ids(artist_details)
+        fingerprint = YoutubeAlbumFetcher.get_release_fingerprint(release_ids)
+        if fingerprint == known_fingerprint:
+            return ArtistReleases([], release_ids, fingerprint)
+
+        failed_ids: Set[str] = set()
+        album_ids = YoutubeAlbumFetcher._get_albums(
+            artist_details,
+            skip_ids=set(known_release_ids),
+            deadline=deadline,
+            failed_ids=failed_ids,
+        )
+        album_urls = [YoutubeAlbumFetcher._get_album_url(id) for id in album_ids]
+        if failed_ids:
+            release_ids = [id for id in release_ids if id not in failed_ids]
+            fingerprint = YoutubeAlbumFetcher.get_release_fingerprint(release_ids)
+        return ArtistReleases(album_urls, release_ids, fingerprint)
+
+    @staticmethod
+    def get_release_ids(artist_details: Dict[str, Any]) -> List[str]:
+        """Extract the IDs of all albums and singles from artist details.
+
+        Albums are identified by their playlist ID, singles by their browse ID.
+
+        Args:
+            artist_details: A dictionary containing artist details.
+
+        Returns:
+            A list of release IDs.
+
+        """
+        albums = (artist_details.get("albums") or {}).get("results", [])
+        singles = (artist_details.get("singles") or {}).get("results", [])
+        release_ids = [album.get("audioPlaylistId") for album in albums]
+        release_ids.extend(single.get("browseId") for single in singles)
+        return [release_id for release_id in release_ids if release_id]
+
+    @staticmethod
+    def get_release_fingerprint(release_ids: List[str]) -> str:
+        """Compute an order independent fingerprint of a release list.
+
+        Args:
+            release_ids: The IDs of the releases.
+
+        Returns:
+            The hex digest of the sorted release IDs.
+
+        """
+        joined = "\n".join(sorted(release_ids))
+        return hashlib.sha256(joined.encode("utf-8")).hexdigest()
+
     @staticmethod
     def _get_id_by_url(url: str) -> str:
         """Extract the YouTube Music artist ID from a channel URL.
@@ -58,12 +286,22 @@ class YoutubeAlbumFetcher:
         return r"https://music.youtube.com/playlist?list=" + playlist_id
 
     @staticmethod
-    def _get_albums(artist_details: dict, get_eps: bool = True) -> List[str]:
+    def _get_albums(
+        artist_details: dict,
+        get_eps: bool = True,
+        skip_ids: Collection[str] = (),
+        deadline: Optional[Deadline] = None,
+        failed_ids: Optional[Set[str]] = None,
+    ) -> List[str]:
         """Extract album IDs from artist details.
 
         Args:
             artist_details: A dictionary containing artist details.
             get_eps: Whether to include EPs in the album list.
+            skip_ids: Release IDs to leave out of the album list.
+            deadline: The deadline of the submission, None for no limit.
+            failed_ids: If given, the browse IDs of singles that could not be
+                fetched are added to it.
 
         Returns:
             A list of album IDs.
@@ -86,37 +324,88 @@ class YoutubeAlbumFetcher:
             id = album.get("audioPlaylistId")
             if not id:
                 raise ValueError(f"No album id found for: {album}")
-            album_ids.append(id)
+            if id not in skip_ids:
+                album_ids.append(id)
 
         if get_eps:
-            album_ids.extend(YoutubeAlbumFetcher.get_eps(artist_details))
+            album_ids.extend(
+                YoutubeAlbumFetcher.get_eps(
+                    artist_details,
+                    skip_ids=skip_ids,
+                    deadline=deadline,
+                    failed_ids=failed_ids,
+                )
+            )
 
         return album_ids
 
     @staticmethod
-    def _get_artist_details(artist_id: str) -> Dict[str, Any]:
+    def _get_artist_details(
+        artist_id: str, deadline: Optional[Deadline] = None
+    ) -> Dict[str, Any]:
         """Fetch artist details from YouTube Music by artist ID.
 
         Args:
             artist_id: The YouTube Music artist ID.
+            deadline: The deadline of the submission, None for no limit.
 
         Returns:
             A dictionary containing artist details.
         """
-        return ytmusic.get_artist(artist_id)
+        return get_metadata_cache().get(
+            ENDPOINT_ARTIST,
+            artist_id,
+            lambda: call_with_deadline(
+                deadline, "fetching the artist", get_ytmusic().get_artist, artist_id
+            ),
+        )
 
     @staticmethod
-    def get_album_songs(playlist_id: str) -> List[str]:
+    def _get_album_details(
+        browse_id: str, deadline: Optional[Deadline] = None
+    ) -> Dict[str, Any]:
+        """Fetch album details from YouTube Music by browse ID.
+
+        Args:
+            browse_id: The YouTube Music browse ID of the album.
+            deadline: The deadline of the submission, None for no limit.
+
+        Returns:
+            A dictionary containing album details.
+        """
+        return get_metadata_cache().get(
+            ENDPOINT_ALBUM,
+            browse_id,
+            lambda: call_with_deadline(
+                deadline, "fetching the EPs", get_ytmusic().get_album, browse_id
+            ),
+        )
+
+    @staticmethod
+    def get_album_songs(
+        playlist_id: str, deadline: Optional[Deadline] = None
+    ) -> List[str]:
         """Fetch song URLs from a YouTube Music playlist ID.
 
         Args:
             playlist_id: The YouTube Music playlist ID.
+            deadline: The deadline of the submission, None for no limit.
 
         Returns:
             A list of song URLs in the playlist.
 
         """
-        playlist = ytmusic.get_playlist(playlist_id, limit=None)
+        playlist = get_metadata_cache().get(
+            ENDPOINT_PLAYLIST,
+            playlist_id,
+            lambda: call_with_deadline(
+                deadline,
+                "fetching the album songs",
+                get_ytmusic().get_playlist,
+                playlist_id,
+                limit=None,
+            ),
+        )
         tracks = playlist.get("tracks", [])
 
         songs = []
@@ -131,30 +420,132 @@ class YoutubeAlbumFetcher:
         return songs
 
     @staticmethod
-    def get_eps(artist_details: Dict) -> List[str | Any]:
+    def get_eps(
+        artist_details: Dict,
+        skip_ids: Collection[str] = (),
+        deadline: Optional[Deadline] = None,
+        failed_ids: Optional[Set[str]] = None,
+    ) -> List[str | Any]:
         """Fetch EPs for a given artist ID from YouTube Music.
 
+        Singles labelled as such on the artist page are skipped, and EPs
+        whose playlist ID is known are taken as they are. Only the album
+        pages of the remaining releases are fetched.
+
         Args:
             artist_details: A dictionary containing artist details.
+            skip_ids: Browse IDs of singles that are already known and
+                do not need to be fetched.
+            deadline: The deadline of the submission, None for no limit.
+            failed_ids: If given, the browse IDs of singles that could not be
+                fetched are added to it.
 
         Returns:
-            A list of EP playlist IDs.
+            A list of EP playlist IDs, in the order of the singles.
+
+        Raises:
+            DeadlineExceeded: If the deadline passes while fetching.
 
         """
         releases = artist_details.get("singles", {}).get("results", [])
 
-        eps = []
-
+        candidates: List[Tuple[str, Optional[str]]] = []
+        avoided = 0
         for item in releases:
-            playlist_id = item.get("browseId")
-            if not playlist_id:
+            browse_id = item.get("browseId")
+            if not browse_id or browse_id in skip_ids:
                 continue
-            album_details = ytmusic.get_album(playlist_id)
-
-            track_count = len(album_details.get("tracks", []))
+            release_type = classify_release(item)
+            if release_type == RELEASE_SINGLE:
+                avoided += 1
+            elif release_type == RELEASE_EP and item.get("audioPlaylistId"):
+                avoided += 1
+                candidates.append((browse_id, item["audioPlaylistId"]))
+            else:
+                candidates.append((browse_id, None))
+
+        fetch_ids = [browse_id for browse_id, known in candidates if known is None]
+        classifier_stats.count(avoided, len(fetch_ids))
+        if avoided:
+            logger.info(
+                f"Classified {avoided} singles without fetching, "
+                f"fetching {len(fetch_ids)}"
+            )
+        details = YoutubeAlbumFetcher._get_singles_details(fetch_ids, deadline)
 
-            if track_count <= 1:
-                continue
-            eps.append(album_details.get("audioPlaylistId"))
+        eps = []
+        for browse_id, playlist_id in candidates:
+            if playlist_id is None:
+                album_details = details.get(browse_id)
+                if not album_details:
+                    if failed_ids is not None:
+                        failed_ids.add(browse_id)
+                    continue
+                track_count = len(album_details.get("tracks", []))
+
+                if track_count <= 1:
+                    continue
+                playlist_id = album_details.get("audioPlaylistId")
+            eps.append(playlist_id)
 
         return eps
+
+    @staticmethod
+    def _get_singles_details(
+        browse_ids: List[str], deadline: Optional[Deadline] = None
+    ) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Fetch the details of several singles concurrently.
+
+        Args:
+            browse_ids: The YouTube Music browse IDs of the singles.
+            deadline: The deadline of the submission, None for no limit.
+
+        Returns:
+            The album details by browse ID, None for singles that could not
+                be fetched.
+
+        Raises:
+            DeadlineExceeded: If the deadline passes while fetching.
+
+        """
+        if not browse_ids:
+            return {}
+        with ThreadPoolExecutor(
+            max_workers=min(get_max_workers(), len(browse_ids)),
+            thread_name_prefix="ytmusic",
+        ) as executor:
+            details = executor.map(
+                lambda browse_id: YoutubeAlbumFetcher._get_single_details(
+                    browse_id, deadline
+                ),
+                browse_ids,
+            )
+            return dict(zip(browse_ids, details))
+
+    @staticmethod
+    def _get_single_details(
+        browse_id: str, deadline: Optional[Deadline] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Fetch the details of a single, logging instead of raising errors.
+
+        A single that cannot be fetched is left out, so it does not stop the
+        other releases of the artist from being resolved.
+
+        Args:
+            browse_id: The YouTube Music browse ID of the single.
+            deadline: The deadline of the submission, None for no limit.
+
+        Returns:
+            A dictionary containing album details, or None on errors.
+
+        Raises:
+            DeadlineExceeded: If the deadline passes while fetching.
+
+        """
+        try:
+            return YoutubeAlbumFetcher._get_album_details(browse_id, deadline=deadline)
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            logger.warning(f"Could not fetch single {browse_id}: {e}")
+            return None
@@ -1,11 +1,13 @@
 """Handler for downloading music from YouTube."""
 
+import asyncio
 import logging
 from typing import Optional
 
 import src.logging_config  # noqa: F401
 
 from src.database_connector import DatabaseConnector
+from src.deadline import Deadline, DeadlineExceeded
 from src.download_handler_base import DownloadHandlerBase
 from src.youtube_handler.me_tube_connector import MeTubeConnector
 from src.youtube_handler.youtube_album_fetcher import YoutubeAlbumFetcher
@@ -24,7 +26,7 @@ class YoutubeDownloadHandler(DownloadHandlerBase):
             db_connector: An instance of DatabaseConnector for database operations.
 
         """
-        self.mt_connector = MeTubeConnector()
+        self.mt_connector = MeTubeConnector(db_connector=db_connector)
         self.db_connector = db_connector
 
     def download(
@@ -44,32 +46,53 @@ class YoutubeDownloadHandler(DownloadHandlerBase):
             download_format: The desired download_format for the download.
                 Default is "mp3".
             quality: The desired quality for the download. Default is "Best".
-            **kwargs: Additional keyword arguments.
+            **kwargs: Additional keyword arguments, e.g. add_without_download
+                and the deadline of the submission.
 
         Raises:
             ValueError: If the URL format is unsupported.
+            DeadlineExceeded: If the deadline passes before everything was
+                queued. The work done so far is committed, submitting the URL
+                again resumes with the rest.
 
         """
         add_without_download = kwargs.get("add_without_download", False)
-
-        if "channel" in url:
-            self._handle_channel_url(
-                url,
-                auto_download,
-                quality=quality,
-                download_format=download_format,
-            )
-        elif "playlist" in url or "watch?v=" in url:
-            self.mt_connector.queue_download(
-                url,
-                quality=quality,
-                download_format=download_format,
-                add_without_download=add_without_download,
+        deadline: Optional[Deadline] = kwargs.get("deadline")
+        exceeded = None
+
+        with self.db_connector.track_queries() as stats:
+            with self.db_connector.transaction():
+                try:
+                    if "channel" in url:
+                        self._handle_channel_url(
+                            url,
+                            auto_download,
+                            quality=quality,
+                            download_format=download_format,
+                            deadline=deadline,
+                        )
+                    elif "playlist" in url or "watch?v=" in url:
+                        self.mt_connector.queue_download(
+                            url,
+                            quality=quality,
+                            download_format=download_format,
+                            add_without_download=add_without_download,
+                            deadline=deadline,
+                        )
+                    else:
+                        error = f"Unsupported YouTube URL format: {url}"
+                        logger.error(error)
+                        raise ValueError(error)
+                except DeadlineExceeded as e:
+                    # keep the partial result, the transaction commits it
+                    exceeded = e
+            logger.info(f"Database usage for {url}: {stats}")
+
+        if exceeded is not None:
+            logger.warning(
+                f"{exceeded} for {url}, {len(exceeded.pending)} URLs are pending"
             )
-        else:
-            error = f"Unsupported YouTube URL format: {url}"
-            logger.error(error)
-            raise ValueError(error)
+            raise exceeded
 
     def _handle_channel_url(
         self,
@@ -78,45 +101,80 @@ class YoutubeDownloadHandler(DownloadHandlerBase):
         quality: str,
         download_format: str,
         add_without_download: bool = False,
+        deadline: Optional[Deadline] = None,
     ) -> None:
         """Handle adding a YouTube channel URL to the database.
 
+            The albums are submitted to MeTube concurrently and recorded with
+            their songs once MeTube accepted them. All database work runs in
+            one transaction, the artist is committed before the albums are
+            submitted.
+
         Args:
             channel_url: The YouTube channel URL.
             auto_download: Whether to mark the artist for auto-download.
             add_without_download: If True, will add albums to the database
                 without queuing downloads. Default is False.
+            deadline: The deadline of the submission, None for no limit.
+
+        Raises:
+            DeadlineExceeded: If the deadline passes before all albums were
+                queued. The artist catalog is not saved, so the next
+                auto-download run picks up the pending albums. The same
+                applies to albums MeTube did not accept and to albums that
+                only reached the outbox.
 
         """
-        album_urls = YoutubeAlbumFetcher.get_album_ids(channel_url)
-        self.db_connector.add_artist(channel_url, auto_download=auto_download)
-        for album_url in album_urls:
+        releases = YoutubeAlbumFetcher.get_artist_releases(
+            channel_url, deadline=deadline
+        )
+        with self.db_connector.transaction():
+            self.db_connector.add_artist(channel_url, auto_download=auto_download)
+            self.db_connector.commit()
             try:
-                self.mt_connector.queue_download(
-                    album_url,
-                    quality=quality,
-                    download_format=download_format,
-                    add_without_download=add_without_download,
+                queued = asyncio.run(
+                    self.mt_connector.queue_download_async(
+                        releases.album_urls,
+                        quality=quality,
+                        download_format=download_format,
+                        add_without_download=add_without_download,
+                        deadline=deadline,
+                    )
                 )
-
+            except DeadlineExceeded:
+                raise
             except Exception as e:
                 raise RuntimeError(
-                    f"Error queuing download for album {album_url}: {e}"
+                    f"Error queuing downloads for artist {channel_url}: {e}"
                 ) from e
 
-            database_album_id = self.db_connector.add_album(album_url)
-            logger.info(
-                f"Added album {album_url} with ID {database_album_id} "
-                f"for artist {channel_url}"
-            )
-
-            songs = YoutubeAlbumFetcher.get_album_songs(album_url.split("list=")[1])
-            for song_url in songs:
-                database_song_id = self.db_connector.add_song(song_url)
+            failed = []
+            outboxed = []
+            for result in queued:
+                if result.failed:
+                    logger.warning(f"MeTube did not accept album {result.url}")
+                    failed.append(result.url)
+                elif result.outboxed:
+                    logger.info(f"Added album {result.url} to the MeTube outbox")
+                    outboxed.append(result.url)
+                else:
+                    logger.info(f"Added album {result.url} for artist {channel_url}")
+
+            if failed:
+                logger.warning(
+                    f"Not saving the catalog of artist {channel_url}, MeTube did "
+                    f"not accept {len(failed)} albums."
+                )
+                return
+            if outboxed:
                 logger.info(
-                    f"Added song {song_url} with ID {database_song_id} "
-                    f"for album {album_url}"
+                    f"Not saving the catalog of artist {channel_url} until the "
+                    f"outbox delivered {len(outboxed)} albums."
                 )
+                return
+            self.db_connector.save_artist_catalog(
+                channel_url, releases.fingerprint, releases.release_ids
+            )
 
     def get_warning(self, url: str) -> Optional[str]:
         """Get a warning message for the given URL, if applicable.
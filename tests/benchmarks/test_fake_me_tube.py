@@ -0,0 +1,123 @@
+import time
+from unittest.mock import patch
+
+import pytest
+import requests
+
+from benchmarks.fake_me_tube import FakeMeTube
+from benchmarks.me_tube_benchmark import main, run_benchmark
+
+SONG = {"url": "https://music.youtube.com/watch?v=abc", "quality": "Best"}
+
+
+@pytest.fixture
+def fake():
+    with FakeMeTube(seed=1) as server:
+        yield server
+
+
+def test_add_and_history(fake):
+    response = requests.post(f"{fake.base_url}/add", json=SONG, timeout=5)
+
+    assert response.status_code == 200
+    assert requests.get(f"{fake.base_url}/history", timeout=5).json() == {
+        "queue": [],
+        "pending": [],
+        "done": [{**SONG, "status": "finished"}],
+    }
+    assert fake.accepted == fake.requests == 1
+
+
+def test_downloads_take_time(fake):
+    fake.download_seconds = 60
+
+    fake.add(SONG)
+    fake.add(SONG)
+
+    assert len(fake.history()["queue"]) == 2
+
+
+def test_error_injection(fake):
+    fake.error_rate = 1.0
+
+    response = requests.post(f"{fake.base_url}/add", json=SONG, timeout=5)
+
+    assert response.status_code == 500
+    assert fake.rejected == 1
+
+
+def test_queue_limit(fake):
+    fake.download_seconds = 60
+    fake.queue_limit = 1
+
+    assert fake.add(SONG)[0] == 200
+    assert fake.add(SONG)[0] == 503
+
+
+def test_download_error_injection(fake):
+    fake.download_error_rate = 1.0
+
+    fake.add(SONG)
+
+    assert fake.history()["done"][0]["status"] == "error"
+
+
+def test_latency(fake):
+    fake.latency = 0.05
+
+    start = time.perf_counter()
+    fake.history()
+
+    assert time.perf_counter() - start >= 0.05
+
+
+def test_unknown_path(fake):
+    assert requests.get(f"{fake.base_url}/missing", timeout=5).status_code == 404
+
+
+@pytest.mark.parametrize("mode", ["sync", "async", "channel"])
+def test_run_benchmark(fake, mode):
+    result = run_benchmark([fake], mode, albums=3, songs_per_album=2)
+
+    assert result.accepted == 3
+    assert result.requests == 3
+    assert result.statements > 0
+
+
+def test_run_benchmark_balances_backends():
+    with FakeMeTube() as first, FakeMeTube() as second:
+        result = run_benchmark(
+            [first, second],
+            "async",
+            albums=6,
+            env={"ME_TUBE_HEALTH_CHECK_SECONDS": "0"},
+        )
+
+    assert result.accepted == 6
+    assert first.accepted > 0 and second.accepted > 0
+
+
+def test_run_benchmark_with_failures(fake):
+    fake.error_rate = 1.0
+
+    result = run_benchmark([fake], "async", albums=2, env={"ME_TUBE_RETRIES": "0"})
+
+    assert result.accepted == 0
+    assert result.requests == 2
+
+
+def test_run_benchmark_rejects_unknown_mode(fake):
+    with pytest.raises(ValueError):
+        run_benchmark([fake], "batch", albums=1)
+
+
+@patch("benchmarks.me_tube_benchmark.run_benchmark")
+def test_main(mock_run, capsys):
+    mock_run.return_value.per_second = 1.0
+    mock_run.return_value.seconds = 1.0
+
+    main(["--mode", "sync", "--albums", "5", "--backends", "2", "--latency", "0"])
+
+    servers, mode, albums = mock_run.call_args.args[:3]
+    assert len(servers) == 2 and mode == "sync" and albums == 5
+    assert capsys.readouterr().out
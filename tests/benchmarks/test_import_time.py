@@ -0,0 +1,26 @@
+import os
+
+import pytest
+
+from benchmarks.import_time import main, measure_import
+
+IMPORT_BUDGET_SECONDS = float(os.environ.get("IMPORT_BUDGET_SECONDS", "5"))
+
+
+@pytest.mark.parametrize("module", ["src.__main__", "src.auto_download_artists"])
+def test_import_stays_within_budget(module):
+    result = measure_import(module)
+
+    assert result.seconds < IMPORT_BUDGET_SECONDS
+    assert "ytmusicapi" not in result.modules
+
+
+def test_measure_import_failure():
+    with pytest.raises(RuntimeError, match="src.missing"):
+        measure_import("src.missing")
+
+
+def test_main(capsys):
+    main(["src.deadline"])
+
+    assert capsys.readouterr().out.startswith("src.deadline: ")
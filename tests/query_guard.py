@@ -0,0 +1,33 @@
+"""Test helper asserting upper bounds on the database usage of an operation."""
+
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from src.query_stats import QueryStats, track_queries
+
+
+@contextmanager
+def assert_max_queries(
+    statements: int, round_trips: Optional[int] = None
+) -> Iterator[QueryStats]:
+    """Fail if the block executes more statements or round trips than allowed.
+
+    Args:
+        statements: The maximum number of SQL statements.
+        round_trips: The maximum number of round trips, including commits.
+
+    Returns:
+        A context manager yielding the recorded statistics.
+
+    """
+    with track_queries() as stats:
+        yield stats
+
+    executed = "\n".join(stats.queries)
+    assert (
+        stats.statements <= statements
+    ), f"Expected at most {statements} statements, got {stats}:\n{executed}"
+    if round_trips is not None:
+        assert (
+            stats.round_trips <= round_trips
+        ), f"Expected at most {round_trips} round trips, got {stats}:\n{executed}"
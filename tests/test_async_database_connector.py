@@ -0,0 +1,200 @@
+import asyncio
+from unittest.mock import patch
+
+import pytest
+import sqlalchemy as sa
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.async_database_connector import (
+    AsyncDatabaseConnector,
+    dispose_async_engines,
+)
+from src.database_connector import (
+    DOWNLOAD_DONE,
+    DOWNLOAD_QUEUED,
+    Album,
+    Base,
+    Song,
+    dispose_engines,
+)
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'music.db'}")
+
+    async def _create_tables():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    asyncio.run(_create_tables())
+    with patch.object(AsyncDatabaseConnector, "_get_engine", return_value=engine):
+        yield AsyncDatabaseConnector()
+
+    asyncio.run(engine.dispose())
+
+
+def test_add_and_get_song(db):
+    async def _run():
+        song_id = await db.add_song("https://youtube.com/watch?v=abc")
+
+        assert song_id is not None
+        assert await db.get_song("https://music.youtube.com/watch?v=abc") == song_id
+        assert await db.add_song("https://youtube.com/watch?v=abc") == song_id
+        assert await db.get_song("https://youtube.com/watch?v=def") is None
+
+    asyncio.run(_run())
+
+
+def test_add_songs(db):
+    async def _run():
+        await db.add_song("https://youtube.com/watch?v=abc")
+        new_ids = await db.add_songs(
+            [
+                "https://youtube.com/watch?v=abc",
+                "https://youtube.com/watch?v=def",
+                "https://youtube.com/watch?v=ghi",
+            ]
+        )
+
+        assert len(new_ids) == 2
+        assert await db.get_song("https://youtube.com/watch?v=ghi") == new_ids[1]
+
+    asyncio.run(_run())
+
+
+def test_add_songs_without_returning(db):
+    url = "https://youtube.com/watch?v=abc"
+    inserted = []
+
+    def insert_concurrently(conn, cursor, statement, parameters, context, many):
+        if statement.startswith("SAVEPOINT") and not inserted:
+            inserted.append(url)
+            cursor.execute(
+                "INSERT INTO song (url, video_id, download_state, download_attempts) "
+                "VALUES (?, 'abc', 'done', 0)",
+                (url,),
+            )
+
+    sa.event.listen(db.engine.sync_engine, "before_cursor_execute", insert_concurrently)
+
+    async def _run():
+        with patch(
+            "src.async_database_connector.returns_inserted_rows", return_value=False
+        ):
+            new_ids = await db.add_songs([url, "https://youtube.com/watch?v=def"])
+
+        assert inserted
+        assert new_ids == [await db.get_song("https://youtube.com/watch?v=def")]
+        assert await db.get_song(url) is not None
+
+    asyncio.run(_run())
+
+
+def test_add_songs_download_state(db):
+    async def _run():
+        await db.add_songs(["https://youtube.com/watch?v=abc"])
+        await db.add_songs(
+            [
+                "https://youtube.com/watch?v=abc",
+                "https://youtube.com/watch?v=def",
+            ],
+            download_state=DOWNLOAD_QUEUED,
+        )
+
+        async with db.engine.connect() as conn:
+            result = await conn.execute(select(Song.video_id, Song.download_state))
+            states = dict(result.tuples().all())
+        assert states == {"abc": DOWNLOAD_DONE, "def": DOWNLOAD_QUEUED}
+
+    asyncio.run(_run())
+
+
+def test_add_song_download_state(db):
+    async def _run():
+        await db.add_song("https://youtube.com/watch?v=abc", DOWNLOAD_QUEUED)
+        await db.add_album("https://youtube.com/playlist?list=PL1", DOWNLOAD_QUEUED)
+
+        async with db.engine.connect() as conn:
+            songs = await conn.execute(select(Song.download_state))
+            albums = await conn.execute(select(Album.download_state))
+            assert songs.scalars().all() == [DOWNLOAD_QUEUED]
+            assert albums.scalars().all() == [DOWNLOAD_QUEUED]
+
+    asyncio.run(_run())
+
+
+def test_add_and_remove_album(db):
+    async def _run():
+        url = "https://music.youtube.com/playlist?list=PL1"
+        album_id = await db.add_album(url)
+
+        assert await db.get_album(url) == album_id
+        await db.remove_album(url)
+        assert await db.get_album(url) is None
+
+    asyncio.run(_run())
+
+
+@pytest.mark.parametrize(
+    "initial_auto_download,update_auto_download,expected_auto_download",
+    [(True, False, True), (False, True, True), (False, False, False)],
+)
+def test_add_artist(
+    db, initial_auto_download, update_auto_download, expected_auto_download
+):
+    async def _run():
+        url = "https://music.youtube.com/channel/UC1"
+        await db.add_artist(url, auto_download=initial_auto_download)
+        await db.add_artist(url, auto_download=update_auto_download)
+
+        artist = await db.get_artist(url)
+        assert artist.auto_download == expected_auto_download
+        assert await db.get_artist_id(url) == artist.id
+        assert (url in await db.get_auto_download_artists()) == expected_auto_download
+
+    asyncio.run(_run())
+
+
+@pytest.mark.parametrize(
+    "driver,async_driver",
+    [(None, "mysql+aiomysql"), ("sqlite", "sqlite+aiosqlite"), ("custom", "custom")],
+)
+@patch("src.async_database_connector.get_shared_async_engine")
+def test_get_engine(mock_get_shared_async_engine, driver, async_driver):
+    mock_env = {
+        "DB_USER": "User1",
+        "DB_PASSWORD": "Pass1",
+        "DB_HOST": "Url1",
+        "DB_PORT": "Port1",
+        "DB_DATABASE": "Db1",
+    }
+    if driver:
+        mock_env["DB_DRIVER"] = driver
+
+    with patch.dict("os.environ", mock_env, clear=True):
+        AsyncDatabaseConnector._get_engine()
+
+    mock_get_shared_async_engine.assert_called_once_with(
+        f"{async_driver}://User1:Pass1@Url1:Port1/Db1"
+    )
+
+
+def test_sqlite_mode(tmp_path):
+    path = tmp_path / "music.db"
+    dispose_engines()
+    with patch.dict("os.environ", {"DB_SQLITE_PATH": str(path)}, clear=True):
+        db = AsyncDatabaseConnector()
+
+    async def _run():
+        assert str(db.engine.url) == f"sqlite+aiosqlite:///{path}"
+        song_id = await db.add_song("https://youtube.com/watch?v=abc")
+        assert await db.get_song("https://youtube.com/watch?v=abc") == song_id
+        async with db.engine.connect() as conn:
+            result = await conn.exec_driver_sql("PRAGMA journal_mode")
+            assert result.scalar() == "wal"
+        await dispose_async_engines()
+
+    asyncio.run(_run())
+    dispose_engines()
@@ -0,0 +1,101 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from src.auto_download_artists import _download_new_releases
+from src.database_connector import ArtistCatalogEntry
+from src.youtube_handler.me_tube_connector import QueuedDownload
+from src.youtube_handler.youtube_album_fetcher import ArtistReleases
+
+ARTIST_URL = "https://music.youtube.com/channel/UC1"
+
+
+@patch("src.auto_download_artists.YoutubeAlbumFetcher")
+def test_download_new_releases_unchanged(mock_fetcher):
+    """Test that an artist with an unchanged release list is skipped."""
+    db = MagicMock()
+    mt = MagicMock()
+    db.get_artist_catalog.return_value = ArtistCatalogEntry("FP", ["A"], None)
+    mock_fetcher.get_artist_releases.return_value = ArtistReleases([], ["A"], "FP")
+
+    _download_new_releases(db, mt, ARTIST_URL)
+
+    mock_fetcher.get_artist_releases.assert_called_once_with(
+        ARTIST_URL, known_fingerprint="FP", known_release_ids=["A"]
+    )
+    db.touch_artist_catalog.assert_called_once_with(ARTIST_URL)
+    assert not mt.queue_download_async.called
+    assert not db.save_artist_catalog.called
+
+
+@patch("src.auto_download_artists.YoutubeAlbumFetcher")
+def test_download_new_releases_changed(mock_fetcher):
+    """Test that new releases are queued and the catalog is updated."""
+    db = MagicMock()
+    mt = MagicMock()
+    mt.queue_download_async = AsyncMock()
+    db.get_artist_catalog.return_value = None
+    album_urls = ["https://music.youtube.com/playlist?list=B"]
+    mock_fetcher.get_artist_releases.return_value = ArtistReleases(
+        album_urls, ["A", "B"], "FP2"
+    )
+
+    _download_new_releases(db, mt, ARTIST_URL)
+
+    mock_fetcher.get_artist_releases.assert_called_once_with(
+        ARTIST_URL, known_fingerprint=None, known_release_ids=()
+    )
+    mt.queue_download_async.assert_awaited_once_with(album_urls)
+    db.save_artist_catalog.assert_called_once_with(ARTIST_URL, "FP2", ["A", "B"])
+
+
+@patch("src.auto_download_artists.YoutubeAlbumFetcher")
+def test_download_new_releases_rejected(mock_fetcher):
+    """Test that the catalog is not updated if MeTube rejected a release."""
+    db = MagicMock()
+    mt = MagicMock()
+    album_urls = [
+        "https://music.youtube.com/playlist?list=B",
+        "https://music.youtube.com/playlist?list=C",
+    ]
+    mt.queue_download_async = AsyncMock(
+        return_value=[
+            QueuedDownload(album_urls[0], None, None),
+            QueuedDownload(album_urls[1], None, None, failed=True),
+        ]
+    )
+    db.get_artist_catalog.return_value = ArtistCatalogEntry("FP", ["A"], None)
+    mock_fetcher.get_artist_releases.return_value = ArtistReleases(
+        album_urls, ["A", "B", "C"], "FP2"
+    )
+
+    _download_new_releases(db, mt, ARTIST_URL)
+
+    mt.queue_download_async.assert_awaited_once_with(album_urls)
+    assert not db.save_artist_catalog.called
+    assert not db.touch_artist_catalog.called
+
+
+@patch("src.auto_download_artists.YoutubeAlbumFetcher")
+def test_download_new_releases_outboxed(mock_fetcher):
+    """Test that the catalog is not updated while a release waits in the outbox."""
+    db = MagicMock()
+    mt = MagicMock()
+    album_urls = [
+        "https://music.youtube.com/playlist?list=B",
+        "https://music.youtube.com/playlist?list=C",
+    ]
+    mt.queue_download_async = AsyncMock(
+        return_value=[
+            QueuedDownload(album_urls[0], None, None),
+            QueuedDownload(album_urls[1], None, None, outboxed=True),
+        ]
+    )
+    db.get_artist_catalog.return_value = ArtistCatalogEntry("FP", ["A"], None)
+    mock_fetcher.get_artist_releases.return_value = ArtistReleases(
+        album_urls, ["A", "B", "C"], "FP2"
+    )
+
+    _download_new_releases(db, mt, ARTIST_URL)
+
+    mt.queue_download_async.assert_awaited_once_with(album_urls)
+    assert not db.save_artist_catalog.called
+    assert not db.touch_artist_catalog.called
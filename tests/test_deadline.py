@@ -0,0 +1,78 @@
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.deadline import (
+    Deadline,
+    DeadlineExceeded,
+    call_with_deadline,
+    get_current_deadline,
+)
+
+
+def test_deadline_remaining_and_expired():
+    deadline = Deadline(60)
+
+    assert not deadline.expired
+    assert 0 < deadline.remaining() <= 60
+    assert deadline.timeout(5) == 5
+    assert deadline.timeouts((5, 90)) == (5, pytest.approx(60, abs=1))
+
+
+def test_expired_deadline_check_raises_with_pending():
+    deadline = Deadline(0)
+
+    with pytest.raises(DeadlineExceeded) as exc_info:
+        deadline.check("queuing downloads", ["a", "b"])
+
+    assert deadline.expired
+    assert exc_info.value.stage == "queuing downloads"
+    assert exc_info.value.pending == ["a", "b"]
+    assert deadline.timeout(5) > 0
+
+
+@pytest.mark.parametrize("value, expected", [(None, 120.0), ("30", 30.0), ("0", None)])
+def test_deadline_from_env(monkeypatch, value, expected):
+    if value is None:
+        monkeypatch.delenv("SUBMISSION_DEADLINE_SECONDS", raising=False)
+    else:
+        monkeypatch.setenv("SUBMISSION_DEADLINE_SECONDS", value)
+
+    deadline = Deadline.from_env()
+
+    assert (deadline.seconds if deadline else None) == expected
+
+
+def test_call_returns_result_and_raises_errors():
+    deadline = Deadline(60)
+
+    assert deadline.call("adding", lambda a, b=0: a + b, 1, b=2) == 3
+    with pytest.raises(TimeoutError):
+        deadline.call("reading", MagicMock(side_effect=TimeoutError("socket")))
+
+
+def test_call_sets_the_current_deadline():
+    deadline = Deadline(60)
+
+    assert deadline.call("fetching", get_current_deadline) is deadline
+    assert get_current_deadline() is None
+
+
+def test_call_reports_errors_after_the_deadline_as_exceeded():
+    deadline = Deadline(0.05)
+
+    def read():
+        time.sleep(0.1)
+        raise TimeoutError("read timed out")
+
+    with pytest.raises(DeadlineExceeded, match="fetching the artist"):
+        deadline.call("fetching the artist", read)
+
+
+def test_call_with_deadline_without_deadline_calls_directly():
+    func = MagicMock(return_value="artist")
+
+    assert call_with_deadline(None, "fetching", func, "UC1") == "artist"
+
+    func.assert_called_once_with("UC1")
@@ -0,0 +1,75 @@
+import fcntl
+
+import pytest
+
+from src.known_id_index import KnownIdIndex, hash_key
+
+
+def test_empty_index(tmp_path):
+    index = KnownIdIndex(str(tmp_path / "known_ids"))
+
+    assert not index.exists
+    assert not index.contains("song", "abc")
+    assert len(index) == 0
+
+
+def test_rebuild_and_contains(tmp_path):
+    index = KnownIdIndex(str(tmp_path / "known_ids"))
+    index.rebuild([("song", f"video{i}") for i in range(1000)] + [("album", "PL1")])
+
+    assert index.exists
+    assert len(index) == 1001
+    assert all(index.contains("song", f"video{i}") for i in range(1000))
+    assert index.contains("album", "PL1")
+    assert not index.contains("song", "PL1")
+    assert not index.contains("song", "video1000")
+
+
+def test_add_is_visible_to_other_instances(tmp_path):
+    path = str(tmp_path / "known_ids")
+    writer = KnownIdIndex(path)
+    writer.rebuild([("song", "abc")])
+    reader = KnownIdIndex(path)
+
+    writer.add("song", ["def"])
+
+    assert reader.contains("song", "def")
+    assert reader.contains("song", "abc")
+
+
+def test_rebuild_keeps_keys_added_meanwhile(tmp_path):
+    path = str(tmp_path / "known_ids")
+    index = KnownIdIndex(path)
+    other = KnownIdIndex(path)
+    other.add("song", ["before"])
+
+    def items():
+        with open(index.lock_path, "a") as lock_file:
+            with pytest.raises(BlockingIOError):
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        yield "song", "abc"
+
+    index.rebuild(items())
+    other.add("song", ["after"])
+
+    assert all(index.contains("song", key) for key in ("abc", "before", "after"))
+    assert all(other.contains("song", key) for key in ("abc", "before", "after"))
+
+
+def test_compact_merges_delta(tmp_path):
+    path = str(tmp_path / "known_ids")
+    writer = KnownIdIndex(path)
+    reader = KnownIdIndex(path)
+    writer.add("album", ["PL1", "PL2"])
+
+    writer.compact()
+
+    assert (tmp_path / "known_ids.delta").stat().st_size == 0
+    assert reader.contains("album", "PL1")
+    assert reader.contains("album", "PL2")
+    assert len(reader) == 2
+
+
+def test_hash_key_is_namespaced():
+    assert hash_key("song", "abc") != hash_key("album", "abc")
+    assert 0 <= hash_key("song", "abc") < 2**64
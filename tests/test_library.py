@@ -0,0 +1,134 @@
+import gzip
+from datetime import datetime
+import json
+import pytest
+import sqlalchemy as sa
+from unittest.mock import patch
+
+from src.database_connector import Base, DatabaseConnector, Song
+from src.library import export_library, import_library, main
+
+
+def make_db():
+    with patch.object(DatabaseConnector, "_get_engine") as mocked_engine:
+        engine = sa.create_engine("sqlite:///:memory:")
+        mocked_engine.return_value = engine
+        connector = DatabaseConnector()
+    Base.metadata.create_all(engine)
+    return connector
+
+
+@pytest.fixture
+def source():
+    db = make_db()
+    db.add_artist("https://music.youtube.com/channel/UC1", auto_download=True)
+    db.add_albums([f"https://music.youtube.com/playlist?list=PL{i}" for i in range(3)])
+    db.add_songs([f"https://music.youtube.com/watch?v=v{i}" for i in range(7)])
+    yield db
+    db.engine.dispose()
+
+
+@pytest.fixture
+def target():
+    db = make_db()
+    yield db
+    db.engine.dispose()
+
+
+def test_export_writes_one_line_per_row(source, tmp_path):
+    path = tmp_path / "library.ndjson.gz"
+
+    counts = export_library(source, str(path), chunk_size=2)
+
+    assert counts == {"artist": 1, "album": 3, "song": 7}
+    with gzip.open(path, "rt") as file:
+        records = [json.loads(line) for line in file]
+    assert len(records) == 11
+    assert records[0] == {
+        "table": "artist",
+        "url": "https://music.youtube.com/channel/UC1",
+        "channel_id": "UC1",
+        "auto_download": True,
+    }
+    assert all("id" not in record for record in records)
+
+
+def test_import_roundtrip(source, target, tmp_path):
+    path = tmp_path / "library.ndjson.gz"
+    export_library(source, str(path))
+
+    counts = import_library(target, str(path), chunk_size=3)
+
+    assert counts == {"artist": 1, "album": 3, "song": 7}
+    assert target.get_auto_download_artists() == [
+        "https://music.youtube.com/channel/UC1"
+    ]
+    assert target.get_album("https://music.youtube.com/playlist?list=PL2")
+    assert target.get_song("https://music.youtube.com/watch?v=v6")
+
+
+def test_import_skips_present_rows(source, tmp_path):
+    path = tmp_path / "library.ndjson.gz"
+    export_library(source, str(path))
+
+    import_library(source, str(path))
+
+    assert len(list(source.iter_rows(Song))) == 7
+
+
+def test_import_derives_missing_keys(target, tmp_path):
+    path = tmp_path / "library.ndjson.gz"
+    with gzip.open(path, "wt") as file:
+        file.write(json.dumps({"table": "song", "url": "https://youtu.be/abc"}) + "\n")
+
+    import_library(target, str(path))
+
+    assert list(target.iter_rows(Song)) == [
+        {
+            "url": "https://youtu.be/abc",
+            "video_id": "abc",
+            "download_state": "done",
+            "download_attempts": 0,
+            "next_retry_at": None,
+        }
+    ]
+
+
+def test_import_parses_datetimes(target, tmp_path):
+    path = tmp_path / "library.ndjson.gz"
+    record = {
+        "table": "song",
+        "url": "https://youtu.be/abc",
+        "download_state": "failed",
+        "download_attempts": 2,
+        "next_retry_at": "2024-01-02 03:04:05",
+    }
+    with gzip.open(path, "wt") as file:
+        file.write(json.dumps(record) + "\n")
+
+    import_library(target, str(path))
+
+    (row,) = target.iter_rows(Song)
+    assert row["next_retry_at"] == datetime(2024, 1, 2, 3, 4, 5)
+    assert row["download_state"] == "failed"
+
+
+def test_import_rejects_unknown_table(target, tmp_path):
+    path = tmp_path / "library.ndjson.gz"
+    with gzip.open(path, "wt") as file:
+        file.write(json.dumps({"table": "user", "url": "x"}) + "\n")
+
+    with pytest.raises(ValueError):
+        import_library(target, str(path))
+
+
+@patch("src.library.dispose_engines")
+@patch("src.library.export_library")
+@patch("src.library.DatabaseConnector")
+def test_main_export(mock_db, mock_export, mock_dispose):
+    mock_export.return_value = {"artist": 0, "album": 0, "song": 0}
+
+    main(["export", "out.ndjson.gz", "--chunk-size", "1000"])
+
+    mock_export.assert_called_once_with(mock_db.return_value, "out.ndjson.gz", 1000)
+    mock_dispose.assert_called_once()
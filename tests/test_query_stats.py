@@ -0,0 +1,40 @@
+import sqlalchemy as sa
+
+from src.query_stats import instrument_engine, track_queries
+
+
+def test_track_queries():
+    engine = sa.create_engine("sqlite:///:memory:")
+    instrument_engine(engine)
+    instrument_engine(engine)
+
+    with engine.connect() as conn:
+        conn.exec_driver_sql("SELECT 1")
+        with track_queries() as outer:
+            conn.exec_driver_sql("SELECT 2")
+            with track_queries() as inner:
+                conn.exec_driver_sql("SELECT 3")
+                conn.commit()
+
+    assert outer.statements == 2
+    assert outer.round_trips == 3
+    assert outer.queries == ["SELECT 2", "SELECT 3"]
+    assert inner.statements == 1
+    assert inner.round_trips == 2
+    assert outer.total_time >= inner.total_time > 0
+    engine.dispose()
+
+
+def test_track_queries_counts_executemany():
+    engine = sa.create_engine("sqlite:///:memory:")
+    instrument_engine(engine)
+    metadata = sa.MetaData()
+    table = sa.Table("t", metadata, sa.Column("x", sa.Integer))
+    metadata.create_all(engine)
+
+    with engine.connect() as conn, track_queries() as stats:
+        conn.execute(sa.insert(table), [{"x": 1}, {"x": 2}, {"x": 3}])
+
+    assert stats.statements == 3
+    assert stats.round_trips == 1
+    engine.dispose()
@@ -0,0 +1,172 @@
+import pytest
+import sqlalchemy as sa
+from unittest.mock import MagicMock, patch
+
+from src.database_connector import Album, Base, DatabaseConnector, Song
+from src.reconcile_downloads import (
+    get_history_states,
+    get_retry_delay,
+    main,
+    reconcile_downloads,
+)
+
+SONG_URL = "https://music.youtube.com/watch?v=abc"
+ALBUM_URL = "https://music.youtube.com/playlist?list=PL1"
+
+
+@pytest.fixture
+def db():
+    with patch.object(DatabaseConnector, "_get_engine") as mocked_engine:
+        engine = sa.create_engine("sqlite:///:memory:")
+        mocked_engine.return_value = engine
+        connector = DatabaseConnector()
+    Base.metadata.create_all(engine)
+    yield connector
+    engine.dispose()
+
+
+def make_history(done=(), queue=()):
+    return {"done": list(done), "queue": list(queue), "pending": []}
+
+
+def get_states(db, model):
+    return {row["url"]: row["download_state"] for row in db.iter_rows(model)}
+
+
+def test_get_history_states():
+    history = make_history(
+        done=[
+            {"url": SONG_URL, "status": "error", "quality": "128", "format": "m4a"},
+            {"url": ALBUM_URL, "status": "finished"},
+            {"url": "https://example.com/other", "status": "finished"},
+        ],
+        queue=[{"url": SONG_URL}],
+    )
+
+    states = get_history_states(history)
+
+    assert states[Song]["abc"].download_state == "queued"
+    assert states[Album]["PL1"].download_state == "done"
+    assert states[Album]["PL1"].quality == "Best"
+    assert len(states[Song]) == len(states[Album]) == 1
+
+
+@patch.dict("os.environ", {"DOWNLOAD_RETRY_SECONDS": "60"})
+def test_get_retry_delay():
+    assert get_retry_delay(1) == 60
+    assert get_retry_delay(3) == 240
+    assert get_retry_delay(30) == 86400
+
+
+def test_reconcile_marks_finished_downloads_done(db):
+    db.add_albums([ALBUM_URL], download_state="queued")
+    mt = MagicMock()
+    mt.get_history.return_value = make_history(
+        done=[{"url": ALBUM_URL, "status": "finished"}]
+    )
+
+    counts = reconcile_downloads(db, mt)
+
+    assert counts == {"done": 1, "failed": 0, "retried": 0}
+    assert get_states(db, Album) == {ALBUM_URL: "done"}
+
+
+@patch("src.reconcile_downloads.get_retry_delay", return_value=0)
+def test_reconcile_retries_failed_downloads(mock_delay, db):
+    db.add_songs([SONG_URL], download_state="queued")
+    mt = MagicMock()
+    mt.get_history.return_value = make_history(
+        done=[{"url": SONG_URL, "status": "error", "quality": "128", "format": "m4a"}]
+    )
+    mt.resubmit.return_value = True
+
+    counts = reconcile_downloads(db, mt)
+
+    assert counts == {"done": 0, "failed": 1, "retried": 1}
+    mt.resubmit.assert_called_once_with(SONG_URL, "128", "m4a")
+    assert get_states(db, Song) == {SONG_URL: "queued"}
+
+
+@patch("src.reconcile_downloads.get_retry_delay", return_value=0)
+def test_reconcile_keeps_rejected_retries_failed(mock_delay, db):
+    db.add_songs([SONG_URL], download_state="queued")
+    mt = MagicMock()
+    mt.get_history.return_value = make_history(
+        done=[{"url": SONG_URL, "status": "error"}]
+    )
+    mt.resubmit.return_value = False
+
+    counts = reconcile_downloads(db, mt)
+
+    assert counts["retried"] == 0
+    assert get_states(db, Song) == {SONG_URL: "failed"}
+
+
+def test_reconcile_waits_for_backoff(db):
+    db.add_songs([SONG_URL], download_state="queued")
+    mt = MagicMock()
+    mt.get_history.return_value = make_history(
+        done=[{"url": SONG_URL, "status": "error"}]
+    )
+
+    reconcile_downloads(db, mt)
+
+    assert not mt.resubmit.called
+    assert get_states(db, Song) == {SONG_URL: "failed"}
+
+
+@patch("src.reconcile_downloads.YoutubeAlbumFetcher")
+def test_reconcile_completes_albums_from_their_songs(mock_fetcher, db):
+    other_album = "https://music.youtube.com/playlist?list=PL2"
+    other_song = "https://music.youtube.com/watch?v=def"
+    db.add_albums([ALBUM_URL, other_album], download_state="queued")
+    db.add_songs([SONG_URL, other_song], download_state="queued")
+    mock_fetcher.get_album_songs.side_effect = lambda playlist_id: {
+        "PL1": [SONG_URL],
+        "PL2": [SONG_URL, other_song],
+    }[playlist_id]
+    mt = MagicMock()
+    mt.get_history.return_value = make_history(
+        done=[{"url": SONG_URL, "status": "finished"}]
+    )
+
+    counts = reconcile_downloads(db, mt)
+
+    assert counts == {"done": 2, "failed": 0, "retried": 0}
+    assert get_states(db, Album) == {ALBUM_URL: "done", other_album: "queued"}
+
+
+@patch("src.reconcile_downloads.YoutubeAlbumFetcher")
+def test_reconcile_keeps_albums_queued_if_songs_unknown(mock_fetcher, db):
+    db.add_albums([ALBUM_URL], download_state="queued")
+    mock_fetcher.get_album_songs.side_effect = Exception("unavailable")
+    mt = MagicMock()
+    mt.get_history.return_value = make_history()
+
+    counts = reconcile_downloads(db, mt)
+
+    assert counts["done"] == 0
+    assert get_states(db, Album) == {ALBUM_URL: "queued"}
+
+
+def test_reconcile_raises_without_history(db):
+    mt = MagicMock()
+    mt.get_history.return_value = None
+
+    with pytest.raises(RuntimeError):
+        reconcile_downloads(db, mt)
+
+
+@patch("src.reconcile_downloads.close_sessions")
+@patch("src.reconcile_downloads.dispose_engines")
+@patch("src.reconcile_downloads.reconcile_downloads")
+@patch("src.reconcile_downloads.MeTubeConnector")
+@patch("src.reconcile_downloads.DatabaseConnector")
+def test_main(mock_db, mock_mt, mock_reconcile, mock_dispose, mock_close):
+    mock_reconcile.return_value = {"done": 0, "failed": 0, "retried": 0}
+
+    main()
+
+    mock_reconcile.assert_called_once_with(mock_db.return_value, mock_mt.return_value)
+    mock_dispose.assert_called_once()
+    mock_close.assert_called_once()
@@ -0,0 +1,55 @@
+import pytest
+
+from src.url_keys import (
+    album_key,
+    artist_key,
+    get_channel_id,
+    get_playlist_id,
+    get_video_id,
+    song_key,
+)
+
+
+@pytest.mark.parametrize(
+    "url,expected",
+    [
+        ("https://music.youtube.com/watch?v=abc&list=OLAK5uy_1", "abc"),
+        ("https://www.youtube.com/watch?v=abc", "abc"),
+        ("https://youtu.be/abc", "abc"),
+        ("https://music.youtube.com/playlist?list=OLAK5uy_1", None),
+    ],
+)
+def test_get_video_id(url, expected):
+    assert get_video_id(url) == expected
+
+
+def test_get_playlist_id():
+    url = "https://music.youtube.com/playlist?list=OLAK5uy_1"
+
+    assert get_playlist_id(url) == "OLAK5uy_1"
+    assert get_playlist_id("https://youtube.com/watch?v=abc") is None
+
+
+def test_get_channel_id():
+    url = "https://music.youtube.com/channel/UC123/releases?x=1"
+
+    assert get_channel_id(url) == "UC123"
+    assert get_channel_id("https://youtube.com/watch?v=abc") is None
+
+
+def test_keys_normalize_hosts():
+    assert song_key("https://youtube.com/watch?v=abc") == song_key(
+        "https://music.youtube.com/watch?v=abc&list=OLAK5uy_1"
+    )
+    assert album_key("https://youtube.com/playlist?list=PL1") == album_key(
+        "https://music.youtube.com/playlist?list=PL1"
+    )
+    assert artist_key("https://youtube.com/channel/UC1") == "UC1"
+
+
+def test_keys_fall_back_to_short_hash():
+    key = song_key("https://example.com/song/1")
+
+    assert len(key) == 40
+    assert key == song_key("https://example.com/song/1")
+    assert key != song_key("https://example.com/song/2")
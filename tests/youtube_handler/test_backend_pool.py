@@ -0,0 +1,109 @@
+from unittest.mock import patch
+
+from src.youtube_handler.backend_pool import (
+    MeTubeBackendPool,
+    get_base_urls,
+    get_shared_backend_pool,
+    reset_backend_pools,
+)
+
+URLS = ["http://metube-1", "http://metube-2"]
+
+
+def make_pool(max_failures=2, eject_seconds=60):
+    return MeTubeBackendPool(URLS, max_failures, eject_seconds, 30)
+
+
+def test_get_base_urls():
+    assert get_base_urls("http://a/, http://b,") == ["http://a", "http://b"]
+
+
+def test_acquire_prefers_least_loaded():
+    pool = make_pool()
+    pool.update_health({URLS[0]: 5, URLS[1]: 1})
+
+    assert pool.acquire() == URLS[1]
+    assert pool.acquire() == URLS[1]
+    assert pool.acquire() == URLS[1]
+    assert pool.acquire() == URLS[1]
+    assert pool.acquire() == URLS[0]
+
+
+def test_acquire_counts_in_flight_submissions():
+    pool = make_pool()
+
+    first = pool.acquire()
+    second = pool.acquire()
+    pool.release(first, healthy=True)
+
+    assert first != second
+    assert pool.acquire() == first
+
+
+def test_route_key_sticks_to_backend():
+    pool = make_pool()
+
+    backend = pool.acquire("album-1")
+    pool.acquire("album-2")
+    pool.acquire("album-2")
+
+    assert pool.acquire("album-1") == backend
+
+
+def test_failing_backend_is_ejected():
+    pool = make_pool(max_failures=2)
+    backend = pool.acquire("album-1")
+    pool.release(backend, healthy=False)
+    backend = pool.acquire("album-1")
+    pool.release(backend, healthy=False)
+
+    other = next(url for url in URLS if url != backend)
+    assert pool.acquire("album-1") == other
+    assert pool.acquire() == other
+
+
+@patch("src.youtube_handler.backend_pool.time.monotonic")
+def test_ejected_backend_returns_after_timeout(mock_monotonic):
+    mock_monotonic.return_value = 100.0
+    pool = make_pool(max_failures=1, eject_seconds=60)
+    pool.update_health({URLS[0]: None, URLS[1]: 3})
+
+    assert pool.acquire() == URLS[1]
+
+    mock_monotonic.return_value = 161.0
+    assert pool.acquire() == URLS[0]
+
+
+def test_all_ejected_uses_least_loaded():
+    pool = make_pool(max_failures=1)
+    pool.update_health({URLS[0]: None, URLS[1]: None})
+
+    assert pool.acquire() in URLS
+
+
+def test_single_backend_is_never_checked_or_ejected():
+    pool = MeTubeBackendPool(URLS[:1], 1, 60, 0)
+    pool.release(pool.acquire(), healthy=False)
+
+    assert not pool.needs_health_check()
+    assert pool.backends[0].ejected_until == 0.0
+
+
+def test_health_check_interval():
+    pool = make_pool()
+
+    assert pool.needs_health_check()
+    pool.update_health({URLS[0]: 0, URLS[1]: 0})
+    assert not pool.needs_health_check()
+
+
+def test_shared_backend_pool():
+    reset_backend_pools()
+    with patch.dict("os.environ", {"ME_TUBE_MAX_FAILURES": "5"}):
+        pool = get_shared_backend_pool(URLS)
+
+    assert get_shared_backend_pool(list(URLS)) is pool
+    assert pool.max_failures == 5
+    reset_backend_pools()
+    assert get_shared_backend_pool(URLS) is not pool
+    reset_backend_pools()
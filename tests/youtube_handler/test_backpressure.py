@@ -0,0 +1,98 @@
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from src.deadline import Deadline, DeadlineExceeded
+from src.youtube_handler.backpressure import (
+    QueueBackpressure,
+    get_shared_backpressure,
+    reset_backpressures,
+)
+
+
+def test_disabled_never_reads_depth():
+    backpressure = QueueBackpressure(0, 0, 5)
+    depths = []
+
+    backpressure.admit(lambda: depths.append(1))
+
+    assert not backpressure.enabled
+    assert depths == []
+
+
+@patch("src.youtube_handler.backpressure.time.sleep")
+def test_admit_below_high_water_counts_submissions(mock_sleep):
+    backpressure = QueueBackpressure(high_water=3, low_water=1, poll_interval=60)
+    reads = iter([1])
+
+    backpressure.admit(lambda: next(reads))
+    backpressure.admit(lambda: next(reads))
+
+    assert backpressure._depth == 3
+    assert not mock_sleep.called
+
+
+@patch("src.youtube_handler.backpressure.time.sleep")
+def test_admit_pauses_until_low_water(mock_sleep):
+    backpressure = QueueBackpressure(high_water=3, low_water=1, poll_interval=60)
+    reads = iter([3, 2, 1])
+
+    backpressure.admit(lambda: next(reads))
+
+    assert mock_sleep.call_count == 2
+    assert backpressure._depth == 2
+
+
+@patch("src.youtube_handler.backpressure.time.sleep")
+def test_unknown_depth_does_not_block(mock_sleep):
+    backpressure = QueueBackpressure(high_water=3, low_water=1, poll_interval=0)
+
+    backpressure.admit(lambda: None)
+
+    assert not mock_sleep.called
+
+
+@patch("src.youtube_handler.backpressure.asyncio.sleep")
+def test_admit_async_pauses_until_low_water(mock_sleep):
+    backpressure = QueueBackpressure(high_water=2, low_water=0, poll_interval=60)
+    reads = iter([5, 1, 0])
+
+    async def get_depth():
+        return next(reads)
+
+    asyncio.run(backpressure.admit_async(get_depth))
+
+    assert mock_sleep.await_count == 2
+    assert backpressure._depth == 1
+
+
+def test_shared_backpressure_from_environment():
+    reset_backpressures()
+    with patch.dict("os.environ", {"ME_TUBE_HIGH_WATER_MARK": "100"}):
+        backpressure = get_shared_backpressure("http://metube")
+
+    assert get_shared_backpressure("http://metube") is backpressure
+    assert (backpressure.high_water, backpressure.low_water) == (100, 50)
+    reset_backpressures()
+
+
+@patch("src.youtube_handler.backpressure.time.sleep")
+def test_admit_stops_waiting_at_the_deadline(mock_sleep):
+    backpressure = QueueBackpressure(high_water=3, low_water=1, poll_interval=60)
+    deadline = Deadline(0)
+
+    with pytest.raises(DeadlineExceeded):
+        backpressure.admit(lambda: 5, deadline)
+
+    assert not mock_sleep.called
+
+
+@patch("src.youtube_handler.backpressure.time.sleep")
+def test_admit_waits_no_longer_than_the_deadline(mock_sleep):
+    backpressure = QueueBackpressure(high_water=3, low_water=1, poll_interval=60)
+    reads = iter([3, 1])
+
+    backpressure.admit(lambda: next(reads), Deadline(10))
+
+    assert mock_sleep.call_args.args[0] <= 10
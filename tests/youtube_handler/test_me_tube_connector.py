@@ -1,16 +1,31 @@
+import asyncio
 import json
 from unittest.mock import patch, MagicMock
 
+import httpx
 import pytest
-
-from src.youtube_handler.me_tube_connector import MeTubeConnector
+import requests
+
+from src.database_connector import OutboxEntry
+from src.deadline import Deadline, DeadlineExceeded
+from src.youtube_handler.backend_pool import reset_backend_pools
+from src.youtube_handler.me_tube_connector import (
+    MeTubeConnector,
+    QueuedDownload,
+    close_sessions,
+    get_shared_session,
+)
 
 
-def dummy_download_url(single_url, quality, download_format, add_without_download):
+def dummy_download_url(
+    single_url, quality, download_format, add_without_download, deadline=None
+):
     return f"Queued {single_url} with quality {quality} and format {download_format}"
 
 
-def dummy_add_to_me_tube(single_url, quality, download_format):
+def dummy_add_to_me_tube(
+    single_url, quality, download_format, route_key=None, deadline=None
+):
     return f"Queued {single_url} with quality {quality} and format {download_format}"
 
 
@@ -177,8 +192,10 @@ def test_download_url_playlist(
         url, quality="High", download_format="mp4", add_without_download=False
     )
 
-    for index, song_url in enumerate(song_urls):
-        assert mock_db_instance.add_song.call_args_list[index][0][0] == song_url
+    mock_db_instance.add_songs.assert_called_once_with(
+        song_urls, download_state="queued"
+    )
+    assert not mock_db_instance.add_song.called
 
     assert response == f"Queued {url} with quality High and format mp4"
 
@@ -298,14 +315,13 @@ def test_download_url_playlist_no_listequals(
     assert mock_db_instance.get_album.called
     assert not mock_db_instance.add_album.called
     assert not mock_db_instance.add_song.called
-
-    assert mock_add_to_me_tube.call_args[0][0] == url
-    assert mock_add_to_me_tube.call_args[0][1] == "High"
-    assert mock_add_to_me_tube.call_args[0][2] == "mp4"
+    assert not mock_db_instance.add_songs.called
+    # the songs are enumerated before submitting, so nothing is sent
+    assert not mock_add_to_me_tube.called
 
 
 @patch("src.youtube_handler.me_tube_connector.DatabaseConnector")
-@patch("src.youtube_handler.me_tube_connector.requests.post")
+@patch("src.youtube_handler.me_tube_connector.requests.Session.post")
 def test_add_to_me_tube(mock_post, mock_db_connector):
     """Test the _add_to_me_tube method."""
     mock_response = MagicMock()
@@ -335,11 +351,12 @@ def test_add_to_me_tube(mock_post, mock_db_connector):
         f"{base_url}/add",
         data=expected_data,
         headers={"Content-Type": "application/json"},
+        timeout=(5.0, 30.0),
     )
 
 
 @patch("src.youtube_handler.me_tube_connector.DatabaseConnector")
-@patch("src.youtube_handler.me_tube_connector.requests.post")
+@patch("src.youtube_handler.me_tube_connector.requests.Session.post")
 def test_add_to_me_tube_failure(mock_post, mock_db_connector):
     """Test that _add_to_me_tube handles non-200 responses."""
     mock_response = MagicMock()
@@ -369,4 +386,512 @@ def test_add_to_me_tube_failure(mock_post, mock_db_connector):
         f"{base_url}/add",
         data=expected_data,
         headers={"Content-Type": "application/json"},
+        timeout=(5.0, 30.0),
+    )
+
+
+@patch("src.youtube_handler.me_tube_connector.DatabaseConnector")
+@patch(
+    "src.youtube_handler.me_tube_connector.requests.Session.post",
+    side_effect=requests.ConnectionError("refused"),
+)
+def test_add_to_me_tube_connection_error(mock_post, mock_db_connector):
+    """Test that _add_to_me_tube returns None if MeTube is unreachable."""
+    mt = MeTubeConnector(base_url="https://example.com/api")
+
+    assert mt._add_to_me_tube("https://example.com/watch?v=v", "Best", "mp3") is None
+
+
+@patch("src.youtube_handler.me_tube_connector.DatabaseConnector")
+def test_session_shared_between_connectors(mock_db_connector):
+    """Test that connectors reuse one session and its retry configuration."""
+    mock_env = {"ME_TUBE_RETRIES": "2", "ME_TUBE_READ_TIMEOUT": "10"}
+    close_sessions()
+    with patch.dict("os.environ", mock_env):
+        first = MeTubeConnector(base_url="https://example.com/api")
+
+        session = get_shared_session(first.base_url)
+        assert session is get_shared_session("https://example.com/api")
+        assert first.timeout == (5.0, 10.0)
+
+    retry = session.get_adapter("https://example.com/api/add").max_retries
+    assert retry.total == 2
+    assert retry.read == 0
+    assert retry.is_retry("GET", 502)
+    assert retry.is_retry("POST", 503)
+    # MeTube may have queued a submission a gateway answered with 502 or 504
+    assert not retry.is_retry("POST", 502)
+    assert not retry.is_retry("POST", 504)
+
+    close_sessions()
+    assert get_shared_session("https://example.com/api") is not session
+    close_sessions()
+
+
+@patch("src.youtube_handler.youtube_album_fetcher.YoutubeAlbumFetcher.get_album_songs")
+@patch("src.youtube_handler.me_tube_connector.DatabaseConnector")
+def test_queue_download_async(mock_db_connector, mock_get_album_songs):
+    """Test concurrent submissions keep input order and respect the limit."""
+    mock_db_instance = MagicMock()
+    mock_db_instance.get_album.side_effect = lambda url: 1 if "known" in url else None
+    mock_db_connector.return_value = mock_db_instance
+    mock_get_album_songs.side_effect = lambda album_id, deadline: [f"song-{album_id}"]
+
+    running = 0
+    max_running = 0
+
+    async def add_to_me_tube_async(
+        client, single_url, quality, download_format, route_key=None, deadline=None
+    ):
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        await asyncio.sleep(0.01 if single_url.endswith("1") else 0)
+        running -= 1
+        return f"Queued {single_url}"
+
+    urls = [f"https://example.com/playlist?list=PL{i}" for i in range(5)]
+    urls.insert(2, "https://example.com/playlist?list=known")
+
+    mt = MeTubeConnector(base_url="https://example.com/api")
+    with (
+        patch.dict("os.environ", {"ME_TUBE_MAX_CONCURRENCY": "2"}),
+        patch.object(mt, "_add_to_me_tube_async", side_effect=add_to_me_tube_async),
+    ):
+        results = asyncio.run(mt.queue_download_async(urls))
+
+    assert [result.url for result in results] == urls
+    assert results[0] == QueuedDownload(urls[0], f"Queued {urls[0]}", ["song-PL0"])
+    assert results[2] == QueuedDownload(urls[2], None, None)
+    assert max_running == 2
+    assert [c.args[0] for c in mock_db_instance.add_album.call_args_list] == [
+        url for url in urls if "known" not in url
+    ]
+
+
+@patch("src.youtube_handler.me_tube_connector.asyncio.sleep")
+@patch("src.youtube_handler.me_tube_connector.DatabaseConnector")
+def test_add_to_me_tube_async_retries(mock_db_connector, mock_sleep):
+    """Test that unavailable gateways are retried and other errors are not."""
+    statuses = iter([503, 503, 200])
+    requests_sent = []
+
+    def handler(request):
+        requests_sent.append(json.loads(request.content))
+        return httpx.Response(next(statuses), text="ok")
+
+    async def add():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await mt._add_to_me_tube_async(
+                client, "https://example.com/watch?v=v", "Best", "mp3"
+            )
+
+    mt = MeTubeConnector(base_url="https://example.com/api")
+    response = asyncio.run(add())
+
+    assert response.status_code == 200
+    assert len(requests_sent) == 3
+    assert requests_sent[0] == {
+        "url": "https://example.com/watch?v=v",
+        "quality": "Best",
+        "format": "mp3",
+    }
+    assert [c.args[0] for c in mock_sleep.call_args_list] == [0.5, 1.0]
+
+    for status in (500, 502, 504):
+        requests_sent.clear()
+        statuses = iter([status])
+        assert asyncio.run(add()) is None
+        assert len(requests_sent) == 1
+
+
+@patch("src.youtube_handler.me_tube_connector.MeTubeConnector._add_to_me_tube")
+@patch("src.youtube_handler.me_tube_connector.DatabaseConnector")
+def test_download_url_not_recorded_on_failure(mock_db_connector, mock_add_to_me_tube):
+    """Test that a URL MeTube did not accept is not recorded as downloaded."""
+    mock_db_instance = MagicMock()
+    mock_db_instance.get_song.return_value = None
+    mock_db_connector.return_value = mock_db_instance
+    mock_add_to_me_tube.return_value = None
+
+    mt = MeTubeConnector(base_url="https://example.com/api")
+    response = mt._download_url(
+        "https://example.com/watch?v=video1",
+        quality="High",
+        download_format="mp4",
+        add_without_download=False,
     )
+
+    assert response is None
+    assert not mock_db_instance.add_song.called
+
+
+@patch("src.youtube_handler.me_tube_connector.MeTubeConnector._add_to_me_tube")
+@patch("src.youtube_handler.me_tube_connector.DatabaseConnector")
+def test_download_url_outbox(mock_db_connector, mock_add_to_me_tube):
+    """Test that with the outbox enabled URLs are only written to the outbox."""
+    mock_db_instance = MagicMock()
+    mock_db_instance.get_song.return_value = None
+    mock_db_connector.return_value = mock_db_instance
+    url = "https://example.com/watch?v=video1"
+
+    mt = MeTubeConnector(base_url="https://example.com/api")
+    with patch.dict("os.environ", {"ME_TUBE_OUTBOX": "true"}):
+        mt.queue_download(url, quality="High", download_format="mp4")
+        results = asyncio.run(mt.queue_download_async([url]))
+
+    mock_db_instance.enqueue_outbox.assert_any_call(url, "High", "mp4")
+    mock_db_instance.enqueue_outbox.assert_called_with(url, "Best", "mp3")
+    assert results == [QueuedDownload(url, None, None, outboxed=True)]
+    assert not mock_add_to_me_tube.called
+    assert not mock_db_instance.add_song.called
+
+
+@patch("src.youtube_handler.youtube_album_fetcher.YoutubeAlbumFetcher.get_album_songs")
+@patch("src.youtube_handler.me_tube_connector.MeTubeConnector._add_to_me_tube")
+@patch("src.youtube_handler.me_tube_connector.DatabaseConnector")
+def test_deliver(mock_db_connector, mock_add_to_me_tube, mock_get_album_songs):
+    """Test delivering an outbox entry records it only once MeTube accepted it."""
+    mock_db_instance = MagicMock()
+    mock_db_instance.get_album.return_value = None
+    mock_db_connector.return_value = mock_db_instance
+    mock_get_album_songs.return_value = ["https://example.com/watch?v=song1"]
+    url = "https://example.com/playlist?list=PL1"
+    entry = OutboxEntry(1, url, "Best", "mp3", 0)
+
+    mt = MeTubeConnector(base_url="https://example.com/api")
+    mock_add_to_me_tube.return_value = None
+    with pytest.raises(RuntimeError):
+        mt.deliver(entry)
+    assert not mock_db_instance.add_album.called
+
+    mock_add_to_me_tube.return_value = "ok"
+    mt.deliver(entry)
+    mock_db_instance.add_album.assert_called_once_with(url, download_state="queued")
+    mock_db_instance.add_songs.assert_called_once_with(
+        ["https://example.com/watch?v=song1"], download_state="queued"
+    )
+
+    mock_db_instance.get_album.return_value = 1
+    mt.deliver(entry)
+    assert mock_add_to_me_tube.call_count == 2
+
+
+@patch("src.youtube_handler.me_tube_connector.DatabaseConnector")
+@patch("src.youtube_handler.me_tube_connector.requests.Session.get")
+def test_get_queue_depth(mock_get, mock_db_connector):
+    """Test that the queue depth counts queued and pending downloads."""
+    mock_get.return_value.json.return_value = {
+        "queue": [{"url": "a"}, {"url": "b"}],
+        "pending": [{"url": "c"}],
+        "done": [{"url": "d"}],
+    }
+
+    mt = MeTubeConnector(base_url="https://example.com/api")
+
+    assert mt.get_queue_depth() == 3
+    assert mock_get.call_args[0][0] == "https://example.com/api/history"
+
+    mock_get.side_effect = requests.ConnectionError("refused")
+    assert mt.get_queue_depth() is None
+
+
+@patch("src.youtube_handler.me_tube_connector.DatabaseConnector")
+@patch("src.youtube_handler.me_tube_connector.requests.Session.post")
+def test_add_to_me_tube_waits_for_capacity(mock_post, mock_db_connector):
+    """Test that submissions pass through the backpressure of the instance."""
+    mock_post.return_value.status_code = 200
+
+    mt = MeTubeConnector(base_url="https://example.com/api")
+    with patch(
+        "src.youtube_handler.me_tube_connector.get_shared_backpressure"
+    ) as mock_backpressure:
+        mt._add_to_me_tube("https://example.com/watch?v=v", "Best", "mp3")
+
+    mock_backpressure.assert_called_once_with("https://example.com/api")
+    mock_backpressure.return_value.admit.assert_called_once()
+    assert mock_post.called
+
+
+@patch("src.youtube_handler.youtube_album_fetcher.YoutubeAlbumFetcher.get_album_songs")
+@patch(
+    "src.youtube_handler.me_tube_connector.MeTubeConnector._add_to_me_tube",
+    side_effect=dummy_add_to_me_tube,
+)
+@patch("src.youtube_handler.me_tube_connector.DatabaseConnector")
+def test_download_url_submits_missing_songs(
+    mock_db_connector, mock_add_to_me_tube, mock_get_album_songs
+):
+    """Test that a playlist sharing songs with the database is split up."""
+    song_urls = [f"https://example.com/watch?v=song{i}" for i in range(3)]
+    mock_db_instance = MagicMock()
+    mock_db_instance.get_album.return_value = None
+    mock_db_instance.get_songs.return_value = song_urls[:2]
+    mock_db_connector.return_value = mock_db_instance
+    mock_get_album_songs.return_value = song_urls
+    url = "https://example.com/playlist?list=PL1"
+
+    mt = MeTubeConnector(base_url="https://example.com/api")
+    mt._download_url(url, "Best", "mp3", add_without_download=False)
+
+    mock_add_to_me_tube.assert_called_once_with(
+        song_urls[2], "Best", "mp3", route_key=url, deadline=None
+    )
+    mock_db_instance.add_album.assert_called_once_with(url, download_state="done")
+    mock_db_instance.add_songs.assert_called_once_with(
+        song_urls, download_state="queued"
+    )
+
+
+@patch("src.youtube_handler.youtube_album_fetcher.YoutubeAlbumFetcher.get_album_songs")
+@patch("src.youtube_handler.me_tube_connector.MeTubeConnector._add_to_me_tube")
+@patch("src.youtube_handler.me_tube_connector.DatabaseConnector")
+def test_deliver_records_accepted_songs(
+    mock_db_connector, mock_add_to_me_tube, mock_get_album_songs
+):
+    """Test that a partly failed delivery keeps the accepted songs."""
+    song_urls = [f"https://example.com/watch?v=song{i}" for i in range(3)]
+    mock_db_instance = MagicMock()
+    mock_db_instance.get_album.return_value = None
+    mock_db_instance.get_songs.return_value = song_urls[:1]
+    mock_db_connector.return_value = mock_db_instance
+    mock_get_album_songs.return_value = song_urls
+    mock_add_to_me_tube.side_effect = ["ok", None]
+    entry = OutboxEntry(1, "https://example.com/playlist?list=PL1", "Best", "mp3", 0)
+
+    mt = MeTubeConnector(base_url="https://example.com/api")
+    with pytest.raises(RuntimeError):
+        mt.deliver(entry)
+
+    mock_db_instance.add_songs.assert_called_once_with(
+        song_urls[1:2], download_state="queued"
+    )
+    assert not mock_db_instance.add_album.called
+
+
+@patch("src.youtube_handler.youtube_album_fetcher.YoutubeAlbumFetcher.get_album_songs")
+@patch("src.youtube_handler.me_tube_connector.DatabaseConnector")
+def test_queue_download_async_skips_known_songs(
+    mock_db_connector, mock_get_album_songs
+):
+    """Test that playlists with only known songs are not submitted."""
+    song_urls = ["https://example.com/watch?v=song1"]
+    mock_db_instance = MagicMock()
+    mock_db_instance.get_album.return_value = None
+    mock_db_instance.get_songs.return_value = song_urls
+    mock_db_connector.return_value = mock_db_instance
+    mock_get_album_songs.return_value = song_urls
+    url = "https://example.com/playlist?list=PL1"
+
+    mt = MeTubeConnector(base_url="https://example.com/api")
+    with patch.object(mt, "_add_to_me_tube_async") as mock_add:
+        results = asyncio.run(mt.queue_download_async([url]))
+
+    assert not mock_add.called
+    assert results == [QueuedDownload(url, None, song_urls)]
+    mock_db_instance.add_album.assert_called_once_with(url, download_state="done")
+
+
+@patch("src.youtube_handler.me_tube_connector.DatabaseConnector")
+@patch("src.youtube_handler.me_tube_connector.requests.Session.get")
+@patch("src.youtube_handler.me_tube_connector.requests.Session.post")
+def test_add_to_me_tube_balances_backends(mock_post, mock_get, mock_db_connector):
+    """Test that submissions go to the least loaded of several instances."""
+    reset_backend_pools()
+    depths = {"http://metube-1": 4, "http://metube-2": 0}
+    mock_get.side_effect = lambda url, timeout: MagicMock(
+        json=MagicMock(return_value={"queue": [{}] * depths[url.rsplit("/", 1)[0]]})
+    )
+    mock_post.return_value.status_code = 200
+
+    mt = MeTubeConnector(base_url="http://metube-1, http://metube-2")
+    for i in range(3):
+        mt._add_to_me_tube(f"https://example.com/watch?v={i}", "Best", "mp3")
+
+    posted = [c.args[0] for c in mock_post.call_args_list]
+    assert posted == ["http://metube-2/add"] * 3
+    assert mt.base_urls == ["http://metube-1", "http://metube-2"]
+    reset_backend_pools()
+
+
+@patch("src.youtube_handler.me_tube_connector.DatabaseConnector")
+@patch("src.youtube_handler.me_tube_connector.requests.Session.get")
+@patch("src.youtube_handler.me_tube_connector.requests.Session.post")
+def test_add_to_me_tube_fails_over(mock_post, mock_get, mock_db_connector):
+    """Test that an unreachable instance is ejected from the rotation."""
+    reset_backend_pools()
+    mock_get.return_value.json.return_value = {}
+
+    def post(url, **kwargs):
+        if url.startswith("http://metube-1"):
+            raise requests.ConnectionError("refused")
+        return MagicMock(status_code=200)
+
+    mock_post.side_effect = post
+
+    mt = MeTubeConnector(base_url="http://metube-1,http://metube-2")
+    with patch.dict("os.environ", {"ME_TUBE_MAX_FAILURES": "1"}):
+        mt.pool
+    results = [
+        mt._add_to_me_tube(f"https://example.com/watch?v={i}", "Best", "mp3")
+        for i in range(4)
+    ]
+
+    assert sum(result is None for result in results) == 1
+    assert (
+        sum(c.args[0] == "http://metube-1/add" for c in mock_post.call_args_list) == 1
+    )
+    reset_backend_pools()
+
+
+@patch("src.youtube_handler.me_tube_connector.DatabaseConnector")
+@patch("src.youtube_handler.me_tube_connector.requests.Session.get")
+def test_get_history_merges_backends(mock_get, mock_db_connector):
+    """Test that the history of all instances is combined."""
+    histories = {
+        "http://metube-1/history": {"done": [{"url": "a"}]},
+        "http://metube-2/history": {"done": [{"url": "b"}], "queue": [{"url": "c"}]},
+    }
+    mock_get.side_effect = lambda url, timeout: MagicMock(
+        json=MagicMock(return_value=histories[url])
+    )
+
+    mt = MeTubeConnector(base_url="http://metube-1,http://metube-2")
+
+    assert mt.get_history() == {
+        "queue": [{"url": "c"}],
+        "pending": [],
+        "done": [{"url": "a"}, {"url": "b"}],
+    }
+
+
+@patch(
+    "src.youtube_handler.me_tube_connector.MeTubeConnector._download_url",
+    side_effect=["queued", DeadlineExceeded("submitting to MeTube")],
+)
+@patch("src.youtube_handler.me_tube_connector.DatabaseConnector")
+def test_queue_download_deadline_lists_pending_urls(
+    mock_db_connector, mock_download_url
+):
+    """Test that the URLs not queued before the deadline are listed as pending."""
+    urls = [f"https://example.com/watch?v=song{i}" for i in range(3)]
+    deadline = Deadline(60)
+
+    mt = MeTubeConnector(base_url="https://example.com/api")
+    with pytest.raises(DeadlineExceeded) as exc_info:
+        mt.queue_download(urls, deadline=deadline)
+
+    assert exc_info.value.pending == urls[1:]
+    assert mock_download_url.call_args.args[-1] is deadline
+
+
+@patch("src.youtube_handler.youtube_album_fetcher.YoutubeAlbumFetcher.get_album_songs")
+@patch("src.youtube_handler.me_tube_connector.MeTubeConnector._add_to_me_tube")
+@patch("src.youtube_handler.me_tube_connector.DatabaseConnector")
+def test_download_url_deadline_records_accepted_songs(
+    mock_db_connector, mock_add_to_me_tube, mock_get_album_songs
+):
+    """Test that songs accepted before the deadline stay recorded."""
+    song_urls = [f"https://example.com/watch?v=song{i}" for i in range(3)]
+    mock_db_instance = MagicMock()
+    mock_db_instance.get_album.return_value = None
+    mock_db_instance.get_songs.return_value = song_urls[:1]
+    mock_db_connector.return_value = mock_db_instance
+    mock_get_album_songs.return_value = song_urls
+    mock_add_to_me_tube.side_effect = [
+        "queued",
+        DeadlineExceeded("submitting to MeTube"),
+    ]
+
+    mt = MeTubeConnector(base_url="https://example.com/api")
+    with pytest.raises(DeadlineExceeded):
+        mt._download_url(
+            "https://example.com/playlist?list=PL1",
+            "Best",
+            "mp3",
+            add_without_download=False,
+            deadline=Deadline(60),
+        )
+
+    mock_db_instance.add_songs.assert_called_once_with(
+        song_urls[1:2], download_state="queued"
+    )
+    assert not mock_db_instance.add_album.called
+
+
+@patch("src.youtube_handler.youtube_album_fetcher.YoutubeAlbumFetcher.get_album_songs")
+@patch("src.youtube_handler.me_tube_connector.DatabaseConnector")
+def test_queue_download_async_deadline_keeps_finished_albums(
+    mock_db_connector, mock_get_album_songs
+):
+    """Test that albums queued before the deadline are recorded."""
+    mock_db_instance = MagicMock()
+    mock_db_instance.get_album.return_value = None
+    mock_db_instance.get_songs.return_value = []
+    mock_db_connector.return_value = mock_db_instance
+
+    def get_album_songs(album_id, deadline):
+        if album_id == "PL1":
+            raise DeadlineExceeded("fetching the album songs")
+        return [f"song-{album_id}"]
+
+    mock_get_album_songs.side_effect = get_album_songs
+    urls = [f"https://example.com/playlist?list=PL{i}" for i in range(3)]
+
+    mt = MeTubeConnector(base_url="https://example.com/api")
+    with (
+        patch.object(mt, "_add_to_me_tube_async", return_value="queued"),
+        pytest.raises(DeadlineExceeded) as exc_info,
+    ):
+        asyncio.run(mt.queue_download_async(urls, deadline=Deadline(60)))
+
+    assert exc_info.value.pending == [urls[1]]
+    assert [c.args[0] for c in mock_db_instance.add_album.call_args_list] == [
+        urls[0],
+        urls[2],
+    ]
+
+
+@patch("src.youtube_handler.me_tube_connector.DatabaseConnector")
+def test_add_to_me_tube_expired_deadline_sends_nothing(mock_db_connector):
+    """Test that no request is sent once the deadline passed."""
+    mt = MeTubeConnector(base_url="https://example.com/api")
+    with (
+        patch.object(get_shared_session(mt.base_url), "post") as mock_post,
+        pytest.raises(DeadlineExceeded),
+    ):
+        mt._add_to_me_tube(
+            "https://example.com/watch?v=v", "Best", "mp3", deadline=Deadline(0)
+        )
+
+    assert not mock_post.called
+    assert mt.pool.backends[0].in_flight == 0
+    close_sessions()
+    reset_backend_pools()
+
+
+@patch("src.youtube_handler.me_tube_connector.DatabaseConnector")
+def test_expired_deadlines_do_not_eject_backends(mock_db_connector):
+    """Test that submissions given up on a deadline are no backend failures."""
+    mt = MeTubeConnector(base_url="https://a.example.com/api,https://b.example.com/api")
+    url = "https://example.com/watch?v=v"
+    with (
+        patch.object(mt, "_check_backends"),
+        patch.object(mt, "_check_backends_async"),
+    ):
+        for _ in range(3):
+            with pytest.raises(DeadlineExceeded):
+                mt._add_to_me_tube(url, "Best", "mp3", deadline=Deadline(0))
+            with pytest.raises(DeadlineExceeded):
+                asyncio.run(
+                    mt._add_to_me_tube_async(
+                        MagicMock(), url, "Best", "mp3", deadline=Deadline(0)
+                    )
+                )
+
+    for backend in mt.pool.backends:
+        assert backend.failures == 0
+        assert backend.ejected_until == 0.0
+        assert backend.in_flight == 0
+    close_sessions()
+    reset_backend_pools()
@@ -0,0 +1,114 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.youtube_handler.metadata_cache import (
+    MetadataCache,
+    get_metadata_cache,
+    reset_metadata_caches,
+)
+
+TTLS = {"artist": 60, "album": 3600}
+
+
+def test_memory_hit_skips_fetch():
+    cache = MetadataCache(None, 10, TTLS)
+    fetch = MagicMock(return_value={"name": "Artist"})
+
+    assert cache.get("artist", "UC1", fetch) == {"name": "Artist"}
+    assert cache.get("artist", "UC1", fetch) == {"name": "Artist"}
+
+    fetch.assert_called_once_with()
+    assert (cache.stats.hits, cache.stats.disk_hits, cache.stats.misses) == (1, 0, 1)
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = MetadataCache(None, 2, TTLS)
+    cache.get("album", "a", lambda: "A")
+    cache.get("album", "b", lambda: "B")
+    cache.get("album", "a", lambda: "A")
+    cache.get("album", "c", lambda: "C")
+
+    assert cache.get("album", "a", lambda: "A2") == "A"
+    assert cache.get("album", "c", lambda: "C2") == "C"
+    assert cache.get("album", "b", lambda: "B2") == "B2"
+
+
+@patch("src.youtube_handler.metadata_cache.time.time")
+def test_entries_expire_per_endpoint(mock_time):
+    cache = MetadataCache(None, 10, TTLS)
+    mock_time.return_value = 1000.0
+    cache.get("artist", "UC1", lambda: "old artist")
+    cache.get("album", "MP1", lambda: "old album")
+
+    mock_time.return_value = 1100.0
+
+    assert cache.get("artist", "UC1", lambda: "new artist") == "new artist"
+    assert cache.get("album", "MP1", lambda: "new album") == "old album"
+
+
+def test_endpoint_without_ttl_is_not_cached():
+    cache = MetadataCache(None, 10, TTLS)
+    fetch = MagicMock(return_value="songs")
+
+    cache.get("playlist", "PL1", fetch)
+    cache.get("playlist", "PL1", fetch)
+
+    assert fetch.call_count == 2
+    assert cache.stats.misses == 0
+
+
+def test_failed_fetch_is_not_cached():
+    cache = MetadataCache(None, 10, TTLS)
+
+    with pytest.raises(RuntimeError):
+        cache.get("artist", "UC1", MagicMock(side_effect=RuntimeError))
+
+    assert cache.get("artist", "UC1", lambda: "artist") == "artist"
+
+
+def test_disk_store_is_shared(tmp_path):
+    path = str(tmp_path / "cache" / "ytmusic.db")
+    writer = MetadataCache(path, 10, TTLS)
+    writer.get("album", "MP1", lambda: {"tracks": [1, 2]})
+    writer.close()
+
+    reader = MetadataCache(path, 10, TTLS)
+    fetch = MagicMock()
+
+    assert reader.get("album", "MP1", fetch) == {"tracks": [1, 2]}
+    assert reader.get("album", "MP1", fetch) == {"tracks": [1, 2]}
+    assert not fetch.called
+    assert (reader.stats.hits, reader.stats.disk_hits) == (1, 1)
+
+    reader.clear()
+    assert reader.get("album", "MP1", lambda: "fetched") == "fetched"
+    reader.close()
+
+
+def test_unserializable_value_stays_in_memory(tmp_path):
+    cache = MetadataCache(str(tmp_path / "ytmusic.db"), 10, TTLS)
+    value = object()
+
+    assert cache.get("artist", "UC1", lambda: value) is value
+    assert cache.get("artist", "UC1", lambda: None) is value
+    cache.close()
+
+
+def test_get_metadata_cache_reads_environment(tmp_path):
+    path = str(tmp_path / "ytmusic.db")
+    env = {
+        "YTMUSIC_CACHE_PATH": path,
+        "YTMUSIC_CACHE_SIZE": "5",
+        "YTMUSIC_CACHE_TTL_ARTIST": "0",
+    }
+    with patch.dict("os.environ", env):
+        cache = get_metadata_cache()
+        try:
+            assert cache is get_metadata_cache()
+            assert cache.path == path
+            assert cache.max_entries == 5
+            assert cache.ttls["artist"] == 0
+            assert cache.ttls["album"] == 86400
+        finally:
+            reset_metadata_caches()
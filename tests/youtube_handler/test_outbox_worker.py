@@ -0,0 +1,137 @@
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+import sqlalchemy as sa
+
+from src.database_connector import Base, DatabaseConnector
+from src.youtube_handler.me_tube_connector import MeTubeConnector
+from src.youtube_handler.outbox_worker import (
+    OutboxWorker,
+    start_outbox_worker,
+    stop_outbox_worker,
+)
+
+SONG_URL = "https://music.youtube.com/watch?v=a"
+ALBUM_URL = "https://music.youtube.com/playlist?list=PL1"
+
+
+@pytest.fixture
+def db():
+    with patch.object(DatabaseConnector, "_get_engine") as mocked_engine:
+        engine = sa.create_engine("sqlite:///:memory:")
+        mocked_engine.return_value = engine
+        connector = DatabaseConnector()
+    Base.metadata.create_all(engine)
+    yield connector
+    engine.dispose()
+
+
+@pytest.fixture
+def worker(db):
+    with patch.dict("os.environ", {"ME_TUBE_OUTBOX_RETRY_SECONDS": "0"}):
+        yield OutboxWorker(db_connector=db, mt_connector=MagicMock())
+
+
+def test_drain_once_delivers_entries(worker, db):
+    db.enqueue_outbox(SONG_URL, "Best", "mp3")
+    db.enqueue_outbox(ALBUM_URL, "High", "flac")
+
+    assert worker.drain_once() == 2
+
+    delivered = [c.args[0].url for c in worker.mt_connector.deliver.call_args_list]
+    assert delivered == [SONG_URL, ALBUM_URL]
+    assert db.get_outbox_counts() == {"done": 2}
+    assert worker.drain_once() == 0
+
+
+def test_drain_once_retries_and_dead_letters(worker, db):
+    worker.max_attempts = 2
+    worker.mt_connector.deliver.side_effect = RuntimeError("MeTube is down")
+    db.enqueue_outbox(SONG_URL, "Best", "mp3")
+
+    assert worker.drain_once() == 1
+    assert db.get_outbox_counts() == {"pending": 1}
+
+    assert worker.drain_once() == 1
+    assert db.get_outbox_counts() == {"dead": 1}
+    assert worker.drain_once() == 0
+
+
+def test_failed_delivery_rolls_back_recorded_rows(worker, db):
+    def deliver(entry):
+        db.add_song(entry.url)
+        raise RuntimeError("MeTube is down")
+
+    worker.mt_connector.deliver.side_effect = deliver
+    db.enqueue_outbox(SONG_URL, "Best", "mp3")
+
+    worker.drain_once()
+
+    assert db.get_song(SONG_URL) is None
+
+
+@patch("src.youtube_handler.youtube_album_fetcher.YoutubeAlbumFetcher.get_album_songs")
+@patch("src.youtube_handler.me_tube_connector.MeTubeConnector._add_to_me_tube")
+def test_failed_delivery_keeps_accepted_songs(
+    mock_add_to_me_tube, mock_get_album_songs, worker, db
+):
+    song_urls = [f"https://music.youtube.com/watch?v=s{i}" for i in range(3)]
+    db.add_song(song_urls[0])
+    mock_get_album_songs.return_value = song_urls
+    mock_add_to_me_tube.side_effect = ["ok", None]
+    worker.mt_connector = MeTubeConnector(
+        base_url="https://example.com", db_connector=db
+    )
+    db.enqueue_outbox(ALBUM_URL, "Best", "mp3")
+
+    worker.drain_once()
+
+    assert db.get_song(song_urls[1]) is not None
+    assert db.get_song(song_urls[2]) is None
+    assert db.get_album(ALBUM_URL) is None
+    assert db.get_outbox_counts() == {"pending": 1}
+
+
+def test_get_retry_delay(worker):
+    worker.retry_seconds = 30
+
+    assert worker.get_retry_delay(0) == 30
+    assert worker.get_retry_delay(3) == 240
+    assert worker.get_retry_delay(20) == 3600
+
+
+def test_start_and_stop(tmp_path):
+    engine = sa.create_engine(f"sqlite:///{tmp_path / 'music.db'}")
+    Base.metadata.create_all(engine)
+    with patch.object(DatabaseConnector, "_get_engine", return_value=engine):
+        db = DatabaseConnector()
+    worker = OutboxWorker(db_connector=db, mt_connector=MagicMock())
+    worker.poll_interval = 0.01
+    db.enqueue_outbox(SONG_URL, "Best", "mp3")
+
+    worker.start()
+    deadline = time.monotonic() + 5
+    while db.get_outbox_counts() != {"done": 1} and time.monotonic() < deadline:
+        time.sleep(0.01)
+    worker.stop(timeout=1)
+
+    assert worker._thread is None
+    assert db.get_outbox_counts() == {"done": 1}
+    worker.mt_connector.deliver.assert_called_once()
+    assert worker.mt_connector.deliver.call_args.args[0].url == SONG_URL
+    engine.dispose()
+
+
+@patch("src.youtube_handler.outbox_worker.OutboxWorker")
+def test_start_outbox_worker(mock_worker):
+    with patch.dict("os.environ", {"ME_TUBE_OUTBOX": "false"}):
+        assert start_outbox_worker() is None
+
+    with patch.dict("os.environ", {"ME_TUBE_OUTBOX": "true"}):
+        worker = start_outbox_worker()
+        assert start_outbox_worker() is worker
+
+    worker.start.assert_called_once_with()
+    stop_outbox_worker()
+    worker.stop.assert_called_once_with(timeout=30)
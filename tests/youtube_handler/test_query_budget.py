@@ -0,0 +1,88 @@
+from unittest.mock import patch
+
+import pytest
+import sqlalchemy as sa
+
+from src.database_connector import Base, DatabaseConnector
+from src.youtube_handler.youtube_album_fetcher import ArtistReleases
+from src.youtube_handler.youtube_download_handler import YoutubeDownloadHandler
+from tests.query_guard import assert_max_queries
+
+CHANNEL_URL = "https://music.youtube.com/channel/UC1"
+
+
+def get_album_songs(playlist_id, songs_per_album=30, deadline=None):
+    return [
+        f"https://music.youtube.com/watch?v={playlist_id}_{i}"
+        for i in range(songs_per_album)
+    ]
+
+
+@pytest.fixture
+def handler():
+    with patch.dict("os.environ", {"ME_TUBE_API_URL": "http://metube"}):
+        with patch.object(DatabaseConnector, "_get_engine") as mocked_engine:
+            engine = sa.create_engine("sqlite:///:memory:")
+            mocked_engine.return_value = engine
+            db = DatabaseConnector()
+            Base.metadata.create_all(engine)
+            yield YoutubeDownloadHandler(db)
+    engine.dispose()
+
+
+@pytest.fixture(autouse=True)
+def fetcher():
+    with (
+        patch(
+            "src.youtube_handler.youtube_download_handler.YoutubeAlbumFetcher"
+        ) as handler_fetcher,
+        patch(
+            "src.youtube_handler.me_tube_connector.YoutubeAlbumFetcher"
+        ) as connector_fetcher,
+        patch("src.youtube_handler.me_tube_connector.MeTubeConnector._add_to_me_tube"),
+        patch(
+            "src.youtube_handler.me_tube_connector."
+            "MeTubeConnector._add_to_me_tube_async"
+        ),
+    ):
+        handler_fetcher.get_album_songs.side_effect = get_album_songs
+        connector_fetcher.get_album_songs.side_effect = get_album_songs
+        yield handler_fetcher
+
+
+@pytest.mark.parametrize("album_count", [1, 5])
+def test_handle_channel_url_query_budget(handler, fetcher, album_count):
+    album_urls = [
+        f"https://music.youtube.com/playlist?list=PL{i}" for i in range(album_count)
+    ]
+    fetcher.get_artist_releases.return_value = ArtistReleases(
+        album_urls, ["PL"], "fingerprint"
+    )
+
+    with assert_max_queries(
+        statements=4 + 7 * album_count, round_trips=6 + 7 * album_count
+    ):
+        handler._handle_channel_url(
+            CHANNEL_URL, False, quality="Best", download_format="mp3"
+        )
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        "https://music.youtube.com/playlist?list=PL1",
+        "https://music.youtube.com/watch?v=abc",
+    ],
+)
+def test_queue_download_query_budget(handler, url):
+    with assert_max_queries(statements=7, round_trips=9):
+        with handler.db_connector.transaction():
+            handler.mt_connector.queue_download(url)
+
+
+def test_queue_download_known_url_query_budget(handler):
+    url = "https://music.youtube.com/playlist?list=PL1"
+    handler.mt_connector.queue_download(url)
+
+    with assert_max_queries(statements=1, round_trips=2):
+        handler.mt_connector.queue_download(url)
@@ -0,0 +1,37 @@
+import pytest
+
+from src.youtube_handler.release_classifier import (
+    RELEASE_EP,
+    RELEASE_SINGLE,
+    RELEASE_UNKNOWN,
+    ClassifierStats,
+    classify_release,
+)
+
+
+@pytest.mark.parametrize(
+    "release, expected",
+    [
+        ({"type": "Single", "year": "2023"}, RELEASE_SINGLE),
+        ({"type": "EP", "year": "2023"}, RELEASE_EP),
+        ({"type": "Album"}, RELEASE_EP),
+        ({"year": "2023"}, RELEASE_UNKNOWN),
+        ({"type": "Audiobook"}, RELEASE_UNKNOWN),
+        ({"type": "Single", "trackCount": 3}, RELEASE_EP),
+        ({"type": "EP", "trackCount": "1"}, RELEASE_SINGLE),
+        ({"tracks": [{"videoId": "a"}]}, RELEASE_SINGLE),
+        ({"trackCount": "many", "type": "EP"}, RELEASE_EP),
+    ],
+)
+def test_classify_release(release, expected):
+    assert classify_release(release) == expected
+
+
+def test_classifier_stats():
+    stats = ClassifierStats()
+
+    stats.count(avoided=3, fetched=1)
+    stats.count(avoided=2, fetched=0)
+
+    assert (stats.avoided, stats.fetched) == (5, 1)
+    assert repr(stats) == "ClassifierStats(avoided=5, fetched=1)"
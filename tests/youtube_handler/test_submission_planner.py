@@ -0,0 +1,62 @@
+from unittest.mock import MagicMock
+
+from src.youtube_handler.submission_planner import (
+    SUBMIT_NOTHING,
+    SUBMIT_SONGS,
+    SUBMIT_URL,
+    plan_submission,
+)
+
+PLAYLIST_URL = "https://music.youtube.com/playlist?list=PL1"
+SONG_URLS = [f"https://music.youtube.com/watch?v=v{i}" for i in range(4)]
+
+
+def make_db(known):
+    db = MagicMock()
+    db.get_songs.side_effect = lambda urls: [url for url in urls if url in known]
+    return db
+
+
+def test_plan_song_url():
+    db = make_db([])
+    plan = plan_submission(db, SONG_URLS[0], None)
+
+    assert plan.action == SUBMIT_URL
+    assert plan.submit_urls == [SONG_URLS[0]]
+    assert not db.get_songs.called
+
+
+def test_plan_empty_playlist():
+    plan = plan_submission(make_db([]), PLAYLIST_URL, [])
+
+    assert plan.action == SUBMIT_URL
+    assert plan.submit_urls == [PLAYLIST_URL]
+
+
+def test_plan_new_playlist():
+    plan = plan_submission(make_db([]), PLAYLIST_URL, SONG_URLS)
+
+    assert plan.action == SUBMIT_URL
+    assert plan.submit_urls == [PLAYLIST_URL]
+    assert plan.song_urls == SONG_URLS
+
+
+def test_plan_partially_known_playlist():
+    plan = plan_submission(make_db(SONG_URLS[:3]), PLAYLIST_URL, SONG_URLS)
+
+    assert plan.action == SUBMIT_SONGS
+    assert plan.submit_urls == [SONG_URLS[3]]
+
+
+def test_plan_partially_known_playlist_skips_duplicates():
+    song_urls = SONG_URLS + [SONG_URLS[3]]
+    plan = plan_submission(make_db(SONG_URLS[:1]), PLAYLIST_URL, song_urls)
+
+    assert plan.submit_urls == SONG_URLS[1:]
+
+
+def test_plan_known_playlist():
+    plan = plan_submission(make_db(SONG_URLS), PLAYLIST_URL, SONG_URLS)
+
+    assert plan.action == SUBMIT_NOTHING
+    assert plan.submit_urls == []
@@ -1,8 +1,28 @@
-from unittest.mock import patch
+import threading
+import time
+from unittest.mock import MagicMock, patch
 
 import pytest
 
-from src.youtube_handler.youtube_album_fetcher import YoutubeAlbumFetcher
+from src.deadline import Deadline, DeadlineExceeded
+
+from src.youtube_handler.metadata_cache import get_metadata_cache, reset_metadata_caches
+from src.youtube_handler.youtube_album_fetcher import (
+    DeadlineSession,
+    YoutubeAlbumFetcher,
+    get_ytmusic,
+    set_ytmusic,
+)
+
+
+@pytest.fixture
+def mock_ytmusic():
+    client = MagicMock()
+    set_ytmusic(client)
+    reset_metadata_caches()
+    yield client
+    set_ytmusic(None)
+    reset_metadata_caches()
 
 
 @patch("src.youtube_handler.youtube_album_fetcher.YoutubeAlbumFetcher._get_id_by_url")
@@ -98,7 +118,9 @@ def test_get_albums(mock_get_eps):
     result = YoutubeAlbumFetcher._get_albums(artist_details, get_eps=True)
 
     assert result == expected_album_ids
-    mock_get_eps.assert_called_once_with(artist_details)
+    mock_get_eps.assert_called_once_with(
+        artist_details, skip_ids=(), deadline=None, failed_ids=None
+    )
 
 
 @patch("src.youtube_handler.youtube_album_fetcher.YoutubeAlbumFetcher.get_eps")
@@ -119,7 +141,9 @@ def test_get_albums_no_eps_found(mock_get_eps):
     result = YoutubeAlbumFetcher._get_albums(artist_details, get_eps=True)
 
     assert result == expected_album_ids
-    mock_get_eps.assert_called_once_with(artist_details)
+    mock_get_eps.assert_called_once_with(
+        artist_details, skip_ids=(), deadline=None, failed_ids=None
+    )
 
 
 @patch("src.youtube_handler.youtube_album_fetcher.YoutubeAlbumFetcher.get_eps")
@@ -178,7 +202,6 @@ def test_get_albums_missing_audio_playlist_id():
         assert "No album details found" in str(error.value)
 
 
-@patch("src.youtube_handler.youtube_album_fetcher.ytmusic")
 def test_get_artist_details(mock_ytmusic):
     """Test fetching artist details from YouTube Music by artist ID."""
     artist_id = "UC1234567890"
@@ -192,7 +215,6 @@ def test_get_artist_details(mock_ytmusic):
     mock_ytmusic.get_artist.assert_called_once_with(artist_id)
 
 
-@patch("src.youtube_handler.youtube_album_fetcher.ytmusic")
 def test_get_album_songs(mock_ytmusic):
     """Test fetching song URLs from a YouTube Music playlist ID."""
     playlist_id = "ALBUM_ID_123"
@@ -214,7 +236,6 @@ def test_get_album_songs(mock_ytmusic):
     mock_ytmusic.get_playlist.assert_called_once_with(playlist_id, limit=None)
 
 
-@patch("src.youtube_handler.youtube_album_fetcher.ytmusic")
 def test_get_eps(mock_ytmusic):
     """Test fetching EP IDs from artist details."""
 
@@ -255,3 +276,236 @@ def test_get_eps(mock_ytmusic):
     assert result == expected_eps
     mock_ytmusic.get_album.assert_any_call("EP_ID_1")
     mock_ytmusic.get_album.assert_any_call("EP_ID_2")
+
+
+def test_get_release_ids():
+    """Test extracting album and single IDs from artist details."""
+    artist_details = {
+        "albums": {"results": [{"audioPlaylistId": "ALBUM_ID_1"}]},
+        "singles": {"results": [{"browseId": "SINGLE_ID_1"}, {"title": "x"}]},
+    }
+
+    result = YoutubeAlbumFetcher.get_release_ids(artist_details)
+
+    assert result == ["ALBUM_ID_1", "SINGLE_ID_1"]
+    assert YoutubeAlbumFetcher.get_release_ids({}) == []
+
+
+def test_get_release_fingerprint():
+    """Test that the fingerprint only depends on the set of releases."""
+    fingerprint = YoutubeAlbumFetcher.get_release_fingerprint(["A", "B"])
+
+    assert fingerprint == YoutubeAlbumFetcher.get_release_fingerprint(["B", "A"])
+    assert fingerprint != YoutubeAlbumFetcher.get_release_fingerprint(["A", "C"])
+
+
+@patch("src.youtube_handler.youtube_album_fetcher.YoutubeAlbumFetcher._get_albums")
+@patch(
+    "src.youtube_handler.youtube_album_fetcher.YoutubeAlbumFetcher._get_artist_details"
+)
+def test_get_artist_releases_unchanged(mock_get_artist_details, mock_get_albums):
+    """Test that an unchanged release list skips resolving releases."""
+    artist_details = {"albums": {"results": [{"audioPlaylistId": "ALBUM_ID_1"}]}}
+    mock_get_artist_details.return_value = artist_details
+    fingerprint = YoutubeAlbumFetcher.get_release_fingerprint(["ALBUM_ID_1"])
+
+    result = YoutubeAlbumFetcher.get_artist_releases(
+        "https://music.youtube.com/channel/UC1",
+        known_fingerprint=fingerprint,
+        known_release_ids=["ALBUM_ID_1"],
+    )
+
+    assert result.album_urls == []
+    assert result.release_ids == ["ALBUM_ID_1"]
+    assert result.fingerprint == fingerprint
+    mock_get_artist_details.assert_called_once_with("UC1", deadline=None)
+    assert not mock_get_albums.called
+
+
+@patch(
+    "src.youtube_handler.youtube_album_fetcher.YoutubeAlbumFetcher._get_artist_details"
+)
+def test_get_artist_releases_only_new(mock_get_artist_details, mock_ytmusic):
+    """Test that only new releases are resolved and returned."""
+    mock_get_artist_details.return_value = {
+        "albums": {
+            "results": [
+                {"audioPlaylistId": "ALBUM_ID_1"},
+                {"audioPlaylistId": "ALBUM_ID_2"},
+            ]
+        },
+        "singles": {"results": [{"browseId": "SINGLE_ID_1"}, {"browseId": "EP_1"}]},
+    }
+    mock_ytmusic.get_album.return_value = {
+        "tracks": ["Track 1", "Track 2"],
+        "audioPlaylistId": "EP_ID_1",
+    }
+
+    result = YoutubeAlbumFetcher.get_artist_releases(
+        "https://music.youtube.com/channel/UC1",
+        known_fingerprint="OLD",
+        known_release_ids=["ALBUM_ID_1", "SINGLE_ID_1"],
+    )
+
+    assert result.album_urls == [
+        "https://music.youtube.com/playlist?list=ALBUM_ID_2",
+        "https://music.youtube.com/playlist?list=EP_ID_1",
+    ]
+    assert result.release_ids == ["ALBUM_ID_1", "ALBUM_ID_2", "SINGLE_ID_1", "EP_1"]
+    mock_ytmusic.get_album.assert_called_once_with("EP_1")
+
+
+@patch(
+    "src.youtube_handler.youtube_album_fetcher.YoutubeAlbumFetcher._get_artist_details"
+)
+def test_get_artist_releases_leaves_out_failed_singles(
+    mock_get_artist_details, mock_ytmusic
+):
+    """Test that singles that could not be fetched are retried the next time."""
+    mock_get_artist_details.return_value = {
+        "albums": {"results": [{"audioPlaylistId": "ALBUM_ID_1"}]},
+        "singles": {"results": [{"browseId": "EP_1"}]},
+    }
+    mock_ytmusic.get_album.side_effect = Exception("unavailable")
+
+    failed = YoutubeAlbumFetcher.get_artist_releases(
+        "https://music.youtube.com/channel/UC1"
+    )
+
+    assert failed.album_urls == ["https://music.youtube.com/playlist?list=ALBUM_ID_1"]
+    assert failed.release_ids == ["ALBUM_ID_1"]
+    assert failed.fingerprint == YoutubeAlbumFetcher.get_release_fingerprint(
+        ["ALBUM_ID_1"]
+    )
+
+    mock_ytmusic.get_album.side_effect = None
+    mock_ytmusic.get_album.return_value = {
+        "tracks": ["Track 1", "Track 2"],
+        "audioPlaylistId": "EP_ID_1",
+    }
+    retried = YoutubeAlbumFetcher.get_artist_releases(
+        "https://music.youtube.com/channel/UC1",
+        known_fingerprint=failed.fingerprint,
+        known_release_ids=failed.release_ids,
+    )
+
+    assert retried.album_urls == ["https://music.youtube.com/playlist?list=EP_ID_1"]
+    assert retried.release_ids == ["ALBUM_ID_1", "EP_1"]
+
+
+@patch("ytmusicapi.YTMusic")
+def test_get_ytmusic_creates_client_once(mock_ytmusic_class):
+    """Test that the YouTube Music client is created on first use only."""
+    set_ytmusic(None)
+    try:
+        assert get_ytmusic() is mock_ytmusic_class.return_value
+        assert get_ytmusic() is mock_ytmusic_class.return_value
+        mock_ytmusic_class.assert_called_once()
+        session = mock_ytmusic_class.call_args.kwargs["requests_session"]
+        assert isinstance(session, DeadlineSession)
+    finally:
+        set_ytmusic(None)
+
+
+@patch("src.youtube_handler.youtube_album_fetcher.requests.Session.request")
+def test_deadline_session_limits_timeout(mock_request):
+    """Test that YouTube Music requests time out with the current deadline."""
+    session = DeadlineSession(timeout=30)
+
+    session.request("POST", "https://music.youtube.com")
+    assert mock_request.call_args.kwargs["timeout"] == 30
+
+    Deadline(5).call("fetching", session.request, "POST", "https://music.youtube.com")
+    assert mock_request.call_args.kwargs["timeout"] <= 5
+
+    Deadline(5).call(
+        "fetching", session.request, "GET", "https://music.youtube.com", timeout=(3, 60)
+    )
+    connect, read = mock_request.call_args.kwargs["timeout"]
+    assert connect == 3
+    assert read <= 5
+
+
+def test_get_artist_details_cached(mock_ytmusic):
+    """Test that a repeated artist lookup is answered from the cache."""
+    mock_ytmusic.get_artist.return_value = {"name": "Test Artist"}
+
+    first = YoutubeAlbumFetcher._get_artist_details("UC1")
+    second = YoutubeAlbumFetcher._get_artist_details("UC1")
+
+    assert first == second == {"name": "Test Artist"}
+    mock_ytmusic.get_artist.assert_called_once_with("UC1")
+    assert get_metadata_cache().stats.hits == 1
+
+
+def test_get_eps_concurrent_keeps_order(mock_ytmusic):
+    """Test that singles are fetched concurrently and EPs keep their order."""
+    lock = threading.Lock()
+    running = 0
+    max_running = 0
+
+    def get_album(browse_id):
+        nonlocal running, max_running
+        with lock:
+            running += 1
+            max_running = max(max_running, running)
+        time.sleep(0.02 if browse_id == "EP_0" else 0.01)
+        with lock:
+            running -= 1
+        return {"tracks": [1, 2], "audioPlaylistId": f"{browse_id}_PL"}
+
+    mock_ytmusic.get_album.side_effect = get_album
+    singles = [{"browseId": f"EP_{i}"} for i in range(6)]
+
+    with patch.dict("os.environ", {"YTMUSIC_MAX_WORKERS": "3"}):
+        result = YoutubeAlbumFetcher.get_eps({"singles": {"results": singles}})
+
+    assert result == [f"EP_{i}_PL" for i in range(6)]
+    assert 1 < max_running <= 3
+
+
+def test_get_eps_isolates_failing_singles(mock_ytmusic):
+    """Test that a failing single does not stop the other singles."""
+
+    def get_album(browse_id):
+        if browse_id == "EP_1":
+            raise KeyError("tracks")
+        return {"tracks": [1, 2], "audioPlaylistId": f"{browse_id}_PL"}
+
+    mock_ytmusic.get_album.side_effect = get_album
+    singles = [{"browseId": f"EP_{i}"} for i in range(3)]
+
+    result = YoutubeAlbumFetcher.get_eps({"singles": {"results": singles}})
+
+    assert result == ["EP_0_PL", "EP_2_PL"]
+
+
+def test_get_eps_raises_deadline_exceeded(mock_ytmusic):
+    """Test that an expired deadline is not mistaken for a failing single."""
+    mock_ytmusic.get_album.side_effect = DeadlineExceeded("fetching the EPs")
+
+    with pytest.raises(DeadlineExceeded):
+        YoutubeAlbumFetcher.get_eps({"singles": {"results": [{"browseId": "EP_1"}]}})
+
+
+@patch("src.youtube_handler.youtube_album_fetcher.classifier_stats")
+def test_get_eps_classifies_without_fetching(mock_stats, mock_ytmusic):
+    """Test that only singles without a usable label are fetched."""
+    mock_ytmusic.get_album.return_value = {
+        "tracks": [1, 2, 3],
+        "audioPlaylistId": "UNLABELLED_PL",
+    }
+    singles = [
+        {"browseId": "SINGLE", "type": "Single", "year": "2024"},
+        {"browseId": "EP_KNOWN", "type": "EP", "audioPlaylistId": "EP_KNOWN_PL"},
+        {"browseId": "UNLABELLED", "year": "2023"},
+        {"browseId": "SKIPPED", "type": "EP"},
+    ]
+
+    result = YoutubeAlbumFetcher.get_eps(
+        {"singles": {"results": singles}}, skip_ids={"SKIPPED"}
+    )
+
+    assert result == ["EP_KNOWN_PL", "UNLABELLED_PL"]
+    mock_ytmusic.get_album.assert_called_once_with("UNLABELLED")
+    mock_stats.count.assert_called_once_with(2, 1)
@@ -1,7 +1,10 @@
-from unittest.mock import patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
+from src.deadline import Deadline, DeadlineExceeded
+from src.youtube_handler.me_tube_connector import QueuedDownload
+from src.youtube_handler.youtube_album_fetcher import ArtistReleases
 from src.youtube_handler.youtube_download_handler import YoutubeDownloadHandler
 
 
@@ -45,6 +48,7 @@ def test_download_channel_url(
         True,
         quality=quality,
         download_format=download_format,
+        deadline=None,
     )
     assert not mock_me_tube_connector().queue_download.called
 
@@ -71,6 +75,7 @@ def test_download_playlist_url(
         quality="High",
         download_format="flac",
         add_without_download=False,
+        deadline=None,
     )
     assert not mock_handle_channel_url.called
 
@@ -117,8 +122,13 @@ def test_handle_channel_url(
     song_url = "https://example.com/song1"
     album_songs = [song_url]
 
-    mock_youtube_album_fetcher.get_album_ids.return_value = album_urls
+    mock_youtube_album_fetcher.get_artist_releases.return_value = ArtistReleases(
+        album_urls, ["RELEASE_ID_1"], "FINGERPRINT"
+    )
     mock_youtube_album_fetcher.get_album_songs.return_value = album_songs
+    mock_me_tube_connector().queue_download_async = AsyncMock(
+        return_value=[QueuedDownload(album_url, None, None)]
+    )
 
     handler = YoutubeDownloadHandler(db_connector=mock_db_connector)
     handler._handle_channel_url(
@@ -128,24 +138,32 @@ def test_handle_channel_url(
         download_format=download_format,
     )
 
-    mock_youtube_album_fetcher.get_album_ids.assert_called_once_with(url)
+    mock_youtube_album_fetcher.get_artist_releases.assert_called_once_with(
+        url, deadline=None
+    )
 
     mock_db_connector.add_artist.assert_called_once_with(
         url,
         auto_download=auto_download,
     )
 
-    mock_me_tube_connector().queue_download.assert_called_once_with(
-        album_url,
+    mock_me_tube_connector().queue_download_async.assert_awaited_once_with(
+        album_urls,
         quality=quality,
         download_format=download_format,
         add_without_download=False,
+        deadline=None,
     )
 
-    mock_db_connector.add_album.assert_called_once_with(album_url)
-
-    mock_youtube_album_fetcher.get_album_songs.assert_called_once_with(album_id)
-    mock_db_connector.add_song.assert_called_once_with(song_url)
+    # the connector records the accepted albums and their songs
+    assert not mock_youtube_album_fetcher.get_album_songs.called
+    assert not mock_db_connector.add_album.called
+    assert not mock_db_connector.add_songs.called
+    mock_db_connector.transaction.assert_called_once_with()
+    assert mock_db_connector.commit.call_count == 1
+    mock_db_connector.save_artist_catalog.assert_called_once_with(
+        url, "FINGERPRINT", ["RELEASE_ID_1"]
+    )
 
 
 @pytest.mark.parametrize("auto_download", [True, False])
@@ -166,8 +184,10 @@ def test_handle_channel_url_download_error(
     quality = "High"
     download_format = "mp4"
 
-    mock_youtube_album_fetcher.get_album_ids.return_value = album_urls
-    mock_me_tube_connector().queue_download.side_effect = ValueError
+    mock_youtube_album_fetcher.get_artist_releases.return_value = ArtistReleases(
+        album_urls, ["RELEASE_ID_1"], "FINGERPRINT"
+    )
+    mock_me_tube_connector().queue_download_async = AsyncMock(side_effect=ValueError)
 
     with pytest.raises(RuntimeError):
         handler = YoutubeDownloadHandler(db_connector=mock_db_connector)
@@ -178,14 +198,80 @@ def test_handle_channel_url_download_error(
             download_format=download_format,
         )
 
-    mock_youtube_album_fetcher.get_album_ids.assert_called_once_with(url)
+    mock_youtube_album_fetcher.get_artist_releases.assert_called_once_with(
+        url, deadline=None
+    )
     mock_db_connector.add_artist.assert_called_once_with(
         url,
         auto_download=auto_download,
     )
 
     assert not mock_db_connector.add_album.called
-    assert not mock_db_connector.add_song.called
+    assert not mock_db_connector.add_songs.called
+    assert mock_db_connector.commit.call_count == 1
+    assert not mock_db_connector.save_artist_catalog.called
+
+
+@patch("src.youtube_handler.youtube_download_handler.DatabaseConnector")
+@patch("src.youtube_handler.youtube_download_handler.MeTubeConnector")
+@patch("src.youtube_handler.youtube_download_handler.YoutubeAlbumFetcher")
+def test_handle_channel_url_rejected_album(
+    mock_youtube_album_fetcher, mock_me_tube_connector, mock_db_connector
+):
+    """Test that the catalog is not saved if MeTube rejected an album."""
+    album_urls = [
+        "https://example.com/playlist?list=ALBUM_ID_1",
+        "https://example.com/playlist?list=ALBUM_ID_2",
+    ]
+    url = "https://www.example.com/channel/CHANNEL_ID"
+
+    mock_youtube_album_fetcher.get_artist_releases.return_value = ArtistReleases(
+        album_urls, ["ALBUM_ID_1", "ALBUM_ID_2"], "FINGERPRINT"
+    )
+    mock_me_tube_connector().queue_download_async = AsyncMock(
+        return_value=[
+            QueuedDownload(album_urls[0], None, ["https://example.com/song1"]),
+            QueuedDownload(album_urls[1], None, None, failed=True),
+        ]
+    )
+
+    handler = YoutubeDownloadHandler(db_connector=mock_db_connector)
+    handler._handle_channel_url(
+        url, auto_download=True, quality="High", download_format="mp4"
+    )
+
+    assert not mock_db_connector.save_artist_catalog.called
+
+
+@patch("src.youtube_handler.youtube_download_handler.DatabaseConnector")
+@patch("src.youtube_handler.youtube_download_handler.MeTubeConnector")
+@patch("src.youtube_handler.youtube_download_handler.YoutubeAlbumFetcher")
+def test_handle_channel_url_outboxed_album(
+    mock_youtube_album_fetcher, mock_me_tube_connector, mock_db_connector
+):
+    """Test that the catalog is not saved while an album waits in the outbox."""
+    album_urls = [
+        "https://example.com/playlist?list=ALBUM_ID_1",
+        "https://example.com/playlist?list=ALBUM_ID_2",
+    ]
+    url = "https://www.example.com/channel/CHANNEL_ID"
+
+    mock_youtube_album_fetcher.get_artist_releases.return_value = ArtistReleases(
+        album_urls, ["ALBUM_ID_1", "ALBUM_ID_2"], "FINGERPRINT"
+    )
+    mock_me_tube_connector().queue_download_async = AsyncMock(
+        return_value=[
+            QueuedDownload(album_urls[0], None, None),
+            QueuedDownload(album_urls[1], None, None, outboxed=True),
+        ]
+    )
+
+    handler = YoutubeDownloadHandler(db_connector=mock_db_connector)
+    handler._handle_channel_url(
+        url, auto_download=True, quality="High", download_format="mp4"
+    )
+
+    assert not mock_db_connector.save_artist_catalog.called
 
 
 @patch("src.youtube_handler.youtube_download_handler.DatabaseConnector")
@@ -208,3 +294,25 @@ def test_get_warning_no_warning(mock_me_tube_connector, mock_db_connector):
     result = handler.get_warning(url)
 
     assert result is None
+
+
+@patch("src.youtube_handler.youtube_download_handler.MeTubeConnector")
+def test_download_deadline_commits_partial_result(mock_me_tube_connector):
+    """Test that work done before the deadline is committed before re-raising."""
+    url = "https://www.youtube.com/playlist?list=PL1"
+    db_connector = MagicMock()
+    deadline = Deadline(60)
+    mock_me_tube_connector().queue_download.side_effect = DeadlineExceeded(
+        "submitting to MeTube", [url]
+    )
+
+    handler = YoutubeDownloadHandler(db_connector=db_connector)
+    with pytest.raises(DeadlineExceeded) as exc_info:
+        handler.download(url, deadline=deadline)
+
+    assert exc_info.value.pending == [url]
+    call = mock_me_tube_connector().queue_download.call_args
+    assert call.kwargs["deadline"] is deadline
+    db_connector.transaction.return_value.__exit__.assert_called_once_with(
+        None, None, None
+    )